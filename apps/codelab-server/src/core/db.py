@@ -1,12 +1,57 @@
 import logging
 
+from sqlalchemy import Engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
 from sqlmodel import Session, create_engine, select
 
 from src.core.config import settings
 
 logger = logging.getLogger(__name__)
 
-engine = create_engine(str(settings.SQLALCHEMY_DATABASE_URI))
+
+def _configure_sqlite_connection(dbapi_connection, connection_record) -> None:  # noqa: ARG001
+    """Apply the concurrency pragmas to every new SQLite connection."""
+    cursor = dbapi_connection.cursor()
+    if settings.SQLITE_WAL_MODE:
+        cursor.execute("PRAGMA journal_mode=WAL")
+        # fsync on checkpoints only, still durable against application crashes
+        cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT * 1000)}")
+    cursor.close()
+
+
+def create_database_engine(database_uri: str) -> Engine:
+    """
+    Create the engine for the configured database backend.
+
+    SQLite is shared by the API server and every worker process, so its
+    connections use WAL and a busy timeout to let writers wait for the lock
+    instead of failing. Other backends get a pre-pinged connection pool.
+    """
+    pool_options = {
+        "pool_size": settings.DATABASE_POOL_SIZE,
+        "max_overflow": settings.DATABASE_MAX_OVERFLOW,
+        "pool_timeout": settings.DATABASE_POOL_TIMEOUT,
+    }
+
+    if make_url(database_uri).get_backend_name() != "sqlite":
+        return create_engine(database_uri, pool_pre_ping=True, **pool_options)
+
+    sqlite_engine = create_engine(
+        database_uri,
+        poolclass=QueuePool,
+        connect_args={
+            "timeout": settings.SQLITE_BUSY_TIMEOUT,
+            "check_same_thread": False,
+        },
+        **pool_options,
+    )
+    event.listen(sqlite_engine, "connect", _configure_sqlite_connection)
+    return sqlite_engine
+
+
+engine = create_database_engine(str(settings.SQLALCHEMY_DATABASE_URI))
 
 
 # make sure all SQLModel models are imported (src.models) before initializing DB
@@ -1,14 +1,95 @@
+import os
+import threading
+import time
+
 import docker  # type: ignore
 import docker.errors  # type: ignore
+from requests.exceptions import RequestException
 
+from src.core.config import settings
 from src.log import logger
 
+# a single client and connection pool per process, created again after a fork
+_client: docker.DockerClient | None = None
+_client_pid: int | None = None
+_last_health_check = 0.0
+_lock = threading.Lock()
 
-def get_shared_docker_client() -> docker.DockerClient:
-    """Get a shared Docker client."""
+
+def _pool_size() -> int:
+    """
+    Connections kept to the Docker daemon, each execution may stream an exec
+    while killing or stopping its program from another connection.
+    """
+    if settings.DOCKER_CLIENT_POOL_SIZE:
+        return settings.DOCKER_CLIENT_POOL_SIZE
+
+    return max(
+        settings.MAX_CONCURRENT_EXECUTIONS * 2,
+        settings.CONTAINER_PREWARM_CONCURRENCY,
+        docker.constants.DEFAULT_MAX_POOL_SIZE,
+    )
+
+
+def _connect() -> docker.DockerClient:
     try:
-        client = docker.from_env()
+        client = docker.from_env(max_pool_size=_pool_size())
+        client.ping()
         return client
-    except docker.errors.DockerException:
+    except (docker.errors.DockerException, RequestException):
         logger.exception("Unable to connect to docker server.")
         raise RuntimeError("Unable to connect to docker server")
+
+
+def _is_healthy(client: docker.DockerClient) -> bool:
+    try:
+        return bool(client.ping())
+    except (docker.errors.DockerException, RequestException) as error:
+        logger.warning(
+            'src::core::docker::_is_healthy:: '
+            f'Docker server health check failed, reconnecting: {error}'
+        )
+        return False
+
+
+def get_shared_docker_client() -> docker.DockerClient:
+    """
+    Get the Docker client shared by the threads of the process.
+
+    The connection is checked at most once per `DOCKER_CLIENT_HEALTH_CHECK_SECONDS`
+    and replaced when the Docker server stopped answering. The check runs
+    outside the lock and a replaced client is not closed, other threads may
+    still be streaming through it.
+    """
+    global _client, _client_pid, _last_health_check
+
+    with _lock:
+        now = time.monotonic()
+
+        if _client is None or _client_pid != os.getpid():
+            # connections inherited from the parent process are not reused
+            _client = _connect()
+            _client_pid = os.getpid()
+            _last_health_check = now
+            return _client
+
+        client = _client
+        if now - _last_health_check < settings.DOCKER_CLIENT_HEALTH_CHECK_SECONDS:
+            return client
+
+        # other threads keep using the client while this one checks it
+        _last_health_check = now
+
+    if _is_healthy(client):
+        return client
+
+    replacement = _connect()
+    with _lock:
+        if _client is not client:
+            # replaced by another thread in the meantime
+            replacement.close()
+            return _client
+
+        _client = replacement
+        _last_health_check = time.monotonic()
+        return _client
@@ -0,0 +1,70 @@
+import statistics
+
+from pydantic import BaseModel
+from redis.exceptions import RedisError
+
+from src.core.redis import get_shared_redis_client
+from src.log import logger
+
+METRICS_REDIS_PREFIX = "vpl:metrics"
+METRICS_SAMPLE_SIZE = 1000
+
+CONTAINER_START_LATENCY = "container_start_latency_seconds"
+TASK_QUEUE_WAIT = "task_queue_wait_seconds"
+
+# metrics exposed by the metrics endpoint
+TRACKED_METRICS = (CONTAINER_START_LATENCY, TASK_QUEUE_WAIT)
+
+
+class MetricSummary(BaseModel):
+    """Summary of the most recent samples of a metric."""
+
+    name: str
+    count: int
+    mean: float | None = None
+    p50: float | None = None
+    p95: float | None = None
+    max: float | None = None
+
+
+def _metric_key(name: str) -> str:
+    return f"{METRICS_REDIS_PREFIX}:{name}"
+
+
+def record_metric(name: str, value: float) -> None:
+    """Record a sample of a metric, only the most recent samples are kept."""
+    try:
+        redis_client = get_shared_redis_client()
+        with redis_client.pipeline() as pipeline:
+            pipeline.lpush(_metric_key(name), value)
+            pipeline.ltrim(_metric_key(name), 0, METRICS_SAMPLE_SIZE - 1)
+            pipeline.execute()
+    except RedisError as error:
+        logger.warning(
+            'src::core::metrics::record_metric:: '
+            f'Failed to record metric {name}: {error}'
+        )
+
+
+def get_metric_samples(name: str, sample_size: int | None = None) -> list[float]:
+    """Get the most recent samples of a metric, newest first."""
+    redis_client = get_shared_redis_client()
+    end = sample_size - 1 if sample_size is not None else -1
+    return [float(value) for value in redis_client.lrange(_metric_key(name), 0, end)]
+
+
+def summarize_metric(name: str, sample_size: int | None = None) -> MetricSummary:
+    """Summarize the most recent samples of a metric, all kept samples by default."""
+    samples = get_metric_samples(name, sample_size)
+    if not samples:
+        return MetricSummary(name=name, count=0)
+
+    ordered = sorted(samples)
+    return MetricSummary(
+        name=name,
+        count=len(ordered),
+        mean=statistics.fmean(ordered),
+        p50=ordered[int(0.50 * (len(ordered) - 1))],
+        p95=ordered[int(0.95 * (len(ordered) - 1))],
+        max=ordered[-1],
+    )
@@ -0,0 +1,23 @@
+import redis
+import redis.asyncio
+
+from src.core.config import settings
+
+# a single connection pool per process, redis-py resets it after a fork
+_connection_pool = redis.ConnectionPool.from_url(
+    settings.WORKER_BROKER_URL,
+    decode_responses=True,
+)
+
+
+def get_shared_redis_client() -> redis.Redis:
+    """Get a Redis client backed by the shared connection pool."""
+    return redis.Redis(connection_pool=_connection_pool)
+
+
+def get_async_redis_client() -> redis.asyncio.Redis:
+    """Get an asyncio Redis client, callers are responsible for closing it."""
+    return redis.asyncio.Redis.from_url(
+        settings.WORKER_BROKER_URL,
+        decode_responses=True,
+    )
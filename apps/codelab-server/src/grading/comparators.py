@@ -0,0 +1,265 @@
+import abc
+import math
+import re
+import threading
+from collections import OrderedDict
+from collections.abc import Iterator
+from itertools import zip_longest
+from uuid import UUID
+
+from src.models import TestCase
+from src.schemas import OutputComparator
+
+# tolerance of the float_tolerance comparator when the test case sets none
+DEFAULT_FLOAT_TOLERANCE = 1e-6
+# number of compiled comparators kept by each process
+COMPARATOR_CACHE_SIZE = 4096
+
+_TOKEN_PATTERN = re.compile(r'\S+')
+# stands for an invalid pattern of a regex test case, it matches no line
+_NEVER_MATCHES = re.compile(r'(?!)')
+
+
+def iter_lines(text: str) -> Iterator[str]:
+    """Lines of `text` without their line endings, produced lazily."""
+    start = 0
+    length = len(text)
+    while start < length:
+        end = text.find('\n', start)
+        if end == -1:
+            end = length
+        line = text[start:end]
+        yield line[:-1] if line.endswith('\r') else line
+        start = end + 1
+
+
+def iter_tokens(text: str) -> Iterator[str]:
+    """Whitespace separated tokens of `text`, produced lazily."""
+    return (match.group() for match in _TOKEN_PATTERN.finditer(text))
+
+
+def _strip_trailing_blank_lines(lines: list) -> list:
+    while lines and not lines[-1]:
+        lines.pop()
+    return lines
+
+
+class CompiledComparator(abc.ABC):
+    """
+    Comparison of outputs with the expected output of a test case.
+
+    The expected output is prepared once when the comparator is compiled and
+    actual outputs are streamed line by line (or token by token), stopping at
+    the first mismatch.
+    """
+
+    def __init__(self, expected_output: str) -> None:
+        self.expected_output = expected_output
+
+    def matches(self, actual_output: str | None) -> bool:
+        if actual_output is None:
+            return False
+        return self._matches(actual_output)
+
+    @abc.abstractmethod
+    def _matches(self, actual_output: str) -> bool:
+        """Compare an actual output that is not `None`."""
+
+
+class ExactComparator(CompiledComparator):
+    def _matches(self, actual_output: str) -> bool:
+        return actual_output == self.expected_output
+
+
+class _LineComparator(CompiledComparator):
+    """Line by line comparison ignoring trailing blank lines."""
+
+    def __init__(self, expected_output: str) -> None:
+        super().__init__(expected_output)
+        self.expected_lines = _strip_trailing_blank_lines(
+            [self._prepare(line) for line in iter_lines(expected_output)]
+        )
+
+    def _prepare(self, line: str):
+        return self._normalize(line)
+
+    @staticmethod
+    def _normalize(line: str) -> str:
+        return ' '.join(line.split())
+
+    def _line_matches(self, expected, actual: str) -> bool:
+        return expected == actual
+
+    def _matches(self, actual_output: str) -> bool:
+        for expected, actual in zip_longest(self.expected_lines, iter_lines(actual_output)):
+            if actual is None:
+                return False
+
+            actual = self._normalize(actual)
+            if expected is None:
+                # only blank lines may follow the expected output
+                if actual:
+                    return False
+                continue
+
+            if not self._line_matches(expected, actual):
+                return False
+
+        return True
+
+
+class WhitespaceComparator(_LineComparator):
+    """Lines compared with runs of whitespace collapsed and surrounding whitespace ignored."""
+
+
+class RegexComparator(_LineComparator):
+    """
+    Each expected line is a pattern the whole actual line must match.
+
+    Invalid patterns are recorded in `pattern_errors` and match no line, so a
+    broken test case fails instead of failing the grading.
+    """
+
+    def __init__(self, expected_output: str) -> None:
+        self.pattern_errors: list[tuple[str, re.error]] = []
+        super().__init__(expected_output)
+
+    def _prepare(self, line: str) -> re.Pattern | None:
+        # blank lines are kept falsy so trailing ones are stripped
+        if not line.strip():
+            return None
+
+        pattern = line.rstrip()
+        try:
+            return re.compile(pattern)
+        except re.error as error:
+            self.pattern_errors.append((pattern, error))
+            return _NEVER_MATCHES
+
+    @staticmethod
+    def _normalize(line: str) -> str:
+        return line.rstrip()
+
+    def _line_matches(self, expected: re.Pattern | None, actual: str) -> bool:
+        if expected is None:
+            return not actual
+        return expected.fullmatch(actual) is not None
+
+
+class TokenComparator(CompiledComparator):
+    """Whitespace separated tokens compared in order, ignoring the layout of the output."""
+
+    def __init__(self, expected_output: str) -> None:
+        super().__init__(expected_output)
+        self.expected_tokens = [self._prepare(token) for token in iter_tokens(expected_output)]
+
+    def _prepare(self, token: str):
+        return token
+
+    def _token_matches(self, expected, actual: str) -> bool:
+        return expected == actual
+
+    def _matches(self, actual_output: str) -> bool:
+        for expected, actual in zip_longest(self.expected_tokens, iter_tokens(actual_output)):
+            if expected is None or actual is None:
+                return False
+            if not self._token_matches(expected, actual):
+                return False
+        return True
+
+
+class FloatToleranceComparator(TokenComparator):
+    """Tokens compared in order, numbers within an absolute or relative tolerance."""
+
+    def __init__(self, expected_output: str, tolerance: float | None = None) -> None:
+        self.tolerance = DEFAULT_FLOAT_TOLERANCE if tolerance is None else tolerance
+        super().__init__(expected_output)
+
+    @staticmethod
+    def _parse(token: str) -> float | None:
+        try:
+            return float(token)
+        except ValueError:
+            return None
+
+    def _prepare(self, token: str) -> tuple[str, float | None]:
+        return token, self._parse(token)
+
+    def _token_matches(self, expected: tuple[str, float | None], actual: str) -> bool:
+        expected_token, expected_number = expected
+        if expected_number is None:
+            return expected_token == actual
+
+        actual_number = self._parse(actual)
+        if actual_number is None:
+            return False
+
+        return math.isclose(
+            actual_number,
+            expected_number,
+            rel_tol=self.tolerance,
+            abs_tol=self.tolerance,
+        )
+
+
+def compile_comparator(
+    comparator: OutputComparator | str,
+    expected_output: str,
+    float_tolerance: float | None = None,
+) -> CompiledComparator:
+    comparator = OutputComparator(comparator)
+
+    if comparator == OutputComparator.exact:
+        return ExactComparator(expected_output)
+    if comparator == OutputComparator.tokens:
+        return TokenComparator(expected_output)
+    if comparator == OutputComparator.float_tolerance:
+        return FloatToleranceComparator(expected_output, tolerance=float_tolerance)
+    if comparator == OutputComparator.regex:
+        return RegexComparator(expected_output)
+
+    return WhitespaceComparator(expected_output)
+
+
+class ComparatorCache:
+    """
+    Compiled comparators of test cases, kept by each process.
+
+    Entries are keyed by the test case and its last update so an edited test
+    case is compiled again, the least recently used entries are evicted once
+    the cache holds `max_size` comparators.
+    """
+
+    def __init__(self, max_size: int = COMPARATOR_CACHE_SIZE) -> None:
+        self.max_size = max_size
+        self._comparators: OrderedDict[tuple, CompiledComparator] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(test_case: TestCase) -> tuple[UUID, object]:
+        return test_case.id, test_case.updated_at
+
+    def get(self, test_case: TestCase) -> CompiledComparator:
+        key = self._key(test_case)
+
+        with self._lock:
+            comparator = self._comparators.get(key)
+            if comparator is not None:
+                self._comparators.move_to_end(key)
+                return comparator
+
+        comparator = compile_comparator(
+            test_case.comparator,
+            test_case.expected_output,
+            float_tolerance=test_case.float_tolerance,
+        )
+
+        with self._lock:
+            self._comparators[key] = comparator
+            while len(self._comparators) > self.max_size:
+                self._comparators.popitem(last=False)
+
+        return comparator
+
+
+comparator_cache = ComparatorCache()
@@ -0,0 +1,265 @@
+import uuid
+from collections import defaultdict
+from datetime import datetime
+
+from sqlalchemy import delete, func, insert, update
+from sqlmodel import Session, col, select
+
+from src.grading.comparators import comparator_cache
+from src.log import logger
+from src.models import (
+    EvaluationFlagResult,
+    Exercise,
+    ExerciseEvaluationFlag,
+    ExerciseSubmission,
+    TestCase,
+    TestCaseResult,
+)
+from src.schemas import EvaluationFlag, TaskStatus
+
+# flags scored from the execution results, the others are scored by AI or an admin
+SYSTEM_EVALUATION_FLAGS = (EvaluationFlag.execution, EvaluationFlag.compilation)
+
+
+class SubmissionGrader:
+    """
+    Grade executed exercise submissions in batches.
+
+    The test cases and evaluation flags of every exercise in a batch are
+    loaded once, the result rows of the whole batch are written with a single
+    insert per table and the scores are summed by the database in a single
+    update, so grading a batch costs a fixed number of queries however many
+    submissions it holds. A submission failing to grade is marked with its
+    error and skipped by later batches while the rest of its batch is graded.
+    """
+
+    def __init__(self, db_session: Session, batch_size: int) -> None:
+        self.db_session = db_session
+        self.batch_size = batch_size
+
+    def _next_batch(self, session_id: uuid.UUID | None) -> list[tuple]:
+        query = select(
+            ExerciseSubmission.id,
+            ExerciseSubmission.exercise_id,
+            ExerciseSubmission.results,
+        ).where(
+            ExerciseSubmission.status == TaskStatus.executed,
+            col(ExerciseSubmission.graded).is_(False),
+            col(ExerciseSubmission.grading_error).is_(None),
+        )
+
+        if session_id is not None:
+            query = query.join(Exercise, ExerciseSubmission.exercise_id == Exercise.id).where(
+                Exercise.session_id == session_id
+            )
+
+        return list(
+            self.db_session.exec(
+                query.order_by(col(ExerciseSubmission.created_at)).limit(self.batch_size)
+            ).all()
+        )
+
+    def _test_cases(self, exercise_ids: set[uuid.UUID]) -> dict[uuid.UUID, list[TestCase]]:
+        test_cases = defaultdict(list)
+        for test_case in self.db_session.exec(
+            select(TestCase).where(col(TestCase.exercise_id).in_(exercise_ids))
+        ).all():
+            test_cases[test_case.exercise_id].append(test_case)
+        return test_cases
+
+    def _evaluation_flags(
+        self, exercise_ids: set[uuid.UUID]
+    ) -> dict[uuid.UUID, list[ExerciseEvaluationFlag]]:
+        evaluation_flags = defaultdict(list)
+        for evaluation_flag in self.db_session.exec(
+            select(ExerciseEvaluationFlag).where(
+                col(ExerciseEvaluationFlag.exercise_id).in_(exercise_ids),
+                col(ExerciseEvaluationFlag.flag).in_(SYSTEM_EVALUATION_FLAGS),
+            )
+        ).all():
+            evaluation_flags[evaluation_flag.exercise_id].append(evaluation_flag)
+        return evaluation_flags
+
+    @staticmethod
+    def _evaluation_flag_passed(flag: str, results: list[dict]) -> bool:
+        if not results:
+            return False
+
+        if flag == EvaluationFlag.compilation:
+            return not any(result.get('failed_compilation') for result in results)
+
+        return not any(result.get('failed_execution') for result in results)
+
+    def _submission_rows(
+        self,
+        submission_id: uuid.UUID,
+        results: list[dict],
+        test_cases: list[TestCase],
+        evaluation_flags: list[ExerciseEvaluationFlag],
+        now: datetime,
+    ) -> tuple[list[dict], list[dict]]:
+        results_by_test_case = {
+            result.get('test_case_id'): result for result in results
+        }
+
+        test_case_rows = []
+        for test_case in test_cases:
+            result = results_by_test_case.get(str(test_case.id))
+            if result is None:
+                # test cases added after the execution have no result and score nothing
+                continue
+
+            test_case_rows.append({
+                'id': uuid.uuid4(),
+                'created_at': now,
+                'submission_id': submission_id,
+                'test_case_id': test_case.id,
+                'passed': (
+                    result.get('state') == 'success'
+                    and comparator_cache.get(test_case).matches(result.get('std_out'))
+                ),
+                'execution_result': result,
+                'adjusted': False,
+            })
+
+        evaluation_flag_rows = []
+        for evaluation_flag in evaluation_flags:
+            passed = self._evaluation_flag_passed(evaluation_flag.flag, results)
+            evaluation_flag_rows.append({
+                'id': uuid.uuid4(),
+                'created_at': now,
+                'submission_id': submission_id,
+                'evaluation_flag_id': evaluation_flag.id,
+                'passed': passed,
+                'score': evaluation_flag.score_percentage if passed else None,
+                'adjusted': False,
+            })
+
+        return test_case_rows, evaluation_flag_rows
+
+    def _result_rows(
+        self,
+        batch: list[tuple],
+        test_cases: dict[uuid.UUID, list[TestCase]],
+        evaluation_flags: dict[uuid.UUID, list[ExerciseEvaluationFlag]],
+    ) -> tuple[list[dict], list[dict], dict[uuid.UUID, str]]:
+        """
+        Result rows of the submissions of a batch, a submission failing to grade
+        is left out with its error instead of failing the whole batch.
+        """
+        now = datetime.now()
+        test_case_rows = []
+        evaluation_flag_rows = []
+        grading_errors = {}
+
+        for submission_id, exercise_id, results in batch:
+            try:
+                submission_test_case_rows, submission_evaluation_flag_rows = self._submission_rows(
+                    submission_id=submission_id,
+                    results=results or [],
+                    test_cases=test_cases.get(exercise_id, []),
+                    evaluation_flags=evaluation_flags.get(exercise_id, []),
+                    now=now,
+                )
+            except Exception as error:
+                logger.exception(
+                    'src::grading::grader::SubmissionGrader::_result_rows:: '
+                    f'Failed to grade submission {submission_id}.'
+                )
+                grading_errors[submission_id] = f'{type(error).__name__}: {error}'
+                continue
+
+            test_case_rows.extend(submission_test_case_rows)
+            evaluation_flag_rows.extend(submission_evaluation_flag_rows)
+
+        return test_case_rows, evaluation_flag_rows, grading_errors
+
+    def _update_scores(self, submission_ids: list[uuid.UUID]) -> None:
+        """Sum the scores of the passed test cases and evaluation flags of each submission."""
+
+        test_case_score = (
+            select(func.coalesce(func.sum(TestCase.score_percentage), 0.0))
+            .join(TestCaseResult, TestCaseResult.test_case_id == TestCase.id)
+            .where(
+                TestCaseResult.submission_id == ExerciseSubmission.id,
+                col(TestCaseResult.passed).is_(True),
+            )
+            .scalar_subquery()
+        )
+        evaluation_flag_score = (
+            select(func.coalesce(func.sum(EvaluationFlagResult.score), 0.0))
+            .where(
+                EvaluationFlagResult.submission_id == ExerciseSubmission.id,
+                col(EvaluationFlagResult.passed).is_(True),
+            )
+            .scalar_subquery()
+        )
+
+        self.db_session.execute(
+            update(ExerciseSubmission)
+            .where(col(ExerciseSubmission.id).in_(submission_ids))
+            .values(
+                total_score=test_case_score + evaluation_flag_score,
+                graded=True,
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+    def grade_batch(self, session_id: uuid.UUID | None = None) -> int:
+        """Grade the next batch of executed submissions, returns the number of submissions processed."""
+
+        batch = self._next_batch(session_id)
+        if not batch:
+            return 0
+
+        exercise_ids = {exercise_id for _, exercise_id, _ in batch}
+
+        test_case_rows, evaluation_flag_rows, grading_errors = self._result_rows(
+            batch,
+            test_cases=self._test_cases(exercise_ids),
+            evaluation_flags=self._evaluation_flags(exercise_ids),
+        )
+        submission_ids = [
+            submission_id for submission_id, _, _ in batch if submission_id not in grading_errors
+        ]
+
+        # failed submissions are skipped by the next batches until their error is cleared
+        for submission_id, grading_error in grading_errors.items():
+            self.db_session.execute(
+                update(ExerciseSubmission)
+                .where(col(ExerciseSubmission.id) == submission_id)
+                .values(grading_error=grading_error)
+                .execution_options(synchronize_session=False)
+            )
+
+        # results left by an interrupted grading run are replaced
+        self.db_session.execute(
+            delete(TestCaseResult).where(col(TestCaseResult.submission_id).in_(submission_ids))
+        )
+        self.db_session.execute(
+            delete(EvaluationFlagResult).where(
+                col(EvaluationFlagResult.submission_id).in_(submission_ids)
+            )
+        )
+
+        if test_case_rows:
+            self.db_session.execute(insert(TestCaseResult), test_case_rows)
+        if evaluation_flag_rows:
+            self.db_session.execute(insert(EvaluationFlagResult), evaluation_flag_rows)
+
+        self._update_scores(submission_ids)
+        self.db_session.commit()
+
+        logger.info(
+            'src::grading::grader::SubmissionGrader::grade_batch:: '
+            f'Graded {len(submission_ids)} submissions with {len(test_case_rows)} test case results, '
+            f'{len(grading_errors)} submissions failed to grade.'
+        )
+        return len(batch)
+
+    def run(self, session_id: uuid.UUID | None = None) -> int:
+        """Grade batches until no executed submission is left, returns the number graded."""
+        graded = 0
+        while count := self.grade_batch(session_id):
+            graded += count
+        return graded
@@ -0,0 +1,26 @@
+from typing import Annotated
+from uuid import UUID
+
+from sqlmodel import Session
+from taskiq import TaskiqDepends
+
+from src.core.config import settings
+from src.grading.grader import SubmissionGrader
+from src.worker import broker, require_taskiq_db_session
+from src.worker.queues import TaskQueue
+
+
+@broker.task(
+    task_name='grade_exercise_submissions_task',
+    queue_name=TaskQueue.submissions,
+    schedule=[{"cron": "* * * * *"}],  # Run every minute
+    prevent_concurrency=True,
+)
+async def grade_exercise_submissions_task(
+    db_session: Annotated[Session, TaskiqDepends(require_taskiq_db_session)],
+    session_id: UUID | None = None,
+) -> None:
+    """Grade executed exercise submissions, optionally only those of a session."""
+
+    grader = SubmissionGrader(db_session=db_session, batch_size=settings.GRADING_BATCH_SIZE)
+    grader.run(session_id=session_id)
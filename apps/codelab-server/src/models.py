@@ -5,6 +5,7 @@ from src.core.config import settings
 from pydantic import (
     EmailStr, 
     JsonValue, 
+    NonNegativeFloat,
     PositiveFloat, 
     PositiveInt,
 )
@@ -25,6 +26,7 @@ from src.schemas import (
     DatabaseExecutionResult,
     EvaluationFlag,
     ImageStatus,
+    OutputComparator,
     SessionEnrollmentMethod,
     SessionInitializationStage,
     TaskStatus,
@@ -468,6 +470,15 @@ class TestCase(BaseModel, table=True):
 
     test_input: str | None = Field(default=None)
     expected_output: str
+    comparator: OutputComparator = Field(
+        default=OutputComparator.whitespace,
+        sa_column=Column(type_=Text(), nullable=False, server_default=OutputComparator.whitespace.value),
+        description="How the output of the test case is compared with the expected output.",
+    )
+    float_tolerance: float | None = Field(
+        default=None,
+        description="Absolute and relative tolerance of numbers compared with the float_tolerance comparator.",
+    )
     score_percentage: PositiveFloat = Field(
         description="The score percentage of the test case in the total score.",
     )
@@ -552,7 +563,12 @@ class ExerciseSubmission(BaseModel, table=True):
 
     # grading results
     graded: bool = Field(default=False, description="Whether the submission has been graded.")
-    total_score: PositiveFloat | None = Field(default=None, description="The total score of the submission.")
+    total_score: NonNegativeFloat | None = Field(default=None, description="The total score of the submission.")
+    grading_error: str | None = Field(
+        default=None,
+        sa_column=Column(Text, nullable=True),
+        description="Why the submission could not be graded, it is skipped by grading until cleared.",
+    )
     auto_generated_feedback: str | None = Field(
         max_length=5000, 
         nullable=True, 
@@ -570,6 +586,10 @@ class ExerciseSubmission(BaseModel, table=True):
         sa_column=Column(type_=Text()),
         description="The status of the submission.",
     )
+    execution_logs: list[JsonValue] = Field(default_factory=list, sa_column=Column(JSON))
+    results: list[DatabaseExecutionResult] | None = Field(
+        default=None, sa_column=Column(JSON)
+    )
 
     # test case results
     test_case_results: list['TestCaseResult'] = Relationship(
@@ -583,6 +603,9 @@ class ExerciseSubmission(BaseModel, table=True):
         sa_relationship_kwargs={"lazy": "select"},
     )
 
+    class Config:
+        arbitrary_types_allowed = True
+
 
 class TestCaseResult(BaseModel, table=True):
     """
@@ -638,7 +661,7 @@ class EvaluationFlagResult(BaseModel, table=True):
     evaluation_flag: ExerciseEvaluationFlag = Relationship(sa_relationship_kwargs={"lazy": "select"})
     
     passed: bool
-    score: PositiveFloat | None = Field(default=None)
+    score: NonNegativeFloat | None = Field(default=None)
     adjusted: bool = Field(
         default=False,
         description="Whether the score has been adjusted by the admin.",
@@ -0,0 +1,182 @@
+from enum import StrEnum
+from uuid import UUID
+
+from sqlmodel import Session, col, func, select
+
+from src.core.redis import get_shared_redis_client
+from src.models import Exercise, Task
+from src.models import Session as WorkflowSession
+from src.schemas import TaskStatus
+
+TASK_ADMISSION_PREFIX = "vpl:task-admission"
+# counters of idle sessions expire and are seeded from the database again
+TASK_ADMISSION_TTL_SECONDS = 24 * 60 * 60
+
+ACTIVE_TASK_STATUSES = (TaskStatus.queued, TaskStatus.executing)
+
+
+class AdmissionResult(StrEnum):
+    admitted = "admitted"
+    queue_full = "queue_full"
+    run_limit_reached = "run_limit_reached"
+    already_queued = "already_queued"
+    not_seeded = "not_seeded"
+
+
+# KEYS: seeded, active tasks, active task per student, runs per student
+# ARGV: student id, task id, max queue size, max number of runs, ttl
+_ADMIT_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 'not_seeded'
+end
+if redis.call('SCARD', KEYS[2]) >= tonumber(ARGV[3]) then
+    return 'queue_full'
+end
+if tonumber(redis.call('HGET', KEYS[4], ARGV[1]) or '0') >= tonumber(ARGV[4]) then
+    return 'run_limit_reached'
+end
+if redis.call('HEXISTS', KEYS[3], ARGV[1]) == 1 then
+    return 'already_queued'
+end
+redis.call('SADD', KEYS[2], ARGV[2])
+redis.call('HSET', KEYS[3], ARGV[1], ARGV[2])
+redis.call('HINCRBY', KEYS[4], ARGV[1], 1)
+for _, key in ipairs(KEYS) do
+    redis.call('EXPIRE', key, ARGV[5])
+end
+return 'admitted'
+"""
+
+# KEYS: active tasks, active task per student
+# ARGV: student id, task id
+_RELEASE_SCRIPT = """
+redis.call('SREM', KEYS[1], ARGV[2])
+if redis.call('HGET', KEYS[2], ARGV[1]) == ARGV[2] then
+    redis.call('HDEL', KEYS[2], ARGV[1])
+end
+return 1
+"""
+
+# KEYS: seeded, active tasks, active task per student, runs per student
+# ARGV: ttl, number of active tasks, (task id, student id) pairs, (student id, runs) pairs
+_SEED_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    return 0
+end
+redis.call('DEL', KEYS[2], KEYS[3], KEYS[4])
+
+local active = tonumber(ARGV[2])
+local index = 3
+for _ = 1, active do
+    redis.call('SADD', KEYS[2], ARGV[index])
+    if ARGV[index + 1] ~= '' then
+        redis.call('HSET', KEYS[3], ARGV[index + 1], ARGV[index])
+    end
+    index = index + 2
+end
+while index < #ARGV do
+    redis.call('HSET', KEYS[4], ARGV[index], ARGV[index + 1])
+    index = index + 2
+end
+
+redis.call('SET', KEYS[1], 1)
+for _, key in ipairs(KEYS) do
+    redis.call('EXPIRE', key, ARGV[1])
+end
+return 1
+"""
+
+
+class TaskAdmission:
+    """
+    Admission checks of task executions served from per session counters.
+
+    The active tasks of a session, the active task of each student and the
+    number of runs of each student are kept in Redis and checked and updated
+    by a single script, the counters are seeded from the database the first
+    time a session is seen and released by the execution pipeline once a task
+    reaches a final status.
+    """
+
+    def __init__(self) -> None:
+        self.redis_client = get_shared_redis_client()
+        self._admit_script = self.redis_client.register_script(_ADMIT_SCRIPT)
+        self._release_script = self.redis_client.register_script(_RELEASE_SCRIPT)
+        self._seed_script = self.redis_client.register_script(_SEED_SCRIPT)
+
+    @staticmethod
+    def _keys(session_id: UUID | str) -> list[str]:
+        return [
+            f"{TASK_ADMISSION_PREFIX}:{session_id}:{name}"
+            for name in ("seeded", "active", "student-active", "runs")
+        ]
+
+    def _seed(self, db_session: Session, session_id: UUID) -> None:
+        """Load the counters of a session from the database."""
+
+        active_tasks = db_session.exec(
+            select(Task.id, Task.student_id)
+            .join(Exercise, Task.exercise_id == Exercise.id)
+            .where(
+                col(Exercise.session_id) == session_id,
+                col(Task.status).in_(ACTIVE_TASK_STATUSES),
+            )
+        ).all()
+
+        # every task counts as a run whatever its status
+        runs = db_session.exec(
+            select(Task.student_id, func.count(col(Task.id)))
+            .join(Exercise, Task.exercise_id == Exercise.id)
+            .where(
+                col(Exercise.session_id) == session_id,
+                col(Task.student_id).is_not(None),
+            )
+            .group_by(col(Task.student_id))
+        ).all()
+
+        args: list = [TASK_ADMISSION_TTL_SECONDS, len(active_tasks)]
+        for task_id, student_id in active_tasks:
+            args.extend([str(task_id), str(student_id) if student_id else ''])
+        for student_id, count in runs:
+            args.extend([str(student_id), count])
+
+        self._seed_script(keys=self._keys(session_id), args=args)
+
+    def admit(
+        self,
+        db_session: Session,
+        session: WorkflowSession,
+        student_id: UUID,
+        task_id: UUID,
+    ) -> AdmissionResult:
+        """Check the session limits and reserve a place for the task in one step."""
+
+        args = [
+            str(student_id),
+            str(task_id),
+            session.configuration.max_queue_size,
+            session.configuration.max_number_of_runs,
+            TASK_ADMISSION_TTL_SECONDS,
+        ]
+
+        result = AdmissionResult(self._admit_script(keys=self._keys(session.id), args=args))
+        if result == AdmissionResult.not_seeded:
+            self._seed(db_session, session.id)
+            result = AdmissionResult(self._admit_script(keys=self._keys(session.id), args=args))
+
+        return result
+
+    def release(self, session_id: UUID, student_id: UUID | None, task_id: UUID) -> None:
+        """Free the place of a task that is no longer queued or executing."""
+        self._release_script(
+            keys=self._keys(session_id)[1:3],
+            args=[str(student_id), str(task_id)],
+        )
+
+    def cancel(self, session_id: UUID, student_id: UUID, task_id: UUID) -> None:
+        """Undo the admission of a task that could not be created."""
+        self.release(session_id, student_id, task_id)
+        self.redis_client.hincrby(self._keys(session_id)[3], str(student_id), -1)
+
+
+task_admission = TaskAdmission()
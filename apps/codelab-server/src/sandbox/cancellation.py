@@ -0,0 +1,119 @@
+import threading
+from collections.abc import Callable, Generator
+from contextlib import contextmanager
+from uuid import UUID
+
+from redis.exceptions import RedisError
+
+from src.core.redis import get_shared_redis_client
+from src.log import logger
+
+EXECUTION_CANCEL_PREFIX = "vpl:execution-cancel"
+# the flag covers cancellations requested before the executor subscribed
+EXECUTION_CANCEL_TTL_SECONDS = 60 * 60
+
+
+class ExecutionCancelled(Exception):
+    pass
+
+
+def execution_cancel_channel(request_id: UUID | str) -> str:
+    return f"{EXECUTION_CANCEL_PREFIX}:{request_id}"
+
+
+def request_execution_cancellation(request_id: UUID | str) -> None:
+    """Ask the worker executing a task or submission to stop it."""
+    redis_client = get_shared_redis_client()
+    channel = execution_cancel_channel(request_id)
+
+    with redis_client.pipeline() as pipeline:
+        pipeline.set(channel, 1, ex=EXECUTION_CANCEL_TTL_SECONDS)
+        pipeline.publish(channel, 'cancel')
+        pipeline.execute()
+
+
+class ExecutionCancellation:
+    """
+    Listen for the cancellation of a task or submission while it executes.
+
+    Callbacks registered with `on_cancel` run from the listener thread once a
+    cancellation is requested, the executor uses them to kill the running
+    program so its exec returns right away.
+    """
+
+    def __init__(self, request_id: UUID | str) -> None:
+        self.channel = execution_cancel_channel(request_id)
+        self.redis_client = get_shared_redis_client()
+        self._cancelled = threading.Event()
+        self._callbacks: list[Callable[[], None]] = []
+        self._lock = threading.Lock()
+        self._pubsub = None
+        self._listener = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def start(self) -> None:
+        """Subscribe to the cancellation channel, cancellation is best effort."""
+        try:
+            self._pubsub = self.redis_client.pubsub(ignore_subscribe_messages=True)
+            self._pubsub.subscribe(**{self.channel: lambda _: self._cancel()})
+            self._listener = self._pubsub.run_in_thread(sleep_time=0.5, daemon=True)
+
+            if self.redis_client.exists(self.channel):
+                self._cancel()
+        except RedisError as error:
+            logger.warning(
+                'src::sandbox::cancellation::ExecutionCancellation::start:: '
+                f'Failed to listen for cancellation on {self.channel}: {error}'
+            )
+
+    def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+        if self._pubsub is not None:
+            self._pubsub.close()
+            self._pubsub = None
+
+    def __enter__(self) -> "ExecutionCancellation":
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> bool:
+        self.stop()
+        return False
+
+    def _cancel(self) -> None:
+        with self._lock:
+            if self._cancelled.is_set():
+                return
+            self._cancelled.set()
+            callbacks = list(self._callbacks)
+
+        for callback in callbacks:
+            callback()
+
+    @contextmanager
+    def on_cancel(self, callback: Callable[[], None]) -> Generator[None, None, None]:
+        """
+        Run `callback` if the execution is cancelled while the block runs,
+        `ExecutionCancelled` is raised before and after the block once cancelled.
+        """
+        self.raise_if_cancelled()
+
+        with self._lock:
+            self._callbacks.append(callback)
+
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._callbacks.remove(callback)
+
+        self.raise_if_cancelled()
+
+    def raise_if_cancelled(self) -> None:
+        if self.cancelled:
+            raise ExecutionCancelled()
@@ -0,0 +1,122 @@
+from collections.abc import AsyncGenerator
+from datetime import datetime
+from typing import Literal
+from uuid import UUID
+
+from redis.exceptions import RedisError
+
+from src.core.redis import get_async_redis_client, get_shared_redis_client
+from src.log import logger
+from src.sandbox.schemas import ExecutionEventSchema
+from src.schemas import TaskStatus
+
+EXECUTION_EVENTS_CHANNEL_PREFIX = "vpl:execution-events"
+FINAL_TASK_STATUSES = {TaskStatus.executed, TaskStatus.dropped, TaskStatus.cancelled}
+
+# comment lines keep idle connections open through proxies
+KEEP_ALIVE_INTERVAL_SECONDS = 15
+
+
+def execution_events_channel(request_id: UUID | str) -> str:
+    return f"{EXECUTION_EVENTS_CHANNEL_PREFIX}:{request_id}"
+
+
+class ExecutionEventPublisher:
+    """Publish the events of a task or submission execution over Redis pub/sub."""
+
+    def __init__(self, request_id: UUID | str) -> None:
+        self.channel = execution_events_channel(request_id)
+        self.redis_client = get_shared_redis_client()
+
+    def publish(self, event: ExecutionEventSchema) -> None:
+        """Publish an event, streaming is best effort and never fails an execution."""
+        try:
+            self.redis_client.publish(self.channel, event.model_dump_json())
+        except RedisError as error:
+            logger.warning(
+                'src::sandbox::events::ExecutionEventPublisher::publish:: '
+                f'Failed to publish execution event on {self.channel}: {error}'
+            )
+
+    def log(self, message: str, timestamp: datetime | None = None) -> None:
+        self.publish(
+            ExecutionEventSchema(
+                type='log',
+                timestamp=timestamp or datetime.now(),
+                message=message,
+            )
+        )
+
+    def output(
+        self,
+        stream: Literal['stdout', 'stderr'],
+        data: str,
+        case: int | None = None,
+    ) -> None:
+        self.publish(
+            ExecutionEventSchema(
+                type='output',
+                timestamp=datetime.now(),
+                stream=stream,
+                data=data,
+                case=case,
+            )
+        )
+
+    def status(self, status: TaskStatus) -> None:
+        self.publish(
+            ExecutionEventSchema(
+                type='status',
+                timestamp=datetime.now(),
+                status=status,
+            )
+        )
+
+
+def _server_sent_event(event: ExecutionEventSchema) -> str:
+    return f"event: {event.type}\ndata: {event.model_dump_json()}\n\n"
+
+
+async def stream_execution_events(
+    request_id: UUID,
+    status: TaskStatus,
+    execution_logs: list[dict],
+) -> AsyncGenerator[str, None]:
+    """
+    Stream the events of an execution as server-sent events.
+
+    The channel is subscribed before the logs recorded so far are replayed so no
+    event published in between is lost, the stream ends with the final status.
+    """
+    redis_client = get_async_redis_client()
+    pubsub = redis_client.pubsub()
+
+    try:
+        await pubsub.subscribe(execution_events_channel(request_id))
+
+        for execution_log in execution_logs:
+            yield _server_sent_event(ExecutionEventSchema(type='log', **execution_log))
+
+        if status in FINAL_TASK_STATUSES:
+            yield _server_sent_event(
+                ExecutionEventSchema(type='status', timestamp=datetime.now(), status=status)
+            )
+            return
+
+        while True:
+            message = await pubsub.get_message(
+                ignore_subscribe_messages=True,
+                timeout=KEEP_ALIVE_INTERVAL_SECONDS,
+            )
+            if message is None:
+                yield ": keep-alive\n\n"
+                continue
+
+            event = ExecutionEventSchema.model_validate_json(message['data'])
+            yield _server_sent_event(event)
+
+            if event.type == 'status' and event.status in FINAL_TASK_STATUSES:
+                return
+    finally:
+        await pubsub.aclose()
+        await redis_client.aclose()
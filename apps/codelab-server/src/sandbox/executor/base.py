@@ -1,16 +1,35 @@
 import abc
-import shutil
+import math
+import shlex
 import time
-import os
+import uuid
+from collections.abc import Callable
+from contextlib import AbstractContextManager, nullcontext
+from functools import partial
 
 from docker.errors import APIError
 from docker.models.containers import Container
 
+from src.core.config import settings
 from src.external.schemas import CodeRepository
 from src.log import logger
+from src.models import LanguageImage
+from src.sandbox.cancellation import ExecutionCancellation, ExecutionCancelled
+from src.sandbox.executor.deadline import Deadline
+from src.sandbox.executor.harness import (
+    HARNESS_CASE_PID_FILES,
+    HarnessOutputTail,
+    read_harness_results,
+    write_harness,
+)
+from src.sandbox.executor.output import StreamCapture
+from src.sandbox.executor.workspace import sync_code_repository
+from src.sandbox.ochestator.container import start_container
+from src.sandbox.ochestator.pool import ContainerLease, container_pool
+from src.sandbox.ochestator.reaper import record_container_activity
 from src.sandbox.ochestator.schemas import ContainerConfig, ExecutionResult
 from src.schemas import DatabaseExecutionResult
-from src.utils import TimeOutException, raise_timeout
+from src.utils import TimeOutException
 
 
 class BaseExecutor(abc.ABC):  # noqa
@@ -23,6 +42,8 @@ class BaseExecutor(abc.ABC):  # noqa
         container_config: ContainerConfig,
         retry_limit: int = 2,
         code_repository: CodeRepository | None = None,
+        output_callback: Callable[[str, str, int | None], None] | None = None,
+        cancellation: ExecutionCancellation | None = None,
     ):
         """Construct executor to execute a task."""
         self.workdir = workdir
@@ -30,6 +51,15 @@ class BaseExecutor(abc.ABC):  # noqa
         self.container_config = container_config
         self.retry_limit = retry_limit
         self.code_repository = code_repository
+        # receives (stream name, text, test case index) while a program produces
+        # output, the index is only set for batched test cases
+        self.output_callback = output_callback
+        # kills the running program once the execution is cancelled
+        self.cancellation = cancellation
+        self.lease: ContainerLease | None = None
+        # prewarmed session containers are kept running between executions,
+        # idle ones are removed by the container reaper
+        self.keep_running = False
         self.container = self._get_container()
 
     @abc.abstractmethod
@@ -41,44 +71,154 @@ class BaseExecutor(abc.ABC):  # noqa
         if self.code_repository is None:
             raise ValueError("CodeRepository is required for execution.")
 
-    def __write_repository(self, repo: CodeRepository, base_path: str) -> None:
-        """Recursively write repository contents to disk."""
-        # Create the full path including the repo path
-        path  = os.path.join(base_path, repo.path)
+    def _mount_code_repository(self) -> None:
+        """Add content of the code repository to the container."""
+        self._assert_code_repository()
 
-        os.makedirs(os.path.dirname(path), exist_ok=True, mode=0o777)
+        # only write files that changed since the last execution
+        sync_code_repository(self.code_repository, self.mount_dir)
 
-        if repo.content  is not None:
-            # Write file content
-            with open(path, "w") as f:
-                f.write(repo.content)
+    def _lease_container(self, language_image: LanguageImage) -> Container:
+        """Lease a warm container from the pool and mount the code repository in it."""
+        self.lease = container_pool.lease(
+            language_image=language_image,
+            container_config=self.container_config,
+        )
+        self.mount_dir = self.lease.mount_dir
+        self.workdir = self.lease.workdir
 
-        # Recursively process sub-repositories
-        for sub_repo in repo.sub:
-            self.__write_repository(sub_repo, path)
+        try:
+            self._mount_code_repository()
+        except Exception:
+            self.release()
+            raise
 
-    def _mount_code_repository(self) -> None:
-        """Add content of the code repository to the container."""
-        self._assert_code_repository()
+        return self.lease.container
+
+    def release(self) -> None:
+        """Return a leased container to the pool."""
+        if self.lease is not None:
+            container_pool.release(self.lease)
+            self.lease = None
 
-        # delete the mount directory if it already exists
-        if os.path.exists(self.mount_dir):
-            shutil.rmtree(self.mount_dir)
+    def _start_container(self) -> None:
+        """Start the container and wait for it to run, leased containers are already running."""
+        if self.lease is not None:
+            return
 
-        # Write all repository contents to the mount directory
-        self.__write_repository(self.code_repository, self.mount_dir)
+        record_container_activity(self.container.name)
+        if self.keep_running and self.container.status == "running":
+            return
+
+        start_latency = start_container(self.container)
+        logger.debug(
+            'src::sandbox::executor::base::BaseExecutor::_start_container:: '
+            f"Container {self.container.name} started in {start_latency:.3f}s"
+        )
+
+    def _stop_container(self) -> None:
+        """Stop the container unless it is leased from the pool or kept running."""
+        if self.lease is not None:
+            return
+
+        if self.keep_running:
+            # the idle time of the container starts once the execution is done
+            record_container_activity(self.container.name)
+            return
+
+        self.container.stop(timeout=5)
+
+    @staticmethod
+    def _wrap_command(command: str, std_in: str | None = None) -> tuple[str, str]:
+        """
+        Run the command in its own process group and record its id, so the
+        program can be killed on its deadline without touching other executions.
+        """
+        pid_file = f"/tmp/vpl-execution-{uuid.uuid4().hex}.pid"
+        # mirror `<<<` here-string semantics of a single standard input
+        redirect = f"<<< {shlex.quote(std_in)}" if std_in else "< /dev/null"
+
+        wrapped_command = (
+            f"setsid bash -c {shlex.quote(command)} {redirect} & "
+            f"echo $! > {pid_file}; wait $!; exit_code=$?; "
+            f"rm -f {pid_file}; exit $exit_code"
+        )
+        return wrapped_command, pid_file
+
+    def _kill_process_group(self, pid_file: str, *case_pid_files: str) -> None:
+        """Kill the process groups recorded in the given pid files."""
+        try:
+            self.container.exec_run(
+                [
+                    "bash",
+                    "-c",
+                    f'for pid in $(cat {pid_file} {" ".join(case_pid_files)} 2>/dev/null); '
+                    f'do kill -KILL -- -"$pid" 2>/dev/null; done; rm -f {pid_file}; exit 0',
+                ],
+                workdir=self.workdir,
+            )
+        except APIError as error:
+            logger.warning(
+                'src::sandbox::executor::base::BaseExecutor::_kill_process_group:: '
+                f'Failed to kill execution in container {self.container.id}: {error}'
+            )
+
+    def _publish_output(self, stream: str, data: str, case: int | None = None) -> None:
+        if self.output_callback is not None:
+            self.output_callback(stream, data, case)
+
+    def _tail_batch_output(self, case_count: int) -> AbstractContextManager:
+        """Forward the output of batched test cases while they run."""
+        if self.output_callback is None:
+            return nullcontext()
+        return HarnessOutputTail(
+            mount_dir=self.mount_dir,
+            case_count=case_count,
+            on_output=self._publish_output,
+        )
+
+    def _cancellable(self, kill: Callable[[], None]) -> AbstractContextManager[None]:
+        """Kill the running program when the execution is cancelled."""
+        if self.cancellation is None:
+            return nullcontext()
+        return self.cancellation.on_cancel(kill)
 
     def execute_commnd(self, command: str, workdir: str) -> ExecutionResult:
-        """Execute a command and return the exit status and output."""
+        """
+        Execute a command and return the exit status and output.
+
+        The output is read from the exec socket as it is produced and each
+        stream is capped at `EXECUTION_OUTPUT_LIMIT_BYTES`, so a program
+        printing endlessly cannot exhaust the worker memory.
+        """
+
+        docker_api = self.container.client.api
+        std_out = StreamCapture(
+            limit=settings.EXECUTION_OUTPUT_LIMIT_BYTES,
+            on_data=partial(self._publish_output, 'stdout') if self.output_callback else None,
+        )
+        std_err = StreamCapture(
+            limit=settings.EXECUTION_OUTPUT_LIMIT_BYTES,
+            on_data=partial(self._publish_output, 'stderr') if self.output_callback else None,
+        )
 
         try:
-            full_cmd = f"bash -c '{command}'"
-            executon_result = self.container.exec_run(
-                cmd=full_cmd,
+            exec_id = docker_api.exec_create(
+                self.container.id,
+                cmd=["bash", "-c", command],
                 workdir=workdir,
-                demux=True,
                 tty=False,
-            )
+            )["Id"]
+
+            for out_chunk, err_chunk in docker_api.exec_start(
+                exec_id, stream=True, demux=True
+            ):
+                if out_chunk:
+                    std_out.write(out_chunk)
+                if err_chunk:
+                    std_err.write(err_chunk)
+
+            exit_code = docker_api.exec_inspect(exec_id)["ExitCode"]
             server_error = False
         except APIError as error:
             logger.error(
@@ -90,30 +230,27 @@ class BaseExecutor(abc.ABC):  # noqa
                     "workdir": workdir,
                 },
             )
-            executon_result = -1, ("", "")
+            exit_code = -1
             server_error = True
 
-        exit_code = executon_result[0]
-        std_out = (
-            executon_result[1][0].decode("utf-8")
-            if executon_result[1][0] is not None
-            else None
-        )
-        std_err = (
-            executon_result[1][1].decode("utf-8")
-            if executon_result[1][1] is not None
-            else None
-        )
+        # the exec may not report an exit code when its stream was cut
+        exit_code = exit_code if exit_code is not None else -1
         succes = True if exit_code == 0 else False
 
         return ExecutionResult(
             success=succes,
-            std_out=std_out,
-            std_err=std_err,
+            std_out=std_out.getvalue(),
+            std_err=std_err.getvalue(),
             exit_code=exit_code,
             server_error=server_error,
         )
 
+    def _deadline_seconds(self, is_compilation: bool = False) -> float:
+        """Compilation is bound by the CPU time limit, programs by the wall time limit."""
+        if is_compilation:
+            return self.container_config.cpu_time_limit_minutes * 60
+        return self.container_config.wall_time_limit_seconds
+
     def run(
         self,
         command: str,
@@ -129,27 +266,21 @@ class BaseExecutor(abc.ABC):  # noqa
 
         try:
             # first start the container
-            self.container.start()
+            self._start_container()
 
-            while self.container.status != "running":
-                logger.info(
-                    'src::sandbox::executor::base::BaseExecutor::run:: '
-                    f"Waiting for container to start: status is {self.container.status}"
-                )
-                time.sleep(0.5)
-                self.container.reload()
-            
             # Reset start time before command execution
             start_time = time.time()
 
-            # Execute the command in the container
-            with raise_timeout(
-                timeout=int(self.container_config.cpu_time_limit_minutes * 60)
+            # Execute the command in the container, the program is killed on its
+            # deadline or as soon as the execution is cancelled
+            wrapped_command, pid_file = self._wrap_command(command, std_in)
+            kill = partial(self._kill_process_group, pid_file)
+            with self._cancellable(kill), Deadline(
+                seconds=self._deadline_seconds(is_compilation),
+                on_expire=kill,
             ):
-                # Wait for the container to exit
-                command = command if not std_in else f"{command} <<< {std_in}"
                 execution_result = self.execute_commnd(
-                    command=command, workdir=self.workdir
+                    command=wrapped_command, workdir=self.workdir
                 )
 
             if execution_result.server_error and retry < self.retry_limit:
@@ -159,12 +290,18 @@ class BaseExecutor(abc.ABC):  # noqa
                     f"Server Error occured during execution: `{command}`:\nERROR\n:`{execution_result.std_err}`"
                 )
 
-                self.container.stop(timeout=5)
-                return self.run(command=command, std_in=std_in, retry=retry + 1)
+                self._stop_container()
+                return self.run(
+                    command=command,
+                    is_compilation=is_compilation,
+                    std_in=std_in,
+                    retry=retry + 1,
+                    remove_container=remove_container,
+                )
 
             end_time = time.time()
             expended_time = end_time - start_time
-            self.container.stop(timeout=5)
+            self._stop_container()
 
             if remove_container:
                 self.container.remove(force=True, v=True)
@@ -187,7 +324,7 @@ class BaseExecutor(abc.ABC):  # noqa
             logger.debug(
                 'src::sandbox::executor::base::BaseExecutor::run:: '
                 f"Execution timed out for task:\n"
-                f"Execution took: {expended_time} with TTL: {self.container_config.cpu_time_limit_minutes}"
+                f"Execution took: {expended_time} with TTL: {self._deadline_seconds(is_compilation)}"
             )
 
             if remove_container:
@@ -204,6 +341,14 @@ class BaseExecutor(abc.ABC):  # noqa
                 failed_compilation=True if is_compilation else None,
             )
 
+        except ExecutionCancelled:
+            logger.debug(
+                'src::sandbox::executor::base::BaseExecutor::run:: '
+                f"Execution cancelled after: {time.time() - start_time}"
+            )
+            self._stop_container()
+            raise
+
         except (Exception, APIError) as error:
             logger.error(
                 'src::sandbox::executor::base::BaseExecutor::run:: '
@@ -217,3 +362,85 @@ class BaseExecutor(abc.ABC):  # noqa
                 },
             )
             raise error 
+
+    def run_batch(
+        self,
+        command: str,
+        std_ins: list[str | None],
+        parallelism: int = 1,
+        retry: int = 0,
+    ) -> list[DatabaseExecutionResult]:
+        """Run a command against every standard input in a single container exec."""
+
+        case_timeout = self._deadline_seconds()
+        harness_command = write_harness(
+            mount_dir=self.mount_dir,
+            command=command,
+            std_ins=std_ins,
+            timeout=case_timeout,
+            parallelism=parallelism,
+        )
+        rounds = math.ceil(len(std_ins) / max(parallelism, 1))
+
+        start_time = time.time()
+
+        try:
+            self._start_container()
+            start_time = time.time()
+
+            # bound the whole harness so a stuck exec cannot hang the worker
+            wrapped_command, pid_file = self._wrap_command(harness_command)
+            kill = partial(self._kill_process_group, pid_file, HARNESS_CASE_PID_FILES)
+            with self._cancellable(kill), Deadline(
+                seconds=case_timeout * rounds + 5,
+                on_expire=kill,
+            ), self._tail_batch_output(len(std_ins)):
+                execution_result = self.execute_commnd(
+                    command=wrapped_command, workdir=self.workdir
+                )
+
+            if execution_result.server_error and retry < self.retry_limit:
+                logger.debug(
+                    'src::sandbox::executor::base::BaseExecutor::run_batch:: '
+                    f"Server Error occured during batch execution: `{command}`:\nERROR\n:`{execution_result.std_err}`"
+                )
+                self._stop_container()
+                return self.run_batch(
+                    command=command,
+                    std_ins=std_ins,
+                    parallelism=parallelism,
+                    retry=retry + 1,
+                )
+
+            self._stop_container()
+        except TimeOutException:
+            logger.debug(
+                'src::sandbox::executor::base::BaseExecutor::run_batch:: '
+                f"Batch execution timed out after: {time.time() - start_time}"
+            )
+            self._stop_container()
+        except ExecutionCancelled:
+            logger.debug(
+                'src::sandbox::executor::base::BaseExecutor::run_batch:: '
+                f"Batch execution cancelled after: {time.time() - start_time}"
+            )
+            self._stop_container()
+            raise
+        except (Exception, APIError) as error:
+            logger.error(
+                'src::sandbox::executor::base::BaseExecutor::run_batch:: '
+                f'An error occured in docker server error: {error}',
+                extra={
+                    'error': str(error),
+                    'command': command,
+                    'start_time': start_time,
+                    'end_time': time.time()
+                },
+            )
+            raise error
+
+        return read_harness_results(
+            mount_dir=self.mount_dir,
+            std_ins=std_ins,
+            fallback_time=max(time.time() - start_time, 1e-6),
+        )
@@ -0,0 +1,181 @@
+import hashlib
+import os
+import shutil
+import time
+import uuid
+
+from redis.exceptions import RedisError
+
+from src.core.config import settings
+from src.core.redis import get_shared_redis_client
+from src.external.schemas import CodeRepository
+from src.log import logger
+from src.models import LanguageImage
+from src.sandbox.executor.harness import HARNESS_DIR
+
+COMPILE_CACHE_DIR = "compile-cache"
+# bytes stored in the compile cache since it was last measured by an eviction
+COMPILE_CACHE_SIZE_KEY = "vpl:compile-cache:size"
+# evictions leave room for the next entries before the cache is walked again
+COMPILE_CACHE_EVICTION_TARGET = 0.9
+
+Snapshot = dict[str, tuple[int, int]]
+
+
+class CompileCache:
+    """
+    Content addressed cache of compilation outputs.
+
+    Entries are keyed by the code repository tree, the compile command and the
+    language image build, and hold the files the compiler wrote into the
+    workspace. The modification time of an entry is bumped on every hit so the
+    least recently used entries are evicted once the cache grows past its size.
+    The size of the cache is counted in Redis as entries are stored, so the
+    cache directory is only walked once the counter crosses the size.
+    """
+
+    def __init__(self, max_size_mb: int | None = None) -> None:
+        self.max_size_bytes = (
+            max_size_mb if max_size_mb is not None else settings.COMPILE_CACHE_MAX_SIZE_MB
+        ) * 1024 * 1024
+        self.cache_dir = os.path.join(settings.FILESYSTEM_DIR, COMPILE_CACHE_DIR)
+        self.redis_client = get_shared_redis_client()
+
+    @staticmethod
+    def key(
+        code_repository: CodeRepository,
+        compile_command: str,
+        language_image: LanguageImage,
+    ) -> str:
+        """Hash everything that determines the compilation output."""
+        digest = hashlib.sha256()
+        digest.update(code_repository.model_dump_json().encode())
+        digest.update(b"\0")
+        digest.update(compile_command.encode())
+        digest.update(b"\0")
+        digest.update(str(language_image.docker_image_id).encode())
+        return digest.hexdigest()
+
+    @staticmethod
+    def snapshot(mount_dir: str) -> Snapshot:
+        """Record size and modification time of every file in the workspace."""
+        files = {}
+        for root, dirs, filenames in os.walk(mount_dir):
+            if root == mount_dir and HARNESS_DIR in dirs:
+                dirs.remove(HARNESS_DIR)
+
+            for filename in filenames:
+                path = os.path.join(root, filename)
+                stat = os.stat(path, follow_symlinks=False)
+                files[os.path.relpath(path, mount_dir)] = (stat.st_size, stat.st_mtime_ns)
+
+        return files
+
+    def _entry_dir(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key)
+
+    def restore(self, key: str, mount_dir: str) -> bool:
+        """Copy cached compilation outputs into the workspace, `False` on a miss."""
+        entry_dir = self._entry_dir(key)
+        if not os.path.isdir(entry_dir):
+            return False
+
+        try:
+            shutil.copytree(entry_dir, mount_dir, dirs_exist_ok=True)
+            os.utime(entry_dir)
+        except OSError as error:
+            logger.warning(
+                'src::sandbox::executor::cache::CompileCache::restore:: '
+                f'Failed to restore compile cache entry {key}: {error}'
+            )
+            return False
+
+        return True
+
+    def store(self, key: str, mount_dir: str, before: Snapshot) -> None:
+        """Store the files created or changed by the compiler since `before`."""
+        after = self.snapshot(mount_dir)
+        outputs = [path for path, stat in after.items() if before.get(path) != stat]
+        if not outputs:
+            return
+
+        # build the entry aside and move it in place so readers never see a partial entry
+        staging_dir = os.path.join(self.cache_dir, f".staging-{uuid.uuid4().hex}")
+        try:
+            for path in outputs:
+                destination = os.path.join(staging_dir, path)
+                os.makedirs(os.path.dirname(destination), exist_ok=True)
+                shutil.copy2(os.path.join(mount_dir, path), destination)
+
+            os.rename(staging_dir, self._entry_dir(key))
+        except OSError as error:
+            # another worker may have stored the same entry in the meantime
+            logger.debug(
+                'src::sandbox::executor::cache::CompileCache::store:: '
+                f'Failed to store compile cache entry {key}: {error}'
+            )
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            return
+
+        self._count_stored(sum(after[path][0] for path in outputs))
+
+    def _count_stored(self, size: int) -> None:
+        """Add a stored entry to the size counter and evict once it crosses the cache size."""
+        try:
+            total_size = self.redis_client.incrby(COMPILE_CACHE_SIZE_KEY, size)
+        except RedisError as error:
+            logger.warning(
+                'src::sandbox::executor::cache::CompileCache::_count_stored:: '
+                f'Compile cache size counter unavailable, measuring the cache: {error}'
+            )
+            self.evict()
+            return
+
+        # a new counter does not know the entries already on disk
+        if total_size > self.max_size_bytes or total_size == size:
+            self.evict()
+
+    @staticmethod
+    def _entry_size(entry_dir: str) -> int:
+        size = 0
+        for root, _, filenames in os.walk(entry_dir):
+            for filename in filenames:
+                size += os.path.getsize(os.path.join(root, filename))
+        return size
+
+    def evict(self) -> None:
+        """Remove the least recently used entries until the cache is back under its size and reset the size counter."""
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.startswith(".") or not entry.is_dir():
+                continue
+            entries.append((entry.stat().st_mtime, self._entry_size(entry.path), entry.path))
+
+        total_size = sum(size for _, size, _ in entries)
+        target_size = (
+            self.max_size_bytes * COMPILE_CACHE_EVICTION_TARGET
+            if total_size > self.max_size_bytes
+            else self.max_size_bytes
+        )
+        for _, size, path in sorted(entries):
+            if total_size <= target_size:
+                break
+
+            shutil.rmtree(path, ignore_errors=True)
+            total_size -= size
+
+        try:
+            self.redis_client.set(COMPILE_CACHE_SIZE_KEY, total_size)
+        except RedisError:
+            pass
+
+        # clean staging directories left behind by crashed workers
+        for entry in os.scandir(self.cache_dir):
+            if (
+                entry.name.startswith(".staging-")
+                and entry.stat().st_mtime < time.time() - 3600
+            ):
+                shutil.rmtree(entry.path, ignore_errors=True)
+
+
+compile_cache = CompileCache()
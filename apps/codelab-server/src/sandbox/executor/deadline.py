@@ -0,0 +1,49 @@
+import threading
+import time
+from collections.abc import Callable
+
+from src.utils import TimeOutException
+
+
+class Deadline:
+    """
+    Wall clock deadline of a single execution.
+
+    A timer thread calls `on_expire` once the deadline passes, which is expected
+    to kill the running program so the blocked exec returns. `TimeOutException`
+    is then raised when the block exits. Unlike SIGALRM this works from any
+    thread, supports sub-second limits and deadlines of concurrent executions
+    do not interfere with each other.
+    """
+
+    def __init__(self, seconds: float, on_expire: Callable[[], None]) -> None:
+        self.seconds = seconds
+        self.on_expire = on_expire
+        self.expired = False
+        self._started_at: float | None = None
+        self._timer: threading.Timer | None = None
+
+    def _expire(self) -> None:
+        self.expired = True
+        self.on_expire()
+
+    def remaining(self) -> float:
+        """Seconds left before the deadline passes."""
+        if self._started_at is None:
+            return self.seconds
+        return max(self.seconds - (time.monotonic() - self._started_at), 0.0)
+
+    def __enter__(self) -> "Deadline":
+        self._started_at = time.monotonic()
+        self._timer = threading.Timer(self.seconds, self._expire)
+        self._timer.daemon = True
+        self._timer.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> bool:
+        self._timer.cancel()
+
+        if self.expired and exc_type is None:
+            raise TimeOutException()
+
+        return False
@@ -0,0 +1,231 @@
+import codecs
+import os
+import shlex
+import shutil
+import threading
+from collections.abc import Callable
+
+from src.core.config import settings
+from src.sandbox.executor.output import decode_output
+from src.schemas import DatabaseExecutionResult
+
+HARNESS_DIR = ".vpl"
+HARNESS_SCRIPT = "harness.sh"
+HARNESS_CASE_PID_FILES = f"{HARNESS_DIR}/cases/*/pid"
+HARNESS_OUTPUT_STREAMS = ("stdout", "stderr")
+# interval at which the output files of running cases are read
+HARNESS_OUTPUT_POLL_SECONDS = 0.2
+
+# Each case runs in its own session (setsid) so the watchdog can kill the whole
+# process group of the program once the case exceeds its time limit. The watchdog
+# must not hold the exec output streams open, otherwise the exec never returns.
+# Up to `parallelism` cases run at the same time as background jobs, the process
+# group of each case is recorded so a cancelled batch can kill running cases.
+HARNESS_TEMPLATE = """#!/bin/bash
+run_case() {{
+    local case_dir="{harness_dir}/cases/$1"
+    local started=$EPOCHREALTIME
+    setsid bash -c {command} < "$case_dir/stdin" > "$case_dir/stdout" 2> "$case_dir/stderr" &
+    local pid=$!
+    echo $pid > "$case_dir/pid"
+    ( sleep {timeout} && touch "$case_dir/timed_out" && kill -KILL -- -$pid 2>/dev/null ) < /dev/null > /dev/null 2>&1 &
+    local watchdog=$!
+    wait $pid
+    local exit_code=$?
+    local finished=$EPOCHREALTIME
+    pkill -P $watchdog 2>/dev/null
+    kill $watchdog 2>/dev/null
+    echo "$exit_code $started $finished" > "$case_dir/status"
+}}
+
+running=0
+for case in {cases}; do
+    if (( running >= {parallelism} )); then
+        wait -n
+        running=$((running - 1))
+    fi
+    run_case "$case" &
+    running=$((running + 1))
+done
+wait
+"""
+
+
+def write_harness(
+    mount_dir: str,
+    command: str,
+    std_ins: list[str | None],
+    timeout: float,
+    parallelism: int = 1,
+) -> str:
+    """Write the test inputs and harness script into the mount directory."""
+
+    harness_dir = os.path.join(mount_dir, HARNESS_DIR)
+    shutil.rmtree(harness_dir, ignore_errors=True)
+
+    for index, std_in in enumerate(std_ins):
+        case_dir = os.path.join(harness_dir, "cases", str(index))
+        os.makedirs(case_dir, mode=0o777, exist_ok=True)
+
+        # mirror `<<<` here-string semantics which append a trailing newline
+        with open(os.path.join(case_dir, "stdin"), "w") as file:
+            file.write(f"{std_in}\n" if std_in else "")
+
+    script = HARNESS_TEMPLATE.format(
+        harness_dir=HARNESS_DIR,
+        command=shlex.quote(command),
+        timeout=f"{timeout:g}",
+        parallelism=max(parallelism, 1),
+        cases=" ".join(str(index) for index in range(len(std_ins))),
+    )
+
+    with open(os.path.join(harness_dir, HARNESS_SCRIPT), "w") as file:
+        file.write(script)
+
+    return f"bash {HARNESS_DIR}/{HARNESS_SCRIPT}"
+
+
+class HarnessOutputTail:
+    """
+    Forward the output of the cases while the harness runs.
+
+    The harness writes the output of each case to files in the mount
+    directory, so nothing is streamed by the exec itself. The files are read
+    from the host as they grow and new output is passed to `on_output` with
+    the stream name and the index of the case, up to the output limit.
+    """
+
+    def __init__(
+        self,
+        mount_dir: str,
+        case_count: int,
+        on_output: Callable[[str, str, int], None],
+        interval: float = HARNESS_OUTPUT_POLL_SECONDS,
+    ) -> None:
+        self.on_output = on_output
+        self.interval = interval
+        self._files = {
+            (index, stream): os.path.join(mount_dir, HARNESS_DIR, "cases", str(index), stream)
+            for index in range(case_count)
+            for stream in HARNESS_OUTPUT_STREAMS
+        }
+        self._offsets = dict.fromkeys(self._files, 0)
+        # characters split across reads are only forwarded once complete
+        self._decoders = {
+            key: codecs.getincrementaldecoder("utf-8")(errors="replace") for key in self._files
+        }
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def poll(self) -> None:
+        """Forward the output written since the last poll."""
+        for (index, stream), path in self._files.items():
+            key = (index, stream)
+            remaining = settings.EXECUTION_OUTPUT_LIMIT_BYTES - self._offsets[key]
+            if remaining <= 0:
+                continue
+
+            try:
+                with open(path, "rb") as file:
+                    file.seek(self._offsets[key])
+                    data = file.read(remaining)
+            except OSError:
+                # the case did not start yet
+                continue
+
+            if not data:
+                continue
+
+            self._offsets[key] += len(data)
+            text = self._decoders[key].decode(data)
+            if text:
+                self.on_output(stream, text, index)
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            self.poll()
+
+    def __enter__(self) -> "HarnessOutputTail":
+        self._thread = threading.Thread(target=self._run, name="harness-output", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> bool:
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+        # output written after the last poll
+        self.poll()
+        return False
+
+
+def _read_output(path: str) -> str | None:
+    """Read a captured output stream up to the output limit, `None` when the stream was empty."""
+    if not os.path.exists(path):
+        return None
+
+    with open(path, "rb") as file:
+        content = file.read(settings.EXECUTION_OUTPUT_LIMIT_BYTES)
+
+    return decode_output(content, os.path.getsize(path))
+
+
+def read_harness_results(
+    mount_dir: str,
+    std_ins: list[str | None],
+    fallback_time: float,
+) -> list[DatabaseExecutionResult]:
+    """Collect per case results written by the harness script."""
+
+    results = []
+    for index, std_in in enumerate(std_ins):
+        case_dir = os.path.join(mount_dir, HARNESS_DIR, "cases", str(index))
+        status_path = os.path.join(case_dir, "status")
+
+        # the case never finished i.e the harness itself was timed out
+        if not os.path.exists(status_path):
+            results.append(
+                DatabaseExecutionResult(
+                    std_in=std_in,
+                    exit_code=-1,
+                    state="timed_out",
+                    expended_time=fallback_time,
+                    failed_execution=True,
+                )
+            )
+            continue
+
+        with open(status_path) as file:
+            exit_code, started, finished = file.read().split()
+
+        expended_time = max(
+            float(finished.replace(",", ".")) - float(started.replace(",", ".")),
+            1e-6,
+        )
+
+        if os.path.exists(os.path.join(case_dir, "timed_out")):
+            results.append(
+                DatabaseExecutionResult(
+                    std_in=std_in,
+                    exit_code=-1,
+                    state="timed_out",
+                    expended_time=expended_time,
+                    failed_execution=True,
+                )
+            )
+            continue
+
+        success = int(exit_code) == 0
+        results.append(
+            DatabaseExecutionResult(
+                std_in=std_in,
+                std_out=_read_output(os.path.join(case_dir, "stdout")),
+                std_err=_read_output(os.path.join(case_dir, "stderr")),
+                exit_code=int(exit_code),
+                state="success" if success else "failed",
+                expended_time=expended_time,
+                failed_execution=not success,
+            )
+        )
+
+    return results
@@ -0,0 +1,58 @@
+import codecs
+from collections.abc import Callable
+
+TRUNCATION_MARKER = "\n[output truncated: {omitted} bytes omitted]"
+
+
+def decode_output(data: bytes, total_size: int | None = None) -> str | None:
+    """
+    Decode captured program output, `None` when the stream was empty.
+
+    Invalid UTF-8 (including a multi-byte character cut by the output limit) is
+    replaced instead of failing the execution. A truncation marker is appended
+    when `total_size` is larger than the captured data.
+    """
+    total_size = len(data) if total_size is None else total_size
+    if total_size == 0:
+        return None
+
+    text = data.decode("utf-8", errors="replace")
+    if total_size > len(data):
+        text += TRUNCATION_MARKER.format(omitted=total_size - len(data))
+
+    return text
+
+
+class StreamCapture:
+    """Capture an output stream incrementally, keeping at most `limit` bytes."""
+
+    def __init__(self, limit: int, on_data: Callable[[str], None] | None = None) -> None:
+        self.limit = limit
+        self.on_data = on_data
+        self.total_size = 0
+        self._size = 0
+        self._chunks: list[bytes] = []
+        # characters split across chunks are only forwarded once complete
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+    def write(self, data: bytes) -> None:
+        """Record a chunk, bytes past the limit are counted but dropped."""
+        self.total_size += len(data)
+
+        remaining = self.limit - self._size
+        if remaining > 0:
+            chunk = data[:remaining]
+            self._chunks.append(chunk)
+            self._size += len(chunk)
+
+            if self.on_data is not None:
+                text = self._decoder.decode(chunk)
+                if text:
+                    self.on_data(text)
+
+    @property
+    def truncated(self) -> bool:
+        return self.total_size > self._size
+
+    def getvalue(self) -> str | None:
+        return decode_output(b"".join(self._chunks), self.total_size)
@@ -1,7 +1,11 @@
+from collections.abc import Callable
+
 from docker.models.containers import Container
 
+from src.core.config import settings
 from src.external.schemas import CodeRepository
 from src.models import ExerciseSubmission
+from src.sandbox.cancellation import ExecutionCancellation
 from src.sandbox.executor.base import BaseExecutor
 from src.sandbox.ochestator.container import ContainerBuilder
 from src.sandbox.ochestator.schemas import ContainerConfig
@@ -16,6 +20,8 @@ class SubmissionExecutor(BaseExecutor):
         container_config: ContainerConfig,
         code_repository: CodeRepository,
         retry_limit: int = 2,
+        output_callback: Callable[[str, str, int | None], None] | None = None,
+        cancellation: ExecutionCancellation | None = None,
     ):
         """Construct executor to execute a task."""
         self.submission = submission
@@ -25,6 +31,8 @@ class SubmissionExecutor(BaseExecutor):
             container_config=container_config,
             retry_limit=retry_limit,
             code_repository=code_repository,
+            output_callback=output_callback,
+            cancellation=cancellation,
         )
 
     def _get_container(self) -> Container:
@@ -33,15 +41,18 @@ class SubmissionExecutor(BaseExecutor):
         container_id = None
         language_image = self.submission.exercise.session.language_image
 
-        if self.submission.student:
+        if self.submission.student and self.submission.student.docker_container_id:
             # Get student's container
             container_id = f'submission-{self.submission.student.docker_container_id}'
 
-        if self.submission.group:
+        if self.submission.group and self.submission.group.docker_container_id:
             # Get group container
             container_id = f'submission-{self.submission.group.docker_container_id}'
 
         if not container_id:
+            if settings.CONTAINER_POOL_ENABLED:
+                return self._lease_container(language_image)
+
             raise ValueError("Container id should not be NULL at this point.")
 
         self._mount_code_repository()
@@ -1,9 +1,13 @@
+from collections.abc import Callable
+
 from docker.models.containers import Container
 
+from src.core.config import settings
 from src.external.schemas import CodeRepository
 from src.models import Task
+from src.sandbox.cancellation import ExecutionCancellation
 from src.sandbox.executor.base import BaseExecutor
-from src.sandbox.ochestator.container import ContainerBuilder
+from src.sandbox.ochestator.container import ContainerBuilder, session_container_name
 from src.sandbox.ochestator.schemas import ContainerConfig
 
 
@@ -16,6 +20,8 @@ class TaskExecutor(BaseExecutor):
         container_config: ContainerConfig,
         code_repository: CodeRepository,
         retry_limit: int = 2,
+        output_callback: Callable[[str, str, int | None], None] | None = None,
+        cancellation: ExecutionCancellation | None = None,
     ):
         """Construct executor to execute a task."""
         self.task = task
@@ -25,23 +31,28 @@ class TaskExecutor(BaseExecutor):
             container_config=container_config,
             retry_limit=retry_limit,
             code_repository=code_repository,
+            output_callback=output_callback,
+            cancellation=cancellation,
         )
 
     def _get_container(self) -> Container:
         """Get a Container for the task."""
 
         container_id = None
-        language_image = self.task.exercise.session.language_image
-
-        if self.task.student:
-            # Get student's container
-            container_id = self.task.student.docker_container_id
+        session = self.task.exercise.session
+        language_image = session.language_image
 
-        if self.task.group:
-            # Get group container
-            container_id = self.task.group.docker_container_id
+        # the group container takes precedence over the student's
+        owner = self.task.group or self.task.student
+        if owner and owner.docker_container_id == session_container_name(session.id, owner.id):
+            # only use the container prewarmed for this session
+            container_id = owner.docker_container_id
+            self.keep_running = True
 
         if not container_id:
+            if settings.CONTAINER_POOL_ENABLED:
+                return self._lease_container(language_image)
+
             raise ValueError("Container id should not be NULL at this point.")
 
         self._mount_code_repository()
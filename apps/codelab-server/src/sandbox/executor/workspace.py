@@ -0,0 +1,107 @@
+import hashlib
+import json
+import os
+
+from src.external.schemas import CodeRepository
+from src.sandbox.executor.harness import HARNESS_DIR
+
+MANIFEST_SUFFIX = ".manifest.json"
+
+
+def _flatten_repository(repo: CodeRepository, base_path: str = "") -> dict[str, str]:
+    """Map the relative path of every file in the repository to its content."""
+    path = os.path.normpath(os.path.join(base_path, repo.path))
+    files = {}
+
+    if repo.content is not None:
+        files[path] = repo.content
+
+    for sub_repo in repo.sub:
+        files.update(_flatten_repository(sub_repo, path))
+
+    return files
+
+
+def manifest_path(mount_dir: str) -> str:
+    """The manifest lives next to the mount directory so it is not visible in the container."""
+    return f"{os.path.normpath(mount_dir)}{MANIFEST_SUFFIX}"
+
+
+def _load_manifest(mount_dir: str) -> dict[str, dict]:
+    try:
+        with open(manifest_path(mount_dir)) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_manifest(mount_dir: str, manifest: dict[str, dict]) -> None:
+    path = manifest_path(mount_dir)
+    with open(f"{path}.tmp", "w") as file:
+        json.dump(manifest, file)
+    os.replace(f"{path}.tmp", path)
+
+
+def _remove_stale_entries(mount_dir: str, files: dict[str, str]) -> None:
+    """Delete files that are not part of the repository and directories left empty."""
+    for root, _dirs, filenames in os.walk(mount_dir, topdown=False):
+        relative_root = os.path.relpath(root, mount_dir)
+        if relative_root == HARNESS_DIR or relative_root.startswith(f"{HARNESS_DIR}{os.sep}"):
+            continue
+
+        for filename in filenames:
+            relative_path = os.path.normpath(os.path.join(relative_root, filename))
+            if relative_path not in files:
+                os.unlink(os.path.join(root, filename))
+
+        if root != mount_dir and not os.listdir(root):
+            os.rmdir(root)
+
+
+def sync_code_repository(repo: CodeRepository, mount_dir: str) -> None:
+    """
+    Materialize the repository in the mount directory incrementally.
+
+    The manifest records the content hash, size and modification time of every
+    file written, only files whose content changed or that were modified on
+    disk since the last sync are written again.
+    """
+    files = _flatten_repository(repo)
+    previous_manifest = _load_manifest(mount_dir)
+    manifest = {}
+
+    os.makedirs(mount_dir, exist_ok=True, mode=0o777)
+    _remove_stale_entries(mount_dir, files)
+
+    for relative_path, content in files.items():
+        path = os.path.join(mount_dir, relative_path)
+        digest = hashlib.sha256(content.encode()).hexdigest()
+
+        entry = previous_manifest.get(relative_path)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            stat = None
+
+        if (
+            entry is not None
+            and stat is not None
+            and entry["sha256"] == digest
+            and entry["size"] == stat.st_size
+            and entry["mtime_ns"] == stat.st_mtime_ns
+        ):
+            manifest[relative_path] = entry
+            continue
+
+        os.makedirs(os.path.dirname(path), exist_ok=True, mode=0o777)
+        with open(path, "w") as file:
+            file.write(content)
+
+        stat = os.stat(path)
+        manifest[relative_path] = {
+            "sha256": digest,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+        }
+
+    _save_manifest(mount_dir, manifest)
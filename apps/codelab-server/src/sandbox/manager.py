@@ -1,9 +1,15 @@
+import asyncio
 import os
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from src.external.schemas import CodeRepository
 from src.models import ExerciseSubmission, Task, TestCase
+from src.sandbox.cancellation import ExecutionCancellation, ExecutionCancelled
 from src.sandbox.executor.task import TaskExecutor
 from src.sandbox.executor.submission import SubmissionExecutor
 from src.sandbox.executor.base import BaseExecutor
+from src.sandbox.executor.cache import compile_cache
 from src.sandbox.ochestator.container import ContainerBuilderErrors
 from src.sandbox.ochestator.schemas import ContainerConfig
 from src.schemas import DatabaseExecutionResult
@@ -13,6 +19,13 @@ from src.log import logger
 from docker.errors import APIError
 
 
+# docker-py is blocking, executions run in these threads to keep the worker event loop free
+_execution_thread_pool = ThreadPoolExecutor(
+    max_workers=settings.MAX_CONCURRENT_EXECUTIONS,
+    thread_name_prefix='sandbox-execution',
+)
+
+
 class ExecutionFailedError(Exception):
     
     def __init__(self, error_message: str) -> None:
@@ -21,12 +34,22 @@ class ExecutionFailedError(Exception):
 
 class ResourceManager:
 
+    def __init__(
+        self,
+        output_callback: Callable[[str, str, int | None], None] | None = None,
+        cancellation: ExecutionCancellation | None = None,
+    ) -> None:
+        # receives (stream name, text) while the program produces output
+        self.output_callback = output_callback
+        self.cancellation = cancellation
+
     def _get_container_config(self, session: Session) -> ContainerConfig:
         """Calculate the container configuration based on the given session configuration."""
 
         session_config = session.configuration
         container_config = ContainerConfig(
             cpu_time_limit_minutes=session_config.cpu_time_limit / 60,
+            wall_time_limit_seconds=session_config.wall_time_limit,
             memory_limit_kb=session_config.memory_limit,
             max_processes=session_config.max_processes_and_or_threads,
             enable_network=session_config.enable_network
@@ -34,6 +57,38 @@ class ResourceManager:
 
         return container_config
 
+    def _test_case_parallelism(
+        self,
+        available_test_cases: list[TestCase],
+        container_config: ContainerConfig,
+    ) -> int:
+        """
+        Number of test cases to run concurrently, bounded by the session process
+        limit (all cases share the container nproc ulimit) and the host cores.
+        """
+
+        return max(
+            min(
+                settings.MAX_TEST_CASE_PARALLELISM,
+                container_config.max_processes,
+                os.cpu_count() or 1,
+                len(available_test_cases),
+            ),
+            1,
+        )
+
+    def available_test_cases(self, request: Task | ExerciseSubmission) -> list[TestCase]:
+        """Test cases to run, tasks only run the test cases visible to the student."""
+
+        if isinstance(request, Task):
+            return [
+                test_case
+                for test_case in request.exercise.test_cases
+                if test_case.visible
+            ]
+
+        return list(request.exercise.test_cases)
+
     def _compilation_command(
         self,
         entry_file_path: str,
@@ -70,6 +125,38 @@ class ResourceManager:
             "<filename>", entry_file_path
         )
 
+    def _compile_program(
+        self,
+        compile_command: str,
+        language_image: LanguageImage,
+        executor: BaseExecutor,
+    ) -> DatabaseExecutionResult | None:
+        """Compile the program, `None` when the outputs were restored from the compile cache."""
+
+        cache_key = None
+        if settings.COMPILE_CACHE_ENABLED and executor.code_repository is not None:
+            cache_key = compile_cache.key(
+                code_repository=executor.code_repository,
+                compile_command=compile_command,
+                language_image=language_image,
+            )
+            if compile_cache.restore(cache_key, executor.mount_dir):
+                return None
+
+            snapshot = compile_cache.snapshot(executor.mount_dir)
+
+        try:
+            result = executor.run(command=compile_command, is_compilation=True)
+        except ExecutionCancelled:
+            raise
+        except (Exception, APIError) as error:
+            raise ExecutionFailedError(error_message=str(error)) from error
+
+        if cache_key is not None and result.state == 'success':
+            compile_cache.store(cache_key, executor.mount_dir, snapshot)
+
+        return result
+
     def _execute_program(
         self,
         entry_file_path: str,
@@ -95,16 +182,17 @@ class ResourceManager:
                 language_image=language_image,
             )
             
-            try:
-                result = executor.run(command=compile_command, is_compilation=True)
-            except (Exception, APIError) as error:
-                raise ExecutionFailedError(error_message=str(error)) from error
+            result = self._compile_program(
+                compile_command=compile_command,
+                language_image=language_image,
+                executor=executor,
+            )
 
-            if result.state != 'success':
+            if result is not None and result.state != 'success':
                 return [
                     DatabaseExecutionResult(
-                        **result.model_dump(),
-                        test_case_id=test_case.id,
+                        **result.model_dump(exclude={'test_case_id'}),
+                        test_case_id=str(test_case.id),
                     )
                     for test_case in available_test_cases
                 ] if available_test_cases else [
@@ -116,15 +204,29 @@ class ResourceManager:
         try:
             # after compilation run the program for each test case
             results = []
-            if available_test_cases:
+            if available_test_cases and settings.BATCH_TEST_CASE_EXECUTION:
+                # run every test case in a single harness exec
+                batch_results = executor.run_batch(
+                    command=execution_command,
+                    std_ins=[test_case.test_input for test_case in available_test_cases],
+                    parallelism=self._test_case_parallelism(
+                        available_test_cases=available_test_cases,
+                        container_config=executor.container_config,
+                    ),
+                )
+                results = [
+                    result.model_copy(update={'test_case_id': str(test_case.id)})
+                    for result, test_case in zip(batch_results, available_test_cases, strict=True)
+                ]
+            elif available_test_cases:
                 for test_case in available_test_cases:
                     results.append(
                         DatabaseExecutionResult(
                             **executor.run(
                                 command=execution_command,
                                 std_in=test_case.test_input,
-                            ).model_dump(exclude=['test_case_id']),
-                            test_case_id=test_case.id,
+                            ).model_dump(exclude={'test_case_id'}),
+                            test_case_id=str(test_case.id),
                         )
                     )
             else:
@@ -133,6 +235,8 @@ class ResourceManager:
                         **executor.run(command=execution_command).model_dump()
                     ) 
                 )
+        except ExecutionCancelled:
+            raise
         except (Exception, APIError) as error:
             raise ExecutionFailedError(error_message=str(error)) from error
 
@@ -148,14 +252,11 @@ class ResourceManager:
         session = task.exercise.session
         language_image = session.language_image
         container_config = self._get_container_config(session)
-        available_test_cases = [
-            test_case
-            for test_case in task.exercise.test_cases
-            if test_case.visible
-        ]
+        available_test_cases = self.available_test_cases(task)
 
         session_id = str(session.id)
-        executor_id =  str(task.student_id if task.student_id else task.group_id)
+        # matches the owner of the container used by the task executor
+        executor_id = str(task.group_id if task.group_id else task.student_id)
         try:
             executor = TaskExecutor(
                 task=task,
@@ -163,6 +264,8 @@ class ResourceManager:
                 mount_dir=os.path.join(settings.TESTING_DIR, session_id, executor_id),
                 container_config=container_config,
                 code_repository=code_repository,
+                output_callback=self.output_callback,
+                cancellation=self.cancellation,
             )
         except ContainerBuilderErrors as error:
             logger.error(
@@ -175,12 +278,15 @@ class ResourceManager:
             )
             raise ExecutionFailedError(error_message=error.error_message) from error
 
-        return self._execute_program(
-            entry_file_path=task.entry_file_path,
-            language_image=language_image,
-            available_test_cases=available_test_cases,
-            executor=executor,
-        )
+        try:
+            return self._execute_program(
+                entry_file_path=task.entry_file_path,
+                language_image=language_image,
+                available_test_cases=available_test_cases,
+                executor=executor,
+            )
+        finally:
+            executor.release()
 
     def _execute_submission(
         self, 
@@ -192,7 +298,7 @@ class ResourceManager:
         session = submission.exercise.session
         language_image = session.language_image
         container_config = self._get_container_config(session)
-        available_test_cases = submission.exercise.test_cases
+        available_test_cases = self.available_test_cases(submission)
 
         session_id = str(session.id)
         executor_id =  str(submission.student_id if submission.student_id else submission.group_id)
@@ -203,6 +309,8 @@ class ResourceManager:
                 mount_dir=os.path.join(settings.SUBMISSION_DIR, session_id, executor_id),
                 container_config=container_config,
                 code_repository=code_repository,
+                output_callback=self.output_callback,
+                cancellation=self.cancellation,
             )
         except ContainerBuilderErrors as error:
             logger.error(
@@ -215,12 +323,15 @@ class ResourceManager:
             )
             raise ExecutionFailedError(error_message=error.error_message) from error
 
-        return self._execute_program(
-            entry_file_path=submission.entry_file_path,
-            language_image=language_image,
-            available_test_cases=available_test_cases,
-            executor=executor,
-        )
+        try:
+            return self._execute_program(
+                entry_file_path=submission.entry_file_path,
+                language_image=language_image,
+                available_test_cases=available_test_cases,
+                executor=executor,
+            )
+        finally:
+            executor.release()
 
     def execute(
         self, 
@@ -235,3 +346,16 @@ class ResourceManager:
 
         print('EXECUTING AS SUBMISSION')
         return self._execute_submission(request, code_repository=code_repository)
+
+    async def execute_async(
+        self,
+        code_repository: CodeRepository,
+        request: Task | ExerciseSubmission,
+    ) -> list[DatabaseExecutionResult]:
+        """Execute a given task or exercise submission without blocking the event loop."""
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            _execution_thread_pool,
+            partial(self.execute, code_repository=code_repository, request=request),
+        )
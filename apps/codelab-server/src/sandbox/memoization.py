@@ -0,0 +1,127 @@
+import hashlib
+import json
+
+from pydantic import TypeAdapter
+from redis.exceptions import RedisError
+
+from src.core.config import settings
+from src.core.redis import get_shared_redis_client
+from src.external.schemas import CodeRepository
+from src.log import logger
+from src.models import ExerciseSubmission, Task, TestCase
+from src.schemas import DatabaseExecutionResult
+
+EXECUTION_RESULT_REDIS_PREFIX = "vpl:execution-results"
+
+# only results that do not depend on timing or infrastructure are reused
+MEMOIZABLE_STATES = {"success", "failed"}
+
+_results_adapter = TypeAdapter(list[DatabaseExecutionResult])
+
+
+class ExecutionResultCache:
+    """
+    Memoize execution results of identical (code, input) pairs.
+
+    Results are stored in Redis with a TTL under a per session generation,
+    bumping the generation invalidates every stored result of the session.
+    """
+
+    def __init__(self, ttl_seconds: int | None = None) -> None:
+        self.ttl_seconds = (
+            ttl_seconds
+            if ttl_seconds is not None
+            else settings.EXECUTION_RESULT_CACHE_TTL_SECONDS
+        )
+        self.redis_client = get_shared_redis_client()
+
+    @staticmethod
+    def _generation_key(session_id: str) -> str:
+        return f"{EXECUTION_RESULT_REDIS_PREFIX}:{session_id}:generation"
+
+    def _key(
+        self,
+        request: Task | ExerciseSubmission,
+        code_repository: CodeRepository,
+        test_cases: list[TestCase],
+    ) -> str:
+        """Build the cache key of an execution request."""
+        session = request.exercise.session
+        generation = self.redis_client.get(self._generation_key(str(session.id))) or 0
+
+        fingerprint = {
+            "repository": hashlib.sha256(
+                code_repository.model_dump_json().encode()
+            ).hexdigest(),
+            "entry_file_path": request.entry_file_path,
+            "language_image_id": str(session.language_image_id),
+            "docker_image_id": session.language_image.docker_image_id,
+            "test_cases": [
+                [str(test_case.id), test_case.test_input] for test_case in test_cases
+            ],
+            "resources": session.configuration.model_dump(
+                mode="json",
+                exclude={"id", "session_id", "created_at", "updated_at"},
+            ),
+        }
+        digest = hashlib.sha256(
+            json.dumps(fingerprint, sort_keys=True).encode()
+        ).hexdigest()
+
+        return f"{EXECUTION_RESULT_REDIS_PREFIX}:{session.id}:{generation}:{digest}"
+
+    def get(
+        self,
+        request: Task | ExerciseSubmission,
+        code_repository: CodeRepository,
+        test_cases: list[TestCase],
+    ) -> list[DatabaseExecutionResult] | None:
+        """Get the memoized results of an execution request."""
+        try:
+            cached = self.redis_client.get(
+                self._key(request, code_repository, test_cases)
+            )
+        except RedisError as error:
+            logger.warning(
+                'src::sandbox::memoization::ExecutionResultCache::get:: '
+                f'Execution result cache unavailable: {error}'
+            )
+            return None
+
+        return _results_adapter.validate_json(cached) if cached else None
+
+    def set(
+        self,
+        request: Task | ExerciseSubmission,
+        code_repository: CodeRepository,
+        test_cases: list[TestCase],
+        results: list[DatabaseExecutionResult],
+    ) -> None:
+        """Memoize the results of an execution request when they are deterministic."""
+        if not all(result.state in MEMOIZABLE_STATES for result in results):
+            return
+
+        try:
+            self.redis_client.set(
+                self._key(request, code_repository, test_cases),
+                _results_adapter.dump_json(results),
+                ex=self.ttl_seconds,
+            )
+        except RedisError as error:
+            logger.warning(
+                'src::sandbox::memoization::ExecutionResultCache::set:: '
+                f'Failed to store execution results: {error}'
+            )
+
+    def invalidate_session(self, session_id: str) -> None:
+        """Invalidate every memoized result of a session."""
+        try:
+            self.redis_client.incr(self._generation_key(session_id))
+        except RedisError as error:
+            logger.warning(
+                'src::sandbox::memoization::ExecutionResultCache::invalidate_session:: '
+                f'Failed to invalidate execution results of session {session_id}: {error}'
+            )
+
+
+execution_result_cache = ExecutionResultCache()
@@ -1,3 +1,6 @@
+import time
+from uuid import UUID
+
 from docker.errors import (  # type: ignore
     APIError,
     ContainerError,
@@ -7,11 +10,20 @@ from docker.errors import (  # type: ignore
 from docker.models.containers import Container
 from docker.types import Ulimit
 
+from src.core.config import settings
 from src.core.docker import get_shared_docker_client
+from src.core.metrics import CONTAINER_START_LATENCY, record_metric
 from src.models import LanguageImage
 from src.sandbox.ochestator.schemas import ContainerConfig
 from src.sandbox.types import CONTAINER_LABEL
 
+# processes of a container besides its programs: the idle command and the exec shells
+CONTAINER_BASE_PROCESSES = 8
+# processes the batch harness adds to each running program
+HARNESS_PROCESSES_PER_PROGRAM = 4
+# smallest memory limit accepted by Docker
+MIN_CONTAINER_MEMORY_BYTES = 6 * 1024 * 1024
+
 
 class ContainerBuilderErrors(Exception):
     def __init__(self, exit_code: int, error_message: str):
@@ -29,6 +41,12 @@ class ContainerNotFound(ContainerBuilderErrors):
     """Container not found."""
     pass
 
+
+def session_container_name(session_id: UUID | str, owner_id: UUID | str) -> str:
+    """Name of the dedicated container of a student or group in a session."""
+    return f"session-{session_id}-{owner_id}"
+
+
 class ContainerBuilder:
     def __init__(
         self,
@@ -111,12 +129,44 @@ class ContainerBuilder:
         ]
         return ulimits
 
+    def _get_resource_limits(self) -> dict:
+        """
+        Container wide memory, process and open file limits.
+
+        Up to `MAX_TEST_CASE_PARALLELISM` programs run in the container at the
+        same time, so the memory and process limits of the session are allowed
+        for each of them.
+        """
+
+        if not self.container_config:
+            return {}
+
+        config = self.container_config
+        programs = max(min(settings.MAX_TEST_CASE_PARALLELISM, config.max_processes), 1)
+        memory_limit = max(config.memory_limit_kb * 1024 * programs, MIN_CONTAINER_MEMORY_BYTES)
+
+        return {
+            "mem_limit": memory_limit,
+            # no swap on top of the memory limit
+            "memswap_limit": memory_limit,
+            "pids_limit": CONTAINER_BASE_PROCESSES
+            + programs * (config.max_processes + HARNESS_PROCESSES_PER_PROGRAM),
+            "ulimits": [
+                Ulimit(
+                    name="nofile",
+                    soft=config.max_open_files,
+                    hard=config.max_open_files_hard,
+                ),
+            ],
+        }
+
     def create_container(
         self,
         command: str | None = None,
         label: CONTAINER_LABEL | None = None,
+        limit_resources: bool = False,
     ) -> Container:
-        """Build a Container."""
+        """Build a Container, `limit_resources` applies the container wide resource limits."""
 
         self._assert_volume_config()
 
@@ -133,6 +183,7 @@ class ContainerBuilder:
                 network_disabled=(not self.container_config.enable_network)
                 if self.container_config
                 else False,
+                **(self._get_resource_limits() if limit_resources else {}),
             )
 
             return container
@@ -181,3 +232,50 @@ class ContainerBuilder:
                 return self.get_container()
             except ContainerNotFound as error:
                 raise build_failure from error
+
+
+def start_container(container: Container, timeout: float = 30) -> float:
+    """
+    Start a container and wait until Docker reports it running.
+
+    The start API returns once the container process is started, so the
+    container is usually running right away. Otherwise the Docker events stream
+    is followed, replaying events since the start request so none are missed,
+    until the container starts or dies. Returns the measured start latency.
+    """
+
+    started_at = time.time()
+
+    try:
+        container.start()
+        container.reload()
+
+        if container.status != "running":
+            events = get_shared_docker_client().events(
+                decode=True,
+                since=started_at,
+                until=started_at + timeout,
+                filters={"container": container.id, "event": ["start", "die"]},
+            )
+            try:
+                next(iter(events), None)
+            finally:
+                events.close()
+
+            container.reload()
+    except APIError as error:
+        raise ContainerBuildFailed(
+            exit_code=-1024,
+            error_message=f"Container start Docker API error: `{error}`",
+        ) from error
+
+    start_latency = time.time() - started_at
+    record_metric(CONTAINER_START_LATENCY, start_latency)
+
+    if container.status != "running":
+        raise ContainerBuildFailed(
+            exit_code=-1024,
+            error_message=f"Container failed to start with status `{container.status}`",
+        )
+
+    return start_latency
@@ -0,0 +1,219 @@
+import hashlib
+import os
+import shutil
+import uuid
+from dataclasses import dataclass
+
+from docker.errors import APIError  # type: ignore
+from docker.models.containers import Container
+from redis.exceptions import RedisError
+
+from src.core.config import settings
+from src.core.redis import get_shared_redis_client
+from src.log import logger
+from src.models import LanguageImage
+from src.sandbox.executor.workspace import manifest_path
+from src.sandbox.ochestator.container import (
+    ContainerBuilder,
+    ContainerBuildFailed,
+    ContainerNotFound,
+    start_container,
+)
+from src.sandbox.ochestator.schemas import ContainerConfig
+
+POOL_WORKDIR = "/workspace"
+POOL_REDIS_PREFIX = "vpl:container-pool"
+
+# push a container back to the idle list only while the list is below the pool size
+_RELEASE_SCRIPT = """
+if redis.call('LLEN', KEYS[1]) < tonumber(ARGV[2]) then
+    redis.call('RPUSH', KEYS[1], ARGV[1])
+    return 1
+end
+return 0
+"""
+
+
+@dataclass
+class ContainerLease:
+    """A warm container leased from the pool."""
+
+    pool_key: str
+    container: Container
+    mount_dir: str
+    workdir: str = POOL_WORKDIR
+
+
+class ContainerPool:
+    """
+    Pool of pre-started containers shared by all worker processes.
+
+    Idle container names are kept in a Redis list per language image and
+    resource configuration, so any worker process can lease a warm container
+    and return it once the execution is done. Pooled containers run the
+    programs of many students, they are created with the memory, process and
+    open file limits of their resource configuration.
+    """
+
+    def __init__(self, pool_size: int | None = None) -> None:
+        self.pool_size = (
+            pool_size if pool_size is not None else settings.CONTAINER_POOL_SIZE
+        )
+        self.redis_client = get_shared_redis_client()
+        self._release_script = self.redis_client.register_script(_RELEASE_SCRIPT)
+
+    @staticmethod
+    def _pool_key(
+        language_image: LanguageImage, container_config: ContainerConfig
+    ) -> str:
+        """Key containers by image build and resource limits."""
+        fingerprint = hashlib.sha256(
+            f"{language_image.docker_image_id}:{container_config.model_dump_json()}".encode()
+        ).hexdigest()[:16]
+        return f"{language_image.id}:{fingerprint}"
+
+    @staticmethod
+    def _redis_key(pool_key: str) -> str:
+        return f"{POOL_REDIS_PREFIX}:{pool_key}"
+
+    @staticmethod
+    def _mount_dir(container_name: str) -> str:
+        return os.path.join(settings.FILESYSTEM_DIR, "pool", container_name)
+
+    def _create(
+        self,
+        language_image: LanguageImage,
+        container_config: ContainerConfig,
+        pool_key: str,
+    ) -> ContainerLease:
+        """Create and start a new pooled container."""
+        container_name = f"pool-{language_image.id}-{uuid.uuid4().hex[:12]}"
+        mount_dir = self._mount_dir(container_name)
+        os.makedirs(mount_dir, mode=0o777, exist_ok=True)
+
+        container = ContainerBuilder(
+            language_image=language_image,
+            container_name=container_name,
+            mount_dir=mount_dir,
+            workdir=POOL_WORKDIR,
+            container_config=container_config,
+        ).create_container(command="sleep infinite", label="pool", limit_resources=True)
+
+        try:
+            start_container(container)
+        except ContainerBuildFailed:
+            self._discard(container, mount_dir)
+            raise
+
+        return ContainerLease(
+            pool_key=pool_key,
+            container=container,
+            mount_dir=mount_dir,
+        )
+
+    def _discard(self, container: Container, mount_dir: str) -> None:
+        """Remove a container and its workspace."""
+        try:
+            container.remove(force=True, v=True)
+        except APIError as error:
+            logger.warning(
+                'src::sandbox::ochestator::pool::ContainerPool::_discard:: '
+                f'Failed to remove pooled container {container.name}: {error}'
+            )
+
+        shutil.rmtree(mount_dir, ignore_errors=True)
+        if os.path.exists(manifest_path(mount_dir)):
+            os.unlink(manifest_path(mount_dir))
+
+    def _reset_workspace(self, lease: ContainerLease) -> None:
+        """Kill left over processes and empty the workspace of a container."""
+        lease.container.exec_run(["bash", "-c", "kill -KILL -1 2>/dev/null; exit 0"])
+
+        for entry in os.scandir(lease.mount_dir):
+            if entry.is_dir(follow_symlinks=False):
+                shutil.rmtree(entry.path)
+            else:
+                os.unlink(entry.path)
+
+        if os.path.exists(manifest_path(lease.mount_dir)):
+            os.unlink(manifest_path(lease.mount_dir))
+
+    def lease(
+        self,
+        language_image: LanguageImage,
+        container_config: ContainerConfig,
+    ) -> ContainerLease:
+        """Lease a running container, creating one when the pool is empty."""
+        pool_key = self._pool_key(language_image, container_config)
+
+        while True:
+            try:
+                container_name = self.redis_client.lpop(self._redis_key(pool_key))
+            except RedisError as error:
+                logger.warning(
+                    'src::sandbox::ochestator::pool::ContainerPool::lease:: '
+                    f'Container pool unavailable, creating a new container: {error}'
+                )
+                container_name = None
+
+            if container_name is None:
+                return self._create(language_image, container_config, pool_key)
+
+            try:
+                container = ContainerBuilder(
+                    language_image=language_image,
+                    container_name=container_name,
+                ).get_container()
+            except ContainerNotFound:
+                shutil.rmtree(self._mount_dir(container_name), ignore_errors=True)
+                continue
+
+            if container.status != "running":
+                self._discard(container, self._mount_dir(container_name))
+                continue
+
+            return ContainerLease(
+                pool_key=pool_key,
+                container=container,
+                mount_dir=self._mount_dir(container_name),
+            )
+
+    def release(self, lease: ContainerLease) -> None:
+        """Reset a leased container and return it to the pool."""
+        try:
+            self._reset_workspace(lease)
+            returned = self._release_script(
+                keys=[self._redis_key(lease.pool_key)],
+                args=[lease.container.name, self.pool_size],
+            )
+        except (APIError, OSError, RedisError) as error:
+            logger.warning(
+                'src::sandbox::ochestator::pool::ContainerPool::release:: '
+                f'Failed to return container {lease.container.name} to the pool: {error}'
+            )
+            returned = 0
+
+        if not returned:
+            self._discard(lease.container, lease.mount_dir)
+
+    def prewarm(
+        self,
+        language_image: LanguageImage,
+        container_config: ContainerConfig,
+        count: int | None = None,
+    ) -> int:
+        """Start containers until the pool holds `count` idle containers."""
+        pool_key = self._pool_key(language_image, container_config)
+        target = min(count or self.pool_size, self.pool_size)
+        missing = target - self.redis_client.llen(self._redis_key(pool_key))
+
+        created = 0
+        for _ in range(max(missing, 0)):
+            lease = self._create(language_image, container_config, pool_key)
+            self.release(lease)
+            created += 1
+
+        return created
+
+
+container_pool = ContainerPool()
@@ -0,0 +1,204 @@
+import os
+import shutil
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from docker.errors import APIError, NotFound  # type: ignore
+from redis.exceptions import RedisError
+from sqlmodel import Session, col, or_, select
+
+from src.core.config import settings
+from src.core.docker import get_shared_docker_client
+from src.core.redis import get_shared_redis_client
+from src.log import logger
+from src.models import Session as WorkflowSession
+from src.schemas import SessionStatus
+
+# container name -> time the container was last started for an execution
+CONTAINER_ACTIVITY_KEY = "vpl:container-activity"
+
+# pool containers are reused and discarded by the container pool itself
+REAPED_CONTAINER_LABELS = ("test", "submission", "build")
+ENDED_SESSION_STATUSES = (SessionStatus.completed, SessionStatus.cancelled)
+
+
+def record_container_activity(container_name: str) -> None:
+    """Mark a container as used, idle containers are removed by the reaper."""
+    try:
+        get_shared_redis_client().hset(CONTAINER_ACTIVITY_KEY, container_name, time.time())
+    except RedisError as error:
+        logger.warning(
+            'src::sandbox::ochestator::reaper::record_container_activity:: '
+            f'Failed to record activity of container {container_name}: {error}'
+        )
+
+
+class ContainerReaper:
+    """
+    Remove idle executor containers and the workspaces of ended sessions.
+
+    Containers are listed once per label without inspecting each of them.
+    A container is removed once it has not been started for an execution
+    within `CONTAINER_IDLE_TTL_MINUTES`, or within
+    `CONTAINER_REAP_GRACE_MINUTES` once its session has ended so executions
+    queued before the end can finish. It is created again on its next
+    execution. Session workspaces under
+    `TESTING_DIR` and `SUBMISSION_DIR` are deleted `WORKSPACE_RETENTION_HOURS`
+    after their session ended.
+    """
+
+    def __init__(self, db_session: Session) -> None:
+        self.db_session = db_session
+        self.docker_client = get_shared_docker_client()
+        self.redis_client = get_shared_redis_client()
+        self.workspace_dirs = (settings.TESTING_DIR, settings.SUBMISSION_DIR)
+
+    def _session_id(self, path: str) -> uuid.UUID | None:
+        """Session of a workspace path, workspaces live in `<workspace dir>/<session id>/`."""
+        for workspace_dir in self.workspace_dirs:
+            relative_path = os.path.relpath(os.path.realpath(path), os.path.realpath(workspace_dir))
+            if relative_path.startswith(os.pardir):
+                continue
+
+            try:
+                return uuid.UUID(relative_path.split(os.sep)[0])
+            except ValueError:
+                return None
+
+        return None
+
+    def _ended_sessions(
+        self,
+        session_ids: set[uuid.UUID],
+        retention: timedelta = timedelta(0),
+    ) -> set[uuid.UUID]:
+        """Sessions that ended more than `retention` ago, sessions that no longer exist have ended."""
+        if not session_ids:
+            return set()
+
+        now = datetime.now()
+        existing = set(
+            self.db_session.exec(
+                select(WorkflowSession.id).where(col(WorkflowSession.id).in_(session_ids))
+            ).all()
+        )
+        ended = self.db_session.exec(
+            select(WorkflowSession.id).where(
+                col(WorkflowSession.id).in_(existing),
+                or_(
+                    col(WorkflowSession.status).in_(ENDED_SESSION_STATUSES),
+                    col(WorkflowSession.end_time) <= now,
+                ),
+                or_(
+                    col(WorkflowSession.end_time).is_(None),
+                    col(WorkflowSession.end_time) <= now - retention,
+                ),
+            )
+        ).all()
+
+        return (session_ids - existing) | set(ended)
+
+    def _list_containers(self) -> list:
+        containers = []
+        for label in REAPED_CONTAINER_LABELS:
+            # sparse listing avoids an inspect call per container
+            containers.extend(
+                self.docker_client.containers.list(all=True, sparse=True, filters={"label": label})
+            )
+        return containers
+
+    @staticmethod
+    def _container_name(container) -> str:
+        return container.attrs.get('Names', [container.id])[0].lstrip('/')
+
+    def _container_session_id(self, container) -> uuid.UUID | None:
+        for mount in container.attrs.get('Mounts') or []:
+            session_id = self._session_id(mount.get('Source', ''))
+            if session_id is not None:
+                return session_id
+        return None
+
+    def reap_containers(self) -> int:
+        """Remove the containers of ended sessions and idle containers, returns the number removed."""
+
+        containers = self._list_containers()
+        if not containers:
+            return 0
+
+        activity = self.redis_client.hgetall(CONTAINER_ACTIVITY_KEY)
+        now = time.time()
+        idle_cutoff = now - settings.CONTAINER_IDLE_TTL_MINUTES * 60
+        ended_cutoff = now - settings.CONTAINER_REAP_GRACE_MINUTES * 60
+
+        container_sessions = {
+            container.id: self._container_session_id(container) for container in containers
+        }
+        ended_sessions = self._ended_sessions(
+            {session_id for session_id in container_sessions.values() if session_id is not None}
+        )
+
+        removed = []
+        for container in containers:
+            name = self._container_name(container)
+            last_active = float(activity.get(name) or container.attrs.get('Created') or 0)
+            session_ended = container_sessions[container.id] in ended_sessions
+
+            if last_active > (ended_cutoff if session_ended else idle_cutoff):
+                continue
+
+            try:
+                self.docker_client.api.remove_container(container.id, v=True, force=True)
+                removed.append(name)
+            except NotFound:
+                removed.append(name)
+            except APIError as error:
+                logger.warning(
+                    'src::sandbox::ochestator::reaper::ContainerReaper::reap_containers:: '
+                    f'Failed to remove container {name}: {error}'
+                )
+
+        # also forget containers removed by other means
+        forgotten = set(activity) - {self._container_name(container) for container in containers}
+        if removed or forgotten:
+            self.redis_client.hdel(CONTAINER_ACTIVITY_KEY, *removed, *forgotten)
+
+        return len(removed)
+
+    def reap_workspaces(self) -> int:
+        """Delete the workspaces of sessions ended past the retention, returns the number deleted."""
+
+        workspaces: dict[uuid.UUID, list[str]] = {}
+        for workspace_dir in self.workspace_dirs:
+            if not os.path.isdir(workspace_dir):
+                continue
+
+            for entry in os.scandir(workspace_dir):
+                try:
+                    session_id = uuid.UUID(entry.name)
+                except ValueError:
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    workspaces.setdefault(session_id, []).append(entry.path)
+
+        deleted = 0
+        ended_sessions = self._ended_sessions(
+            set(workspaces),
+            retention=timedelta(hours=settings.WORKSPACE_RETENTION_HOURS),
+        )
+        for session_id in ended_sessions:
+            for path in workspaces[session_id]:
+                shutil.rmtree(path, ignore_errors=True)
+                deleted += 1
+
+        return deleted
+
+    def run(self) -> None:
+        containers = self.reap_containers()
+        workspaces = self.reap_workspaces()
+
+        if containers or workspaces:
+            logger.info(
+                'src::sandbox::ochestator::reaper::ContainerReaper::run:: '
+                f'Removed {containers} containers and {workspaces} session workspaces.'
+            )
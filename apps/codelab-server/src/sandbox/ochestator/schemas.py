@@ -9,6 +9,11 @@ class ContainerConfig(BaseModel):
         description="Maximum CPU time in minutes a container can use (ulimit -t cpu).",
     )
 
+    wall_time_limit_seconds: PositiveFloat = Field(
+        default=300.0,  # 5 minutes
+        description="Maximum wall clock time in seconds a program can run before it is killed.",
+    )
+
     memory_limit_kb: PositiveInt = Field(
         default=1048 * 100,  # 100 MB in KB
         description="Maximum address space limit in KB (ulimit -v as).",
@@ -0,0 +1,194 @@
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from uuid import UUID
+
+from docker.errors import APIError, ImageNotFound  # type: ignore
+from redis.exceptions import RedisError
+from sqlmodel import Session, col, select
+
+from src.core.config import settings
+from src.core.docker import get_shared_docker_client
+from src.core.redis import get_shared_redis_client
+from src.log import logger
+from src.models import Group, LanguageImage, SessionEnrollment, Student
+from src.models import Session as WorkflowSession
+from src.sandbox.manager import ResourceManager
+from src.sandbox.ochestator.container import (
+    ContainerBuilder,
+    ContainerBuilderErrors,
+    session_container_name,
+    start_container,
+)
+from src.sandbox.ochestator.reaper import record_container_activity
+from src.sandbox.ochestator.schemas import ContainerConfig
+from src.sandbox.schemas import ContainerPrewarmSchema
+
+CONTAINER_PREWARM_PREFIX = "vpl:container-prewarm"
+# progress is kept for a day after the last update
+CONTAINER_PREWARM_TTL_SECONDS = 24 * 60 * 60
+
+
+def _progress_key(session_id: UUID | str) -> str:
+    return f"{CONTAINER_PREWARM_PREFIX}:{session_id}"
+
+
+def get_prewarm_progress(session_id: UUID | str) -> ContainerPrewarmSchema | None:
+    """Progress of the last container prewarm of a session, `None` if it never ran."""
+    progress = get_shared_redis_client().hgetall(_progress_key(session_id))
+    return ContainerPrewarmSchema.model_validate(progress) if progress else None
+
+
+class SessionContainerPrewarmer:
+    """
+    Create and start the containers of the students and groups of a session
+    before it starts.
+
+    Without a prewarm the first run of every student creates their container,
+    so the start of a lab is a burst of container creations. The containers
+    are created concurrently, each student or group gets the container the
+    task executor expects for the session, and the progress is kept in Redis
+    so admins can follow it.
+    """
+
+    def __init__(self, db_session: Session, session: WorkflowSession) -> None:
+        self.db_session = db_session
+        self.session = session
+        self.redis_client = get_shared_redis_client()
+        self.progress_key = _progress_key(session.id)
+
+    def _owners(self) -> list[Student | Group]:
+        """Groups of the session and enrolled students working on their own."""
+
+        enrollments = self.db_session.exec(
+            select(SessionEnrollment.student_id, SessionEnrollment.group_id).where(
+                SessionEnrollment.session_id == self.session.id,
+                col(SessionEnrollment.student_id).is_not(None) | col(SessionEnrollment.group_id).is_not(None),
+            )
+        ).all()
+
+        group_ids = {group_id for _, group_id in enrollments if group_id}
+        student_ids = {student_id for student_id, group_id in enrollments if student_id and not group_id}
+
+        owners: list[Student | Group] = []
+        if group_ids:
+            owners.extend(self.db_session.exec(select(Group).where(col(Group.id).in_(group_ids))).all())
+        if student_ids:
+            owners.extend(self.db_session.exec(select(Student).where(col(Student.id).in_(student_ids))).all())
+
+        return owners
+
+    def _update_progress(self, reset: bool = False, **fields) -> None:
+        """Progress is informational, a Redis failure does not stop the prewarm."""
+        values = {
+            name: value.isoformat() if isinstance(value, datetime) else str(value)
+            for name, value in fields.items()
+        }
+        try:
+            with self.redis_client.pipeline() as pipeline:
+                if reset:
+                    pipeline.delete(self.progress_key)
+                pipeline.hset(self.progress_key, mapping=values)
+                pipeline.expire(self.progress_key, CONTAINER_PREWARM_TTL_SECONDS)
+                pipeline.execute()
+        except RedisError as error:
+            logger.warning(
+                'src::sandbox::prewarm::SessionContainerPrewarmer::_update_progress:: '
+                f'Failed to record prewarm progress of session {self.session.id}: {error}'
+            )
+
+    def _increment_progress(self, field: str) -> None:
+        try:
+            self.redis_client.hincrby(self.progress_key, field, 1)
+        except RedisError:
+            pass
+
+    def _prewarm_container(
+        self,
+        owner_id: UUID,
+        language_image: LanguageImage,
+        container_config: ContainerConfig,
+    ) -> str:
+        """Create and start the container of a student or group, returns its name."""
+
+        container_name = session_container_name(self.session.id, owner_id)
+        mount_dir = os.path.join(settings.TESTING_DIR, str(self.session.id), str(owner_id))
+        os.makedirs(mount_dir, exist_ok=True)
+
+        container = ContainerBuilder(
+            language_image=language_image,
+            container_name=container_name,
+            mount_dir=mount_dir,
+            workdir=f"/{owner_id}",
+            container_config=container_config,
+        ).get_or_create(command="sleep infinite", label="test")
+
+        record_container_activity(container_name)
+        if container.status != "running":
+            start_container(container)
+
+        return container_name
+
+    def run(self) -> None:
+        """Prewarm the containers missing for the session."""
+
+        owners = [
+            owner for owner in self._owners()
+            if owner.docker_container_id != session_container_name(self.session.id, owner.id)
+        ]
+        if not owners:
+            # keep the progress of the last prewarm that created containers
+            return
+
+        self._update_progress(
+            reset=True,
+            status='running',
+            total=len(owners),
+            ready=0,
+            failed=0,
+            started_at=datetime.now(),
+        )
+
+        # loaded before the containers are created from other threads
+        language_image = self.session.language_image
+        try:
+            # make sure the image is available once instead of failing every container
+            get_shared_docker_client().images.get(language_image.docker_image_id)
+        except (ImageNotFound, APIError) as error:
+            logger.error(
+                'src::sandbox::prewarm::SessionContainerPrewarmer::run:: '
+                f'Language image of session {self.session.id} is not available: {error}'
+            )
+            self._update_progress(status='failed', finished_at=datetime.now(), error=str(error))
+            return
+
+        container_config = ResourceManager()._get_container_config(self.session)
+        owners_by_id = {owner.id: owner for owner in owners}
+
+        with ThreadPoolExecutor(
+            max_workers=max(settings.CONTAINER_PREWARM_CONCURRENCY, 1),
+            thread_name_prefix='container-prewarm',
+        ) as executor:
+            futures = {
+                executor.submit(
+                    self._prewarm_container, owner_id, language_image, container_config
+                ): owner_id
+                for owner_id in owners_by_id
+            }
+
+            for future in as_completed(futures):
+                owner_id = futures[future]
+                try:
+                    owners_by_id[owner_id].docker_container_id = future.result()
+                    self._increment_progress('ready')
+                except (ContainerBuilderErrors, APIError, OSError) as error:
+                    logger.warning(
+                        'src::sandbox::prewarm::SessionContainerPrewarmer::run:: '
+                        f'Failed to prewarm container of {owner_id} in session {self.session.id}: {error}'
+                    )
+                    self._increment_progress('failed')
+
+        self.db_session.add_all(owners)
+        self.db_session.commit()
+
+        self._update_progress(status='completed', finished_at=datetime.now())
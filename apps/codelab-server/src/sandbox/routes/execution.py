@@ -1,7 +1,9 @@
 from fastapi import APIRouter, Depends, status
+from fastapi.responses import StreamingResponse
 from typing import Annotated
 from src.models import ExerciseSubmission, Task
 from src.core.schemas import ErrorResponseSchema, APIErrorCodes
+from src.sandbox.events import stream_execution_events
 from src.sandbox.services import (
     cancel_queued_exercise_submission_service,
     cancel_queued_task_service,
@@ -90,6 +92,38 @@ def get_execution_task(
     return task
 
 
+@router.get(
+    '/{session_id}/tasks/{task_id}/events/',
+    response_class=StreamingResponse,
+    responses={
+        status.HTTP_404_NOT_FOUND: {
+            "description": "Task not found",
+            "model": ErrorResponseSchema,
+            "content": {
+                "application/json": {
+                    "example": {
+                        "error_code": APIErrorCodes.NOT_FOUND,
+                        "message": "Task not found."
+                    }
+                }
+            }
+        }
+    }
+)
+def stream_execution_task_events(
+    task: Annotated[Task, Depends(get_task_by_id_service)]
+) -> StreamingResponse:
+    """Stream execution logs and program output of a task as server-sent events."""
+    return StreamingResponse(
+        stream_execution_events(
+            request_id=task.id,
+            status=task.status,
+            execution_logs=list(task.execution_logs),
+        ),
+        media_type='text/event-stream',
+    )
+
+
 @router.delete(
     '/{session_id}/tasks/{task_id}/',
     responses={
@@ -100,7 +134,7 @@ def get_execution_task(
                 "application/json": {
                     "example": {
                         "error_code": APIErrorCodes.TASK_CANCELLATION_FAILED,
-                        "message": "Failed to cancel task. Task already in progress."
+                        "message": "Failed to cancel task. Task already completed."
                     }
                 }
             }
@@ -141,6 +175,38 @@ def get_exercise_submission(
     return submission
 
 
+@router.get(
+    '/{session_id}/submission/{submission_id}/events/',
+    response_class=StreamingResponse,
+    responses={
+        status.HTTP_404_NOT_FOUND: {
+            "description": "Submission not found",
+            "model": ErrorResponseSchema,
+            "content": {
+                "application/json": {
+                    "example": {
+                        "error_code": APIErrorCodes.NOT_FOUND,
+                        "message": "Submission not found."
+                    }
+                }
+            }
+        }
+    }
+)
+def stream_exercise_submission_events(
+    submission: Annotated[ExerciseSubmission, Depends(get_exercise_submission_by_id_service)]
+) -> StreamingResponse:
+    """Stream execution logs and program output of a submission as server-sent events."""
+    return StreamingResponse(
+        stream_execution_events(
+            request_id=submission.id,
+            status=submission.status,
+            execution_logs=list(submission.execution_logs),
+        ),
+        media_type='text/event-stream',
+    )
+
+
 @router.delete(
     '/{session_id}/submission/{submission_id}/',
     responses={
@@ -151,7 +217,7 @@ def get_exercise_submission(
                 "application/json": {
                     "example": {
                         "error_code": APIErrorCodes.TASK_CANCELLATION_FAILED,
-                        "message": "Failed to cancel task. Task already in progress."
+                        "message": "Failed to cancel task. Task already completed."
                     }
                 }
             }
@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Annotated, Any
+from typing import Annotated, Any, Literal
 from uuid import UUID
 
 from pydantic import (
@@ -162,3 +162,32 @@ class ExecutionLogSchema(BaseModel):
     @field_serializer('timestamp')
     def serialize_timestamp(self, timestamp: datetime, _info: Any) -> str:
         return timestamp.strftime("%Y-%m-%dT%H:%M:%S.%f")
+
+
+class ExecutionEventSchema(BaseModel):
+    """An event published while a task or submission is executed."""
+
+    type: Literal['log', 'output', 'status']
+    timestamp: datetime
+    message: str | None = None
+    stream: Literal['stdout', 'stderr'] | None = None
+    data: str | None = None
+    # index of the test case in batched executions
+    case: int | None = None
+    status: str | None = None
+
+    @field_serializer('timestamp')
+    def serialize_timestamp(self, timestamp: datetime, _info: Any) -> str:
+        return timestamp.strftime("%Y-%m-%dT%H:%M:%S.%f")
+
+
+class ContainerPrewarmSchema(BaseModel):
+    """Progress of the creation of the containers of a session before it starts."""
+
+    status: Literal['running', 'completed', 'failed']
+    total: int = 0
+    ready: int = 0
+    failed: int = 0
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+    error: str | None = None
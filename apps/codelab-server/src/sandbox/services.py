@@ -2,7 +2,7 @@ from typing import Annotated
 from uuid import UUID
 
 from fastapi import Body, Depends, Path
-from sqlmodel import Session, col, func, select, update
+from sqlmodel import Session, col, select, update
 
 from src.core.dependecies import (
     require_admin, 
@@ -21,7 +21,10 @@ from src.models import (
     Admin,
 )
 from src.models import Session as WorkflowSession
+from src.sandbox.admission import AdmissionResult, task_admission
+from src.sandbox.cancellation import request_execution_cancellation
 from src.sandbox.constants import IMAGE_BUILD_TASK_CONCURRENCY_KEY
+from src.sandbox.events import ExecutionEventPublisher
 from src.sandbox.schemas import (
     CreateExerciseExecutionSchema,
     CreateLanguageImageSchema,
@@ -34,6 +37,8 @@ from src.core.exceptions import APIException
 from src.core.schemas import APIErrorCodes
 from fastapi import status
 from src.utils import TaskHelper
+from src.worker.locks import concurrency_locks
+from src.worker.queues import TaskQueue
 
 
 async def create_new_langauge_image_service(
@@ -43,10 +48,7 @@ async def create_new_langauge_image_service(
 ) -> LanguageImage:
     """Create a new language image."""
 
-    if TaskHelper.check_concurrent_task(
-        db_session=db_session,
-        concurrency_key=IMAGE_BUILD_TASK_CONCURRENCY_KEY,
-    ):
+    if concurrency_locks.is_locked(IMAGE_BUILD_TASK_CONCURRENCY_KEY):
         raise APIException(
             message='Unable to trigger language build as a build is in progress.',
             error_code=APIErrorCodes.LANGUAGE_IMAGE_BUILD_IN_PROGRESS,
@@ -200,7 +202,6 @@ def cancel_language_image_delation_service(
 
 
 async def retry_language_image_build_service(
-    db_session: Annotated[Session, Depends(require_db_session)],
     admin: Annotated[Admin, Depends(require_admin)],
     language_image: Annotated[LanguageImage, Depends(get_language_image_by_id_service)],
 ) -> LanguageImage:
@@ -217,10 +218,7 @@ async def retry_language_image_build_service(
             status_code=status.HTTP_403_FORBIDDEN,
         )
 
-    if TaskHelper.check_concurrent_task(
-        db_session=db_session,
-        concurrency_key=IMAGE_BUILD_TASK_CONCURRENCY_KEY,
-    ):
+    if concurrency_locks.is_locked(IMAGE_BUILD_TASK_CONCURRENCY_KEY):
         raise APIException(
             message="Unable to trigger language build as a build is in progress",
             error_code=APIErrorCodes.LANGUAGE_IMAGE_BUILD_IN_PROGRESS,
@@ -327,20 +325,6 @@ def get_task_by_id_service(
     return task
 
 
-def get_queued_task_by_id_service(
-    task: Annotated[Task, Depends(get_task_by_id_service)],
-) -> Task:
-    """Get a queued task by its ID."""
-    if task.status != TaskStatus.queued:
-        raise APIException(
-            message='Task is not in queue.',
-            error_code=APIErrorCodes.TASK_NOT_IN_QUEUE,
-            status_code=status.HTTP_404_NOT_FOUND,
-        )
-
-    return task
-
-
 def get_tasks_queue_list_service(
     db_session: Annotated[Session, Depends(require_db_session)],
     session: Annotated[WorkflowSession, Depends(get_active_session_by_id_service)],
@@ -380,30 +364,6 @@ async def create_task_execution_service(
 ) -> Task:
     """Create a new task execution."""
 
-    # check that the queue has space to take the new task
-    if (
-        db_session.exec(
-            select(func.count(col(Task.id)))
-            .join(Exercise, Task.exercise_id == Exercise.id)
-            .join(WorkflowSession, Exercise.session_id == WorkflowSession.id)
-            .where(
-                col(WorkflowSession.id) == session.id,
-                col(Task.status).in_(
-                    [
-                        TaskStatus.queued,
-                        TaskStatus.executing,
-                    ]
-                )
-            )
-        ).first()
-        >= session.configuration.max_queue_size
-    ):
-        raise APIException(
-            message="Queue is full, please try again later",
-            error_code=APIErrorCodes.TASK_QUEUE_FULL,
-            status_code=status.HTTP_400_BAD_REQUEST,
-        )
-
     # get exercise
     exercise = db_session.exec(
         select(Exercise).where(
@@ -419,41 +379,37 @@ async def create_task_execution_service(
             status_code=status.HTTP_404_NOT_FOUND,
         )
 
-    # check if the student has exceeded their task execution threshold for this session
-    # we only count tasks that are in queue or where successfully executed
-    if (
-        (db_session.exec(
-            select(func.count(col(Task.id)))
-            .join(Exercise, Task.exercise_id == Exercise.id)
-            .join(WorkflowSession, Exercise.session_id == WorkflowSession.id)
-            .where(
-                col(Task.student_id) == student.id,
-                col(WorkflowSession.id) == session.id,
-            )
-        ).first() or 0) >= session.configuration.max_number_of_runs
-    ):
+    task = Task(
+        status=TaskStatus.queued,
+        student_id=student.id,
+        exercise_id=exercise.id,
+        entry_file_path=str(task_data.entry_file_path),
+    )
+
+    # check the queue size, the student run threshold and that the student does not
+    # have a task currently executing or pending, and reserve a place for the task
+    admission = task_admission.admit(
+        db_session=db_session,
+        session=session,
+        student_id=student.id,
+        task_id=task.id,
+    )
+
+    if admission == AdmissionResult.queue_full:
+        raise APIException(
+            message="Queue is full, please try again later",
+            error_code=APIErrorCodes.TASK_QUEUE_FULL,
+            status_code=status.HTTP_400_BAD_REQUEST,
+        )
+
+    if admission == AdmissionResult.run_limit_reached:
         raise APIException(
             message="Student has exceeded their task execution threshold for this session",
             error_code=APIErrorCodes.TASK_EXECUTION_THRESHOLD_EXCEEDED,
             status_code=status.HTTP_400_BAD_REQUEST,
         )
 
-    # check that the student does not have a task currently executing or pending
-    if db_session.exec(
-        select(Task)
-        .join(Exercise, Task.exercise_id == Exercise.id)
-        .join(WorkflowSession, Exercise.session_id == WorkflowSession.id)
-        .where(
-            col(Task.student_id) == student.id,
-            col(WorkflowSession.id) == session.id,
-            col(Task.status).in_(
-                [
-                    TaskStatus.executing,
-                    TaskStatus.queued,
-                ]
-            ),
-        )
-    ).first():
+    if admission == AdmissionResult.already_queued:
         raise APIException(
             message="Student already has a task in execution queue",
             error_code=APIErrorCodes.TASK_ALREADY_IN_QUEUE,
@@ -461,16 +417,18 @@ async def create_task_execution_service(
         )
 
     # create the task and set its status to queued
-    task = Task(
-        status=TaskStatus.queued,
-        student_id=student.id,
-        exercise_id=exercise.id,
-        entry_file_path=str(task_data.entry_file_path),
-    )
-    db_session.add(task)
-    db_session.commit()
-
-    schedule = await program_execution_queue.kiq(task_id=task.id)
+    try:
+        db_session.add(task)
+        db_session.commit()
+    except Exception:
+        task_admission.cancel(session.id, student.id, task.id)
+        raise
+
+    # interactive runs go ahead of graded submissions, shared fairly between sessions
+    schedule = await program_execution_queue.kicker().with_labels(
+        queue_name=TaskQueue.interactive,
+        fair_share_key=str(session.id),
+    ).kiq(task_id=task.id)
     if schedule:
         task.worker_task_id = schedule.task_id
         db_session.add(task)
@@ -480,36 +438,53 @@ async def create_task_execution_service(
     return task
 
 
-def cancel_queued_task_service(
-    db_session: Annotated[Session, Depends(require_db_session)],
-    task: Annotated[Task, Depends(get_queued_task_by_id_service)],
-    user: Annotated[Student | Admin, Depends(require_admin_or_student)],
-) -> Task:
-    """Cancel a queued task."""
-
-    if isinstance(user, Student) and task.student_id != user.id:
-        raise APIException(
-            message="Task not found.",
-            error_code=APIErrorCodes.NOT_FOUND,
-            status_code=status.HTTP_404_NOT_FOUND,
-        )
+def _cancel_execution(
+    db_session: Session,
+    request: Task | ExerciseSubmission,
+) -> None:
+    """Cancel a queued task or submission, or stop it if a worker is executing it."""
 
     cancelled = TaskHelper.cancel_task(
         db_session=db_session,
-        task_id=task.worker_task_id,
+        task_id=request.worker_task_id,
     )
 
+    if not cancelled and request.status in (TaskStatus.queued, TaskStatus.executing):
+        # the worker kills the running program and releases its container
+        request_execution_cancellation(request.id)
+        cancelled = True
+
     if not cancelled:
         raise APIException(
-            message="Failed to cancel task. Task already in progress.",
+            message="Failed to cancel task. Task already completed.",
             error_code=APIErrorCodes.TASK_CANCELLATION_FAILED,
             status_code=status.HTTP_400_BAD_REQUEST,
         )
 
-    task.status = TaskStatus.cancelled
-    db_session.add(task)
+    request.status = TaskStatus.cancelled
+    db_session.add(request)
     db_session.commit()
+    ExecutionEventPublisher(request.id).status(TaskStatus.cancelled)
+
+    if isinstance(request, Task):
+        task_admission.release(request.exercise.session_id, request.student_id, request.id)
 
+
+def cancel_queued_task_service(
+    db_session: Annotated[Session, Depends(require_db_session)],
+    task: Annotated[Task, Depends(get_task_by_id_service)],
+    user: Annotated[Student | Admin, Depends(require_admin_or_student)],
+) -> Task:
+    """Cancel a queued or running task."""
+
+    if isinstance(user, Student) and task.student_id != user.id:
+        raise APIException(
+            message="Task not found.",
+            error_code=APIErrorCodes.NOT_FOUND,
+            status_code=status.HTTP_404_NOT_FOUND,
+        )
+
+    _cancel_execution(db_session=db_session, request=task)
     return task
 
 
@@ -604,7 +579,10 @@ async def create_exercise_submission_service(
     db_session.add(submission)
     db_session.commit()
 
-    schedule = await program_execution_queue.kiq(submission_id=submission.id)
+    schedule = await program_execution_queue.kicker().with_labels(
+        queue_name=TaskQueue.submissions,
+        fair_share_key=str(session.id),
+    ).kiq(submission_id=submission.id)
     if schedule:
         submission.worker_task_id = schedule.task_id
         db_session.add(submission)
@@ -656,7 +634,7 @@ def cancel_queued_exercise_submission_service(
     submission: Annotated[ExerciseSubmission, Depends(get_exercise_submission_by_id_service)],
     user: Annotated[Student | Admin, Depends(require_admin_or_student)],
 ) -> ExerciseSubmission:
-    """Cancel a queued exercise submission."""
+    """Cancel a queued or running exercise submission."""
 
     if (
         isinstance(user, Student) 
@@ -696,20 +674,5 @@ def cancel_queued_exercise_submission_service(
                 status_code=status.HTTP_403_FORBIDDEN,
             )
 
-    cancelled = TaskHelper.cancel_task(
-        db_session=db_session,
-        task_id=submission.worker_task_id,
-    )
-
-    if not cancelled:
-        raise APIException(
-            message="Failed to cancel task. Task already in progress.",
-            error_code=APIErrorCodes.TASK_CANCELLATION_FAILED,
-            status_code=status.HTTP_400_BAD_REQUEST,
-        )
-
-    submission.status = TaskStatus.cancelled
-    db_session.add(submission)
-    db_session.commit()
-
+    _cancel_execution(db_session=db_session, request=submission)
     return submission
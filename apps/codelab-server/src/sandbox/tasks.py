@@ -1,22 +1,33 @@
 from uuid import UUID
 from src.log import logger
 from typing import Annotated
-from taskiq import TaskiqDepends
+from taskiq import Context, TaskiqDepends
 from datetime import datetime, timedelta
-from sqlmodel import Session, col, select
-from src.schemas import ImageStatus, TaskStatus
+from sqlalchemy import inspect, update
+from sqlmodel import Session, and_, col, or_, select
+from src.schemas import ImageStatus, SessionStatus, TaskStatus
 from src.sandbox.schemas import ExecutionLogSchema
 from src.sandbox.ochestator.image import ImageBuilder
+from src.sandbox.ochestator.reaper import ContainerReaper
 from src.worker import broker, require_taskiq_db_session
+from src.worker.queues import TaskQueue
 from src.external.utils import pull_exercise_repository
 from src.external.exceptions import PullRepositoryException
 from src.models import ExerciseSubmission, LanguageImage, Task
+from src.models import Session as WorkflowSession
 from src.sandbox.constants import IMAGE_BUILD_TASK_CONCURRENCY_KEY
+from src.sandbox.admission import task_admission
 from src.sandbox.manager import ExecutionFailedError, ResourceManager
+from src.sandbox.cancellation import ExecutionCancellation, ExecutionCancelled
+from src.sandbox.memoization import execution_result_cache
+from src.sandbox.prewarm import SessionContainerPrewarmer
+from src.sandbox.events import ExecutionEventPublisher, FINAL_TASK_STATUSES
+from src.core.config import settings
 
 
 @broker.task(
     task_name='build_language_image_task',
+    queue_name=TaskQueue.builds,
     prevent_concurrency=True,
     concurrency_key=IMAGE_BUILD_TASK_CONCURRENCY_KEY
 )
@@ -112,7 +123,7 @@ async def execute_scheduled_build_actions_task(
 
     for language_image in images:
         if language_image.status == ImageStatus.scheduled_for_rebuild:
-            build_language_image_task.kiq(image_id=language_image.id)
+            await build_language_image_task.kiq(image_id=language_image.id)
             continue
 
         if language_image.status == ImageStatus.scheduled_for_deletion:
@@ -133,27 +144,157 @@ async def execute_scheduled_build_actions_task(
                 continue
 
 
-def _update_execution_log(
-    db_session: Session, 
-    request: Task | ExerciseSubmission,
-    message: str,
+@broker.task(
+    task_name='prewarm_session_containers_task',
+    queue_name=TaskQueue.builds,
+)
+async def prewarm_session_containers_task(
+    db_session: Annotated[Session, TaskiqDepends(require_taskiq_db_session)],
+    session_id: UUID,
+) -> None:
+    """Create the containers of the students and groups of a session."""
+
+    session = db_session.get(WorkflowSession, session_id)
+    if not session:
+        return
+
+    SessionContainerPrewarmer(db_session=db_session, session=session).run()
+
+
+@broker.task(
+    task_name='prewarm_upcoming_sessions_task',
+    schedule=[{"cron": "*/5 * * * *"}],  # Run every 5 minutes
+)
+async def prewarm_upcoming_sessions_task(
+    db_session: Annotated[Session, TaskiqDepends(require_taskiq_db_session)]
+) -> None:
+    """Prewarm the containers of sessions starting soon, students may enroll until the start."""
+
+    if not settings.CONTAINER_PREWARM_ENABLED:
+        return
+
+    now = datetime.now()
+    session_ids = db_session.exec(
+        select(WorkflowSession.id).where(
+            col(WorkflowSession.status).in_([SessionStatus.created, SessionStatus.ongoing]),
+            col(WorkflowSession.start_time) <= now + timedelta(minutes=settings.CONTAINER_PREWARM_LEAD_MINUTES),
+            or_(col(WorkflowSession.end_time).is_(None), col(WorkflowSession.end_time) > now),
+        )
+    ).all()
+
+    for session_id in session_ids:
+        await prewarm_session_containers_task.kiq(session_id=session_id)
+
+
+@broker.task(
+    task_name='reap_idle_containers_task',
+    schedule=[{"cron": "*/10 * * * *"}],  # Run every 10 minutes
+    prevent_concurrency=True,
+)
+async def reap_idle_containers_task(
+    db_session: Annotated[Session, TaskiqDepends(require_taskiq_db_session)]
 ) -> None:
-    """Update task execution log."""
-    execution_logs = list(request.execution_logs)
-    execution_logs.append(
-        ExecutionLogSchema(
-            timestamp=str(datetime.now()), message=message
-        ).model_dump()        
+    """Remove idle executor containers and the workspaces of ended sessions."""
+
+    if not settings.CONTAINER_REAPER_ENABLED:
+        return
+
+    ContainerReaper(db_session=db_session).run()
+
+
+class _ExecutionLogBuffer:
+    """
+    Collect the execution log of a task or submission and write it in batches.
+
+    Entries are published to streaming clients right away but only written to
+    the database on `flush`, so an execution updates its row twice (started and
+    finished) instead of rewriting the JSON log on every step. Pending entries
+    are kept outside the model so lazy loads cannot autoflush them early.
+    Writes never overwrite a cancellation made by the API in the meantime.
+    """
+
+    def __init__(self, db_session: Session, request: Task | ExerciseSubmission) -> None:
+        self.db_session = db_session
+        self.request = request
+        self.publisher = ExecutionEventPublisher(request.id)
+        self._pending: list[dict] = []
+
+    def log(self, message: str) -> None:
+        """Record an execution log entry."""
+        timestamp = datetime.now()
+        self._pending.append(
+            ExecutionLogSchema(
+                timestamp=str(timestamp), message=message
+            ).model_dump()
+        )
+        self.publisher.log(message=message, timestamp=timestamp)
+
+    def flush(self) -> bool:
+        """
+        Write pending entries together with any other change made to the request,
+        returns `False` when the request was cancelled and nothing was written.
+        """
+        self.request.execution_logs = [*self.request.execution_logs, *self._pending]
+        self._pending = []
+
+        model = type(self.request)
+        request_id = self.request.id
+        state = inspect(self.request)
+        changes = {
+            attribute.key: getattr(self.request, attribute.key)
+            for attribute in state.mapper.column_attrs
+            if state.attrs[attribute.key].history.has_changes()
+        }
+        # the changes are written by a single conditional update instead
+        self.db_session.expire(self.request)
+
+        query = update(model).where(col(model.id) == request_id)
+        if changes.get('status') != TaskStatus.cancelled:
+            query = query.where(col(model.status) != TaskStatus.cancelled)
+        written = self.db_session.execute(query.values(**changes)).rowcount > 0
+        self.db_session.commit()
+
+        if not written:
+            logger.info(
+                'src::sandbox::tasks::_ExecutionLogBuffer::flush:: '
+                f'Execution {request_id} was cancelled, its results are discarded.'
+            )
+            return False
+
+        if self.request.status in FINAL_TASK_STATUSES:
+            self.publisher.status(self.request.status)
+
+            if isinstance(self.request, Task):
+                # free the place of the task in the session queue
+                task_admission.release(
+                    self.request.exercise.session_id,
+                    self.request.student_id,
+                    self.request.id,
+                )
+
+        return True
+
+
+def _awaiting_execution(model: type[Task] | type[ExerciseSubmission], worker_task_id: str):
+    """
+    Filter requests waiting to be executed by the worker task `worker_task_id`.
+
+    A message taken by a worker that died is delivered again by the broker,
+    its request was already marked as executing by that worker.
+    """
+    return or_(
+        col(model.status) == TaskStatus.queued,
+        and_(
+            col(model.status) == TaskStatus.executing,
+            col(model.worker_task_id) == worker_task_id,
+        ),
     )
-    request.execution_logs = execution_logs
-    db_session.add(request)
-    db_session.commit()
-    db_session.refresh(request)
 
 
 @broker.task(task_name="program_execution_queue")
 async def program_execution_queue(
     db_session: Annotated[Session, TaskiqDepends(require_taskiq_db_session)],
+    context: Annotated[Context, TaskiqDepends()],
     task_id: UUID | None = None,
     submission_id: UUID | None = None,
 ) -> None:
@@ -162,17 +303,18 @@ async def program_execution_queue(
     assert task_id is not None or submission_id is not None, "task_id or submission_id must be provided"
 
     request: Task | ExerciseSubmission | None = None
+    worker_task_id = context.message.task_id
     
     if task_id:
         request = db_session.exec(
-            select(Task).where(Task.id == task_id, Task.status == TaskStatus.queued)
+            select(Task).where(Task.id == task_id, _awaiting_execution(Task, worker_task_id))
         ).first()
     
     elif submission_id:
         request = db_session.exec(
             select(ExerciseSubmission).where(
                 ExerciseSubmission.id == submission_id, 
-                ExerciseSubmission.status == TaskStatus.queued,
+                _awaiting_execution(ExerciseSubmission, worker_task_id),
             )
         ).first() 
 
@@ -188,30 +330,24 @@ async def program_execution_queue(
         return
 
     # set task status to executing
+    execution_log = _ExecutionLogBuffer(db_session=db_session, request=request)
+    if request.status == TaskStatus.executing:
+        execution_log.log('Execution restarted, the worker executing it stopped.')
     request.status = TaskStatus.executing
-    _update_execution_log(
-        db_session=db_session,
-        request=request,
-        message='Execution started.',
-    )
+    execution_log.log('Execution started.')
+    if not execution_log.flush():
+        # cancelled after it was picked from the queue
+        return
 
     try:
         # pull code repository from codecollab repository
         # set execution log to pulling code repository
-        _update_execution_log(
-            db_session=db_session,
-            request=request,
-            message='Pulling code repository.',
-        )
+        execution_log.log('Pulling code repository.')
         code_repository = pull_exercise_repository(
             request.exercise_id, 
             request.exercise.session_id,
         )
-        _update_execution_log(
-            db_session=db_session,
-            request=request,
-            message='Repository pulled successfully.',
-        )
+        execution_log.log('Repository pulled successfully.')
     except PullRepositoryException as error:
         logger.exception(
             "src::sandbox:tasks::program_execution_queue:: "
@@ -225,40 +361,60 @@ async def program_execution_queue(
         )
 
         request.status = TaskStatus.dropped
-        _update_execution_log(
-            request=request,
-            db_session=db_session,
-            message='Service error. Aborting, failed to pull code repository.',
-        )
+        execution_log.log('Service error. Aborting, failed to pull code repository.')
+        execution_log.flush()
         return
 
-    _update_execution_log(
-        request=request,
-        db_session=db_session,
-        message='Executing program.',
-    )
+    execution_log.log('Executing program.')
+
+    # listen for cancellation requests of the running execution
+    cancellation = ExecutionCancellation(request.id)
+    cancellation.start()
 
     try:
-        manager = ResourceManager()
-        execution_result = manager.execute(
-            request=request,
-            code_repository=code_repository, 
+        manager = ResourceManager(
+            output_callback=execution_log.publisher.output,
+            cancellation=cancellation,
         )
+        execution_result = None
+
+        if settings.EXECUTION_RESULT_CACHE_ENABLED:
+            # reuse the results of an identical previous run
+            test_cases = manager.available_test_cases(request)
+            execution_result = execution_result_cache.get(
+                request=request,
+                code_repository=code_repository,
+                test_cases=test_cases,
+            )
+
+        if execution_result is None:
+            execution_result = await manager.execute_async(
+                request=request,
+                code_repository=code_repository, 
+            )
+
+            if settings.EXECUTION_RESULT_CACHE_ENABLED:
+                execution_result_cache.set(
+                    request=request,
+                    code_repository=code_repository,
+                    test_cases=test_cases,
+                    results=execution_result,
+                )
 
         request.results = [
             result.model_dump()
             for result in execution_result
         ]
         request.status = TaskStatus.executed
-        _update_execution_log(
-            db_session=db_session,
-            request=request,
-            message='Execution completed.',
-        )
+        execution_log.log('Execution completed.')
+        execution_log.flush()
     except ExecutionFailedError as error:
         request.status = TaskStatus.dropped
-        _update_execution_log(
-            request=request,
-            db_session=db_session,
-            message=f'Service error: Aborting, failed to execute program. {error}',
-        )
+        execution_log.log(f'Service error: Aborting, failed to execute program. {error}')
+        execution_log.flush()
+    except ExecutionCancelled:
+        request.status = TaskStatus.cancelled
+        execution_log.log('Execution cancelled.')
+        execution_log.flush()
+    finally:
+        cancellation.stop()
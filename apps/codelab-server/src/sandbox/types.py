@@ -1,3 +1,3 @@
 from typing import Literal
 
-CONTAINER_LABEL = Literal["build", "test", "submission"]
+CONTAINER_LABEL = Literal["build", "test", "submission", "pool"]
@@ -65,7 +65,7 @@ class TaskStatus(StrEnum):
 
 
 class DatabaseExecutionResult(BaseModel):
-    test_case_id: str
+    test_case_id: str | None = Field(default=None)
     std_in: str | None = Field(default=None)
     exit_code: int
     expended_time: PositiveFloat
@@ -87,3 +87,12 @@ class EvaluationFlag(StrEnum):
     execution = "execution"
     compilation = "compilation"
     code_quality = "code_quality"
+
+
+class OutputComparator(StrEnum):
+    """Strategy used to compare the output of a test case with its expected output."""
+    exact = "exact"
+    whitespace = "whitespace"
+    tokens = "tokens"
+    float_tolerance = "float_tolerance"
+    regex = "regex"
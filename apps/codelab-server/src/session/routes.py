@@ -15,6 +15,7 @@ from src.session.services.session_creation import (
     configure_session_enrollment_service,
     confirm_session_creation_service,
     discard_session_service,
+    get_session_prewarm_progress_service,
 )
 from src.session.schemas import (
     SessionCollaborationSchema,
@@ -25,6 +26,7 @@ from src.session.schemas import (
     SessionResourceConfigurationSchema,
 )
 from src.models import Session as WorkflowSession
+from src.sandbox.schemas import ContainerPrewarmSchema
 
 
 router = APIRouter()
@@ -401,6 +403,47 @@ def confirm_session(
     """Confirm the creation of a session."""
     return session
 
+@router.get(
+    "/{session_id}/prewarm",
+    response_model=ContainerPrewarmSchema | None,
+    status_code=status.HTTP_200_OK,
+    summary="Get the progress of the creation of the containers of a session.",
+    responses={
+        status.HTTP_404_NOT_FOUND: {
+            "description": "Session not found",
+            "model": ErrorResponseSchema,
+            "content": {
+                "application/json": {
+                    "example": {
+                        "error_code": APIErrorCodes.NOT_FOUND,
+                        "message": "Session not found."
+                    }
+                }
+            }
+        },
+        status.HTTP_403_FORBIDDEN: {
+            "description": "Not authorized to access this session",
+            "model": ErrorResponseSchema,
+            "content": {
+                "application/json": {
+                    "example": {
+                        "error_code": APIErrorCodes.FORBIDDEN,
+                        "message": "You are not authorized to access this resource."
+                    }
+                }
+            }
+        }
+    }
+)
+def get_session_prewarm_progress(
+    progress: Annotated[
+        ContainerPrewarmSchema | None,
+        Depends(get_session_prewarm_progress_service)
+    ]
+) -> ContainerPrewarmSchema | None:
+    """Get the progress of the creation of the containers of a session, `null` if none were created."""
+    return progress
+
 @router.delete(
     "/{session_id}/configure/discard",
     status_code=status.HTTP_200_OK,
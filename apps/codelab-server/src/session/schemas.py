@@ -10,7 +10,13 @@ from pydantic import (
 from datetime import datetime, timedelta
 from uuid import UUID
 from pydantic import PositiveInt
-from src.schemas import EvaluationFlag, SessionEnrollmentMethod, SessionInitializationStage
+from src.grading.comparators import RegexComparator
+from src.schemas import (
+    EvaluationFlag,
+    OutputComparator,
+    SessionEnrollmentMethod,
+    SessionInitializationStage,
+)
 from src.sandbox.schemas import LanguageImagePublicShcema
 from typing_extensions import Self
 
@@ -166,6 +172,21 @@ class TestCaseCreationSchema(BaseModel):
     test_input: str | None
     expected_output: str
     score_percentage: PositiveFloat = Field(ge=0, le=100, default=100)
+    comparator: OutputComparator = OutputComparator.whitespace
+    float_tolerance: float | None = Field(ge=0, default=None)
+
+    @model_validator(mode="after")
+    def validate_comparator(self) -> Self:
+        """Ensure that the expected output of a regex test case only holds valid patterns."""
+
+        if self.comparator == OutputComparator.regex:
+            # compile the patterns exactly as grading does
+            pattern_errors = RegexComparator(self.expected_output).pattern_errors
+            if pattern_errors:
+                pattern, error = pattern_errors[0]
+                raise ValueError(f"Invalid pattern {pattern!r} in the expected output: {error}")
+
+        return self
 
 
 class ExerciseCreationSchema(BaseModel):
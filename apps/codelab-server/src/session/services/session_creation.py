@@ -37,6 +37,10 @@ from src.session.schemas import (
     SessionInitializationSchema,
     SessionResourceConfigurationSchema,
 )
+from src.sandbox.memoization import execution_result_cache
+from src.sandbox.prewarm import get_prewarm_progress
+from src.sandbox.schemas import ContainerPrewarmSchema
+from src.sandbox.tasks import prewarm_session_containers_task
 from src.utils import atomic_transaction_block
 
 
@@ -229,6 +233,8 @@ def configure_session_content_service(
                     visible=test_case_data.visible,
                     test_input=test_case_data.test_input,
                     expected_output=test_case_data.expected_output,
+                    comparator=test_case_data.comparator,
+                    float_tolerance=test_case_data.float_tolerance,
                     score_percentage=test_case_data.score_percentage,
                 )
                 test_cases_to_create.append(test_case)
@@ -252,6 +258,9 @@ def configure_session_content_service(
         db_session.add(session)
         db_session.commit()
 
+    # test cases changed, results memoized for the session are stale
+    execution_result_cache.invalidate_session(str(session.id))
+
     return SessionCreationSchema(
         stage=session.initialization_stage,
         session_details=SessionCreationDetailSchema.model_validate(session)
@@ -286,6 +295,9 @@ def configure_session_resource_service(
         db_session.add(session)
         db_session.commit()
 
+    # resource limits changed, results memoized for the session are stale
+    execution_result_cache.invalidate_session(str(session.id))
+
     return SessionCreationSchema(
         stage=session.initialization_stage,
         session_details=SessionCreationDetailSchema.model_validate(session)
@@ -405,7 +417,7 @@ def configure_session_enrollment_service(
         )
 
 
-def confirm_session_creation_service(
+async def confirm_session_creation_service(
     db_session: Annotated[Session, Depends(require_db_session)],
     admin: Annotated[Admin, Depends(require_admin)],
     session: Annotated[WorkflowSession, Depends(get_session_in_creation_state_service)],
@@ -425,10 +437,31 @@ def confirm_session_creation_service(
     db_session.add(session)
     db_session.commit()
 
+    if settings.CONTAINER_PREWARM_ENABLED:
+        # create the containers of students already enrolled, the scheduled
+        # prewarm picks up later enrollments before the session starts
+        await prewarm_session_containers_task.kiq(session_id=session.id)
+
     # TODO: Trigger session created lifecycle event, here to notify other VPL services
     return session
 
 
+def get_session_prewarm_progress_service(
+    admin: Annotated[Admin, Depends(require_admin)],
+    session: Annotated[WorkflowSession, Depends(get_session_by_id_service)],
+) -> ContainerPrewarmSchema | None:
+    """Get the progress of the creation of the containers of a session."""
+
+    if session.admin_id != admin.id and not admin.is_super_admin:
+        raise APIException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            message="You are not authorized to access this resource.",
+            error_code=APIErrorCodes.FORBIDDEN,
+        )
+
+    return get_prewarm_progress(session.id)
+
+
 def discard_session_service(
     db_session: Annotated[Session, Depends(require_db_session)],
     admin: Annotated[Admin, Depends(require_admin)],
@@ -437,4 +470,5 @@ def discard_session_service(
     """Discard a session in creation state service."""
     db_session.delete(session)
     db_session.commit()
+    execution_result_cache.invalidate_session(str(session.id))
     return session
@@ -0,0 +1,67 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+import docker.errors  # type: ignore
+
+from src.core import docker as shared_docker
+
+
+class SharedDockerClientTestCase(TestCase):
+    def setUp(self) -> None:
+        self.client = MagicMock()
+        self.replacement = MagicMock()
+
+        for patcher in (
+            patch.object(shared_docker, '_client', self.client),
+            patch.object(shared_docker, '_client_pid', os.getpid()),
+            # the health check of the client is due
+            patch.object(shared_docker, '_last_health_check', float('-inf')),
+            patch.object(shared_docker, '_connect', return_value=self.replacement),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_client_is_checked_once_per_interval(self) -> None:
+        self.assertIs(shared_docker.get_shared_docker_client(), self.client)
+        self.assertIs(shared_docker.get_shared_docker_client(), self.client)
+
+        self.client.ping.assert_called_once()
+
+    def test_unhealthy_client_is_replaced_without_closing_it(self) -> None:
+        self.client.ping.side_effect = docker.errors.APIError("unavailable")
+
+        self.assertIs(shared_docker.get_shared_docker_client(), self.replacement)
+
+        # executions streaming through the previous client are not interrupted
+        self.client.close.assert_not_called()
+        self.assertIs(shared_docker.get_shared_docker_client(), self.replacement)
+
+    def test_health_check_does_not_block_other_threads(self) -> None:
+        checking = threading.Event()
+        answer = threading.Event()
+
+        def ping() -> bool:
+            checking.set()
+            answer.wait(5)
+            return True
+
+        self.client.ping.side_effect = ping
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            checked = executor.submit(shared_docker.get_shared_docker_client)
+            self.assertTrue(checking.wait(5))
+
+            with ThreadPoolExecutor(max_workers=1) as other:
+                self.assertIs(other.submit(shared_docker.get_shared_docker_client).result(timeout=1), self.client)
+
+            answer.set()
+            self.assertIs(checked.result(timeout=5), self.client)
+
+    def test_client_is_created_again_after_a_fork(self) -> None:
+        with patch.object(shared_docker, '_client_pid', -1):
+            self.assertIs(shared_docker.get_shared_docker_client(), self.replacement)
+
+        self.client.ping.assert_not_called()
@@ -0,0 +1,167 @@
+import uuid
+from datetime import datetime
+from unittest import TestCase
+
+from pydantic import ValidationError
+
+from src.grading.comparators import (
+    ComparatorCache,
+    CompiledComparator,
+    ExactComparator,
+    FloatToleranceComparator,
+    RegexComparator,
+    TokenComparator,
+    WhitespaceComparator,
+    compile_comparator,
+    iter_lines,
+)
+from src.models import TestCase as ExerciseTestCase
+from src.schemas import OutputComparator
+from src.session.schemas import TestCaseCreationSchema as CreationSchema
+
+
+class IterLinesTestCase(TestCase):
+    def test_line_endings(self) -> None:
+        self.assertEqual(list(iter_lines("a\r\nb\n\nc")), ["a", "b", "", "c"])
+        self.assertEqual(list(iter_lines("a\n")), ["a"])
+        self.assertEqual(list(iter_lines("")), [])
+
+    def test_only_newlines_split_lines(self) -> None:
+        self.assertEqual(list(iter_lines("a\x0bb\x0cc\x1cd")), ["a\x0bb\x0cc\x1cd"])
+
+
+class ComparatorTestCase(TestCase):
+    def test_comparator_is_abstract(self) -> None:
+        with self.assertRaises(TypeError):
+            CompiledComparator("1")  # type: ignore[abstract]
+
+    def test_missing_output_never_matches(self) -> None:
+        for comparator in OutputComparator:
+            self.assertFalse(compile_comparator(comparator, "").matches(None))
+
+    def test_compile_comparator(self) -> None:
+        self.assertIsInstance(compile_comparator("exact", "1"), ExactComparator)
+        self.assertIsInstance(compile_comparator("whitespace", "1"), WhitespaceComparator)
+        self.assertIsInstance(compile_comparator("tokens", "1"), TokenComparator)
+        self.assertIsInstance(compile_comparator("float_tolerance", "1"), FloatToleranceComparator)
+        self.assertIsInstance(compile_comparator("regex", "1"), RegexComparator)
+        with self.assertRaises(ValueError):
+            compile_comparator("unknown", "1")
+
+    def test_exact(self) -> None:
+        comparator = ExactComparator("1 2\n")
+
+        self.assertTrue(comparator.matches("1 2\n"))
+        self.assertFalse(comparator.matches("1 2"))
+        self.assertFalse(comparator.matches("1  2\n"))
+
+    def test_whitespace(self) -> None:
+        comparator = WhitespaceComparator("1 2\n3\n")
+
+        self.assertTrue(comparator.matches("1 2\n3"))
+        self.assertTrue(comparator.matches("  1\t 2 \r\n3\n\n\n"))
+        self.assertFalse(comparator.matches("1 2"))
+        self.assertFalse(comparator.matches("1 2 3"))
+        self.assertFalse(comparator.matches("1 2\n3\n4"))
+
+    def test_tokens(self) -> None:
+        comparator = TokenComparator("1 2\n3")
+
+        self.assertTrue(comparator.matches("1\n2 3\n"))
+        self.assertFalse(comparator.matches("1 2"))
+        self.assertFalse(comparator.matches("1 2 3 4"))
+        self.assertFalse(comparator.matches("1 3 2"))
+
+    def test_float_tolerance(self) -> None:
+        comparator = FloatToleranceComparator("area 3.14159", tolerance=1e-3)
+
+        self.assertTrue(comparator.matches("area 3.1416"))
+        self.assertTrue(comparator.matches("area\n3.14159e0"))
+        self.assertFalse(comparator.matches("area 3.2"))
+        self.assertFalse(comparator.matches("Area 3.14159"))
+        self.assertFalse(comparator.matches("area pi"))
+
+    def test_float_tolerance_default(self) -> None:
+        comparator = FloatToleranceComparator("0.1")
+
+        self.assertTrue(comparator.matches("0.1000000001"))
+        self.assertFalse(comparator.matches("0.1001"))
+
+    def test_regex(self) -> None:
+        comparator = RegexComparator("total: \\d+\nbye.*\n\n")
+
+        self.assertEqual(comparator.pattern_errors, [])
+        self.assertTrue(comparator.matches("total: 42\nbye now\n"))
+        self.assertTrue(comparator.matches("total: 42   \r\nbye\n\n"))
+        self.assertFalse(comparator.matches("total: 42 apples\nbye"))
+        self.assertFalse(comparator.matches("total: 42"))
+        self.assertFalse(comparator.matches("total: 42\nbye\nextra"))
+
+    def test_regex_invalid_pattern_never_matches(self) -> None:
+        # the trailing space is stripped, leaving an escape at the end of the pattern
+        comparator = RegexComparator("total: \\d+\\ \nbye")
+
+        self.assertEqual([pattern for pattern, _ in comparator.pattern_errors], ["total: \\d+\\"])
+        self.assertFalse(comparator.matches("total: 1 \nbye"))
+        self.assertFalse(comparator.matches("total: \\d+\\\nbye"))
+
+
+class ComparatorCacheTestCase(TestCase):
+    def _test_case(self, expected_output: str, updated_at: datetime | None = None) -> ExerciseTestCase:
+        return ExerciseTestCase(
+            id=uuid.uuid4(),
+            exercise_id=uuid.uuid4(),
+            title="case",
+            expected_output=expected_output,
+            comparator=OutputComparator.whitespace,
+            updated_at=updated_at,
+        )
+
+    def test_comparators_are_reused_until_the_test_case_changes(self) -> None:
+        cache = ComparatorCache()
+        test_case = self._test_case("1")
+
+        comparator = cache.get(test_case)
+        self.assertIs(cache.get(test_case), comparator)
+
+        test_case.expected_output = "2"
+        test_case.updated_at = datetime(2026, 1, 1)
+        self.assertTrue(cache.get(test_case).matches("2"))
+
+    def test_least_recently_used_comparators_are_evicted(self) -> None:
+        cache = ComparatorCache(max_size=2)
+        first, second, third = (self._test_case(str(index)) for index in range(3))
+
+        first_comparator = cache.get(first)
+        cache.get(second)
+        cache.get(first)
+        cache.get(third)
+
+        self.assertIs(cache.get(first), first_comparator)
+        self.assertEqual(len(cache._comparators), 2)
+        self.assertNotIn(ComparatorCache._key(second), cache._comparators)
+
+
+class CreationSchemaTestCase(TestCase):
+    def _schema(self, expected_output: str, comparator: str = "regex") -> CreationSchema:
+        return CreationSchema(
+            title="case",
+            visible=True,
+            test_input=None,
+            expected_output=expected_output,
+            comparator=comparator,
+        )
+
+    def test_valid_patterns(self) -> None:
+        self.assertEqual(self._schema("total: \\d+\n\nbye.*").comparator, OutputComparator.regex)
+
+    def test_invalid_pattern_is_rejected(self) -> None:
+        with self.assertRaises(ValidationError):
+            self._schema("ok\n(unclosed")
+
+    def test_pattern_invalid_once_stripped_is_rejected(self) -> None:
+        with self.assertRaises(ValidationError):
+            self._schema("total: \\d+\\ ")
+
+    def test_patterns_are_only_checked_for_regex_test_cases(self) -> None:
+        self.assertEqual(self._schema("(unclosed", comparator="exact").expected_output, "(unclosed")
@@ -0,0 +1,114 @@
+import uuid
+from unittest.mock import patch
+
+from sqlmodel import select
+
+from src.grading.comparators import comparator_cache
+from src.grading.grader import SubmissionGrader
+from src.models import ExerciseSubmission
+from src.models import TestCase as ExerciseTestCase
+from src.models import TestCaseResult as ExerciseTestCaseResult
+from src.schemas import OutputComparator, TaskStatus
+from src.tests.utils import CustomTestCase
+
+
+class SubmissionGraderTestCase(CustomTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.exercise_id = uuid.uuid4()
+        self.test_cases = [
+            ExerciseTestCase(
+                exercise_id=self.exercise_id,
+                title=f'case {index}',
+                expected_output=expected_output,
+                comparator=OutputComparator.whitespace,
+                score_percentage=50,
+            )
+            for index, expected_output in enumerate(('1', '2'))
+        ]
+        self.session.add_all(self.test_cases)
+        self.session.commit()
+
+    def _submission(self, *outputs: str) -> uuid.UUID:
+        submission = ExerciseSubmission(
+            entry_file_path='main.py',
+            exercise_id=self.exercise_id,
+            student_id=None,
+            group_id=None,
+            status=TaskStatus.executed,
+            results=[
+                {'test_case_id': str(test_case.id), 'state': 'success', 'std_out': output}
+                for test_case, output in zip(self.test_cases, outputs, strict=True)
+            ],
+        )
+        self.session.add(submission)
+        self.session.commit()
+        return submission.id
+
+    def _stored(self, submission_id: uuid.UUID) -> ExerciseSubmission:
+        self.session.expire_all()
+        return self.session.get(ExerciseSubmission, submission_id)
+
+    def test_batch_is_graded(self) -> None:
+        passed = self._submission('1\n', '2\n')
+        half = self._submission('1', 'wrong')
+        failed = self._submission('wrong', 'wrong')
+
+        self.assertEqual(SubmissionGrader(self.session, batch_size=2).run(), 3)
+
+        self.assertEqual(self._stored(passed).total_score, 100)
+        self.assertEqual(self._stored(half).total_score, 50)
+        self.assertEqual(self._stored(failed).total_score, 0)
+        for submission_id in (passed, half, failed):
+            self.assertTrue(self._stored(submission_id).graded)
+        self.assertEqual(len(self.session.exec(select(ExerciseTestCaseResult)).all()), 6)
+
+    def test_failing_submission_does_not_stop_the_batch(self) -> None:
+        broken_test_case = ExerciseTestCase(
+            exercise_id=uuid.uuid4(),
+            title='broken',
+            expected_output='1',
+            score_percentage=100,
+        )
+        self.session.add(broken_test_case)
+        self.session.commit()
+
+        broken = ExerciseSubmission(
+            entry_file_path='main.py',
+            exercise_id=broken_test_case.exercise_id,
+            student_id=None,
+            group_id=None,
+            status=TaskStatus.executed,
+            results=[{'test_case_id': str(broken_test_case.id), 'state': 'success', 'std_out': '1'}],
+        )
+        self.session.add(broken)
+        self.session.commit()
+        broken_id = broken.id
+        graded = self._submission('1', '2')
+
+        get = comparator_cache.get
+
+        def get_comparator(test_case: ExerciseTestCase):
+            if test_case.id == broken_test_case.id:
+                raise ValueError('bad comparator')
+            return get(test_case)
+
+        with patch('src.grading.grader.comparator_cache.get', side_effect=get_comparator):
+            grader = SubmissionGrader(self.session, batch_size=10)
+            self.assertEqual(grader.grade_batch(), 2)
+            # the failed submission is not picked again
+            self.assertEqual(grader.grade_batch(), 0)
+
+        self.assertTrue(self._stored(graded).graded)
+        self.assertEqual(self._stored(graded).total_score, 100)
+
+        broken = self._stored(broken_id)
+        self.assertFalse(broken.graded)
+        self.assertIsNone(broken.total_score)
+        self.assertEqual(broken.grading_error, 'ValueError: bad comparator')
+        self.assertEqual(
+            self.session.exec(
+                select(ExerciseTestCaseResult).where(ExerciseTestCaseResult.submission_id == broken_id)
+            ).all(),
+            [],
+        )
@@ -0,0 +1,107 @@
+import uuid
+from types import SimpleNamespace
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+import fakeredis
+
+from src.sandbox.admission import AdmissionResult, TaskAdmission
+
+
+class TaskAdmissionTestCase(TestCase):
+    def setUp(self) -> None:
+        self.redis_client = fakeredis.FakeRedis(decode_responses=True)
+        with patch('src.sandbox.admission.get_shared_redis_client', return_value=self.redis_client):
+            self.admission = TaskAdmission()
+
+        self.session = SimpleNamespace(
+            id=uuid.uuid4(),
+            configuration=SimpleNamespace(max_queue_size=2, max_number_of_runs=3),
+        )
+        self.student_id = uuid.uuid4()
+
+    def _db_session(self, active_tasks: list | None = None, runs: list | None = None) -> MagicMock:
+        """Database session answering the seed queries with the active tasks and runs."""
+        db_session = MagicMock()
+        db_session.exec.return_value.all.side_effect = [active_tasks or [], runs or []]
+        return db_session
+
+    def _admit(self, student_id: uuid.UUID, task_id: uuid.UUID | None = None, db_session=None):
+        return self.admission.admit(
+            db_session=db_session or self._db_session(),
+            session=self.session,
+            student_id=student_id,
+            task_id=task_id or uuid.uuid4(),
+        )
+
+    def test_first_admission_seeds_the_session(self) -> None:
+        db_session = self._db_session()
+
+        self.assertEqual(self._admit(self.student_id, db_session=db_session), AdmissionResult.admitted)
+        self.assertEqual(db_session.exec.call_count, 2)
+
+        # later admissions are served from the counters
+        self.admission.release(self.session.id, self.student_id, uuid.uuid4())
+        db_session = self._db_session()
+        self._admit(uuid.uuid4(), db_session=db_session)
+        db_session.exec.assert_not_called()
+
+    def test_student_has_one_active_task(self) -> None:
+        task_id = uuid.uuid4()
+        self.assertEqual(self._admit(self.student_id, task_id), AdmissionResult.admitted)
+        self.assertEqual(self._admit(self.student_id), AdmissionResult.already_queued)
+
+        self.admission.release(self.session.id, self.student_id, task_id)
+
+        self.assertEqual(self._admit(self.student_id), AdmissionResult.admitted)
+
+    def test_queue_size_of_the_session(self) -> None:
+        self._admit(uuid.uuid4())
+        self._admit(uuid.uuid4())
+
+        self.assertEqual(self._admit(uuid.uuid4()), AdmissionResult.queue_full)
+
+    def test_number_of_runs_of_a_student(self) -> None:
+        for _ in range(3):
+            task_id = uuid.uuid4()
+            self.assertEqual(self._admit(self.student_id, task_id), AdmissionResult.admitted)
+            self.admission.release(self.session.id, self.student_id, task_id)
+
+        self.assertEqual(self._admit(self.student_id), AdmissionResult.run_limit_reached)
+
+    def test_cancel_gives_the_run_back(self) -> None:
+        for _ in range(2):
+            task_id = uuid.uuid4()
+            self._admit(self.student_id, task_id)
+            self.admission.release(self.session.id, self.student_id, task_id)
+
+        task_id = uuid.uuid4()
+        self._admit(self.student_id, task_id)
+        self.admission.cancel(self.session.id, self.student_id, task_id)
+
+        self.assertEqual(self._admit(self.student_id), AdmissionResult.admitted)
+
+    def test_release_of_an_older_task_keeps_the_active_task(self) -> None:
+        task_id = uuid.uuid4()
+        self._admit(self.student_id, task_id)
+
+        self.admission.release(self.session.id, self.student_id, uuid.uuid4())
+
+        self.assertEqual(self._admit(self.student_id), AdmissionResult.already_queued)
+
+    def test_seed_loads_active_tasks_and_runs(self) -> None:
+        other_student_id = uuid.uuid4()
+        db_session = self._db_session(
+            active_tasks=[(uuid.uuid4(), self.student_id), (uuid.uuid4(), None)],
+            runs=[(self.student_id, 1), (other_student_id, 3)],
+        )
+
+        self.assertEqual(
+            self._admit(self.student_id, db_session=db_session), AdmissionResult.queue_full
+        )
+        self.admission.release(self.session.id, self.student_id, uuid.uuid4())
+        self.assertEqual(self._admit(self.student_id), AdmissionResult.queue_full)
+
+        self.session.configuration.max_queue_size = 10
+        self.assertEqual(self._admit(other_student_id), AdmissionResult.run_limit_reached)
+        self.assertEqual(self._admit(self.student_id), AdmissionResult.already_queued)
@@ -0,0 +1,52 @@
+import threading
+import time
+from unittest import TestCase
+
+from src.sandbox.executor.deadline import Deadline
+from src.utils import TimeOutException
+
+
+class DeadlineTestCase(TestCase):
+    def test_block_finished_in_time(self) -> None:
+        expired = threading.Event()
+
+        with Deadline(1, expired.set) as deadline:
+            self.assertLessEqual(deadline.remaining(), 1)
+
+        time.sleep(1.2)
+        # the timer is cancelled once the block exits
+        self.assertFalse(expired.is_set())
+        self.assertFalse(deadline.expired)
+
+    def test_expiry_calls_on_expire_and_raises(self) -> None:
+        expired = threading.Event()
+
+        with self.assertRaises(TimeOutException):
+            with Deadline(0.1, expired.set) as deadline:
+                # stands for the exec that returns once its program was killed
+                self.assertTrue(expired.wait(5))
+
+        self.assertTrue(deadline.expired)
+        self.assertEqual(deadline.remaining(), 0)
+
+    def test_exception_of_the_block_is_not_replaced(self) -> None:
+        expired = threading.Event()
+
+        with self.assertRaises(ValueError):
+            with Deadline(0.05, expired.set):
+                expired.wait(5)
+                raise ValueError()
+
+    def test_remaining_before_start(self) -> None:
+        self.assertEqual(Deadline(2.5, lambda: None).remaining(), 2.5)
+
+    def test_concurrent_deadlines_are_independent(self) -> None:
+        short_expired = threading.Event()
+        long_expired = threading.Event()
+
+        with self.assertRaises(TimeOutException):
+            with Deadline(5, long_expired.set):
+                with Deadline(0.1, short_expired.set):
+                    short_expired.wait(5)
+
+        self.assertFalse(long_expired.is_set())
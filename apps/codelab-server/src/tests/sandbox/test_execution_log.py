@@ -0,0 +1,83 @@
+import uuid
+from unittest.mock import MagicMock, patch
+
+from sqlmodel import Session
+
+from src.core.db import engine
+from src.models import ExerciseSubmission
+from src.sandbox.tasks import _ExecutionLogBuffer
+from src.schemas import TaskStatus
+from src.tests.utils import CustomTestCase
+
+
+class ExecutionLogBufferTestCase(CustomTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.publisher = MagicMock()
+        patcher = patch('src.sandbox.tasks.ExecutionEventPublisher', return_value=self.publisher)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        submission = ExerciseSubmission(
+            entry_file_path='main.py',
+            exercise_id=uuid.uuid4(),
+            student_id=None,
+            group_id=None,
+            status=TaskStatus.executing,
+        )
+        self.session.add(submission)
+        self.session.commit()
+        self.submission_id = submission.id
+
+    def _cancel_from_api(self) -> None:
+        with Session(engine) as db_session:
+            submission = db_session.get(ExerciseSubmission, self.submission_id)
+            submission.status = TaskStatus.cancelled
+            db_session.add(submission)
+            db_session.commit()
+
+    def _stored_submission(self) -> ExerciseSubmission:
+        with Session(engine) as db_session:
+            return db_session.get(ExerciseSubmission, self.submission_id)
+
+    def test_results_are_written_with_the_logs(self) -> None:
+        submission = self.session.get(ExerciseSubmission, self.submission_id)
+        execution_log = _ExecutionLogBuffer(db_session=self.session, request=submission)
+
+        submission.results = [{'state': 'success'}]
+        submission.status = TaskStatus.executed
+        execution_log.log('Execution completed.')
+
+        self.assertTrue(execution_log.flush())
+        stored = self._stored_submission()
+        self.assertEqual(stored.status, TaskStatus.executed)
+        self.assertEqual(stored.results, [{'state': 'success'}])
+        self.assertEqual(len(stored.execution_logs), 1)
+        self.publisher.status.assert_called_once_with(TaskStatus.executed)
+
+    def test_finished_execution_does_not_overwrite_cancellation(self) -> None:
+        submission = self.session.get(ExerciseSubmission, self.submission_id)
+        execution_log = _ExecutionLogBuffer(db_session=self.session, request=submission)
+
+        self._cancel_from_api()
+        submission.results = [{'state': 'success'}]
+        submission.status = TaskStatus.executed
+        execution_log.log('Execution completed.')
+
+        self.assertFalse(execution_log.flush())
+        stored = self._stored_submission()
+        self.assertEqual(stored.status, TaskStatus.cancelled)
+        self.assertIsNone(stored.results)
+        self.assertEqual(submission.status, TaskStatus.cancelled)
+        self.publisher.status.assert_not_called()
+
+    def test_cancelled_execution_records_its_logs(self) -> None:
+        submission = self.session.get(ExerciseSubmission, self.submission_id)
+        execution_log = _ExecutionLogBuffer(db_session=self.session, request=submission)
+
+        self._cancel_from_api()
+        submission.status = TaskStatus.cancelled
+        execution_log.log('Execution cancelled.')
+
+        self.assertTrue(execution_log.flush())
+        self.assertEqual(len(self._stored_submission().execution_logs), 1)
@@ -0,0 +1,94 @@
+import asyncio
+import uuid
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from sqlmodel import Session
+
+from src.core.db import engine
+from src.models import Exercise, ExerciseSubmission
+from src.sandbox.tasks import program_execution_queue
+from src.schemas import TaskStatus
+from src.tests.utils import CustomTestCase
+
+
+class ProgramExecutionQueueTestCase(CustomTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.manager = MagicMock()
+        self.manager.execute_async = AsyncMock(return_value=[])
+        for target, value in (
+            ('src.sandbox.tasks.ExecutionEventPublisher', MagicMock()),
+            ('src.sandbox.tasks.ExecutionCancellation', MagicMock()),
+            ('src.sandbox.tasks.pull_exercise_repository', MagicMock()),
+            ('src.sandbox.tasks.ResourceManager', MagicMock(return_value=self.manager)),
+        ):
+            patcher = patch(target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        exercise = Exercise(
+            session_id=uuid.uuid4(),
+            question='Print the input.',
+            instructions=None,
+            score_percentage=100,
+        )
+        self.session.add(exercise)
+        self.session.commit()
+        self.exercise_id = exercise.id
+
+    def _submission(self, status: TaskStatus, worker_task_id: str) -> uuid.UUID:
+        submission = ExerciseSubmission(
+            entry_file_path='main.py',
+            exercise_id=self.exercise_id,
+            student_id=None,
+            group_id=None,
+            status=status,
+            worker_task_id=worker_task_id,
+        )
+        self.session.add(submission)
+        self.session.commit()
+        return submission.id
+
+    def _deliver(self, submission_id: uuid.UUID, worker_task_id: str) -> ExerciseSubmission:
+        """Run the task as the worker receiving the message `worker_task_id`."""
+        context = SimpleNamespace(message=SimpleNamespace(task_id=worker_task_id))
+        asyncio.run(
+            program_execution_queue.original_func(
+                db_session=self.session,
+                context=context,
+                submission_id=submission_id,
+            )
+        )
+
+        with Session(engine) as db_session:
+            return db_session.get(ExerciseSubmission, submission_id)
+
+    def test_queued_submission_is_executed(self) -> None:
+        submission_id = self._submission(TaskStatus.queued, 'worker-task')
+
+        submission = self._deliver(submission_id, 'worker-task')
+
+        self.assertEqual(submission.status, TaskStatus.executed)
+        self.manager.execute_async.assert_awaited_once()
+
+    def test_redelivered_submission_is_executed_again(self) -> None:
+        # the worker executing it was killed after marking it as executing
+        submission_id = self._submission(TaskStatus.executing, 'worker-task')
+
+        submission = self._deliver(submission_id, 'worker-task')
+
+        self.assertEqual(submission.status, TaskStatus.executed)
+        self.manager.execute_async.assert_awaited_once()
+        self.assertEqual(
+            submission.execution_logs[0]['message'],
+            'Execution restarted, the worker executing it stopped.',
+        )
+
+    def test_submission_executed_by_another_worker_task_is_skipped(self) -> None:
+        submission_id = self._submission(TaskStatus.executing, 'worker-task')
+
+        submission = self._deliver(submission_id, 'other-worker-task')
+
+        self.assertEqual(submission.status, TaskStatus.executing)
+        self.manager.execute_async.assert_not_awaited()
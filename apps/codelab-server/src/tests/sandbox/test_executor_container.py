@@ -0,0 +1,48 @@
+from unittest import TestCase, mock
+
+from src.sandbox.executor import base
+from src.sandbox.executor.base import BaseExecutor
+
+
+class _Executor(BaseExecutor):
+    def __init__(self, keep_running: bool, status: str) -> None:
+        self._keep_running = keep_running
+        self._status = status
+        super().__init__(workdir="/workdir", mount_dir="/mount", container_config=mock.Mock())
+
+    def _get_container(self):
+        self.keep_running = self._keep_running
+        container = mock.Mock(status=self._status)
+        container.name = "session-1-2" if self._keep_running else "submission-2"
+        return container
+
+
+@mock.patch.object(base, "record_container_activity")
+@mock.patch.object(base, "start_container", return_value=0.1)
+class ExecutorContainerTestCase(TestCase):
+    def test_session_container_is_kept_running(self, start_container, record_activity) -> None:
+        executor = _Executor(keep_running=True, status="running")
+
+        executor._start_container()
+        executor._stop_container()
+
+        start_container.assert_not_called()
+        executor.container.stop.assert_not_called()
+        self.assertEqual(record_activity.call_count, 2)
+        record_activity.assert_called_with("session-1-2")
+
+    def test_stopped_session_container_is_started(self, start_container, record_activity) -> None:
+        executor = _Executor(keep_running=True, status="exited")
+
+        executor._start_container()
+
+        start_container.assert_called_once_with(executor.container)
+
+    def test_other_containers_are_stopped(self, start_container, record_activity) -> None:
+        executor = _Executor(keep_running=False, status="running")
+
+        executor._start_container()
+        executor._stop_container()
+
+        start_container.assert_called_once_with(executor.container)
+        executor.container.stop.assert_called_once_with(timeout=5)
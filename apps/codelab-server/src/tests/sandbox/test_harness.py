@@ -0,0 +1,226 @@
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from unittest import TestCase, skipUnless
+from unittest.mock import patch
+
+from src.core.config import settings
+from src.sandbox.executor.harness import (
+    HARNESS_DIR,
+    HARNESS_SCRIPT,
+    HarnessOutputTail,
+    read_harness_results,
+    write_harness,
+)
+
+HARNESS_AVAILABLE = all(shutil.which(tool) for tool in ("bash", "setsid", "pkill"))
+
+
+class WriteHarnessTestCase(TestCase):
+    def setUp(self) -> None:
+        self.mount_dir = tempfile.mkdtemp()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.mount_dir, ignore_errors=True)
+
+    def _read(self, *path: str) -> str:
+        with open(os.path.join(self.mount_dir, HARNESS_DIR, *path)) as file:
+            return file.read()
+
+    def test_writes_inputs_of_each_case(self) -> None:
+        command = write_harness(self.mount_dir, "python main.py", ["1 2", None, ""], timeout=2)
+
+        self.assertEqual(command, f"bash {HARNESS_DIR}/{HARNESS_SCRIPT}")
+        self.assertEqual(self._read("cases", "0", "stdin"), "1 2\n")
+        self.assertEqual(self._read("cases", "1", "stdin"), "")
+        self.assertEqual(self._read("cases", "2", "stdin"), "")
+
+    def test_replaces_previous_harness(self) -> None:
+        write_harness(self.mount_dir, "true", ["a", "b", "c"], timeout=1)
+        write_harness(self.mount_dir, "true", ["a"], timeout=1)
+
+        self.assertEqual(os.listdir(os.path.join(self.mount_dir, HARNESS_DIR, "cases")), ["0"])
+
+    def test_script_quotes_command_and_bounds_parallelism(self) -> None:
+        write_harness(self.mount_dir, "echo 'it''s'", ["a", "b"], timeout=1.5, parallelism=0)
+        script = self._read(HARNESS_SCRIPT)
+
+        self.assertIn("setsid bash -c 'echo '\"'\"'it'\"'\"''\"'\"'s'\"'\"''", script)
+        self.assertIn("sleep 1.5 ", script)
+        self.assertIn("(( running >= 1 ))", script)
+        self.assertIn("for case in 0 1; do", script)
+
+
+class ReadHarnessResultsTestCase(TestCase):
+    def setUp(self) -> None:
+        self.mount_dir = tempfile.mkdtemp()
+        self.std_ins = ["first", "second"]
+        write_harness(self.mount_dir, "true", self.std_ins, timeout=1)
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.mount_dir, ignore_errors=True)
+
+    def _write(self, case: int, name: str, content: str = "") -> None:
+        with open(os.path.join(self.mount_dir, HARNESS_DIR, "cases", str(case), name), "w") as file:
+            file.write(content)
+
+    def test_unfinished_case_is_timed_out(self) -> None:
+        self._write(0, "status", "0 10.5 11.0\n")
+        self._write(0, "stdout", "ok\n")
+
+        finished, unfinished = read_harness_results(self.mount_dir, self.std_ins, fallback_time=3)
+
+        self.assertEqual(finished.state, "success")
+        self.assertEqual(finished.std_out, "ok\n")
+        self.assertIsNone(finished.std_err)
+        self.assertAlmostEqual(finished.expended_time, 0.5)
+        self.assertEqual(unfinished.state, "timed_out")
+        self.assertEqual(unfinished.expended_time, 3)
+        self.assertTrue(unfinished.failed_execution)
+
+    def test_status_with_decimal_comma(self) -> None:
+        self._write(0, "status", "1 10,25 10,75\n")
+        self._write(1, "status", "0 10,25 10,25\n")
+
+        failed, instant = read_harness_results(self.mount_dir, self.std_ins, fallback_time=3)
+
+        self.assertEqual(failed.state, "failed")
+        self.assertEqual(failed.exit_code, 1)
+        self.assertTrue(failed.failed_execution)
+        self.assertAlmostEqual(failed.expended_time, 0.5)
+        # a case never takes zero time
+        self.assertGreater(instant.expended_time, 0)
+
+    def test_killed_case_is_timed_out(self) -> None:
+        self._write(0, "status", "137 10.0 11.0\n")
+        self._write(0, "timed_out")
+        self._write(1, "status", "0 10.0 10.1\n")
+
+        killed, finished = read_harness_results(self.mount_dir, self.std_ins, fallback_time=3)
+
+        self.assertEqual(killed.state, "timed_out")
+        self.assertEqual(killed.exit_code, -1)
+        self.assertAlmostEqual(killed.expended_time, 1.0)
+        self.assertEqual(finished.state, "success")
+
+
+@skipUnless(HARNESS_AVAILABLE, "the harness needs bash, setsid and pkill")
+class RunHarnessTestCase(TestCase):
+    def setUp(self) -> None:
+        self.mount_dir = tempfile.mkdtemp()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.mount_dir, ignore_errors=True)
+
+    def _run(self, command: str, std_ins: list[str | None], timeout: float, parallelism: int = 1):
+        harness_command = write_harness(
+            self.mount_dir, command, std_ins, timeout=timeout, parallelism=parallelism
+        )
+        started_at = time.monotonic()
+        subprocess.run(harness_command.split(), cwd=self.mount_dir, check=True, timeout=30)
+        elapsed = time.monotonic() - started_at
+
+        return read_harness_results(self.mount_dir, std_ins, fallback_time=timeout), elapsed
+
+    def test_cases_capture_output_and_exit_code(self) -> None:
+        (succeeded, failed), _ = self._run(
+            'read value; echo "out $value"; echo "err $value" >&2; [ "$value" = a ]',
+            ["a", "b"],
+            timeout=5,
+        )
+
+        self.assertEqual(succeeded.state, "success")
+        self.assertEqual(succeeded.std_out, "out a\n")
+        self.assertEqual(succeeded.std_err, "err a\n")
+        self.assertEqual(failed.state, "failed")
+        self.assertEqual(failed.exit_code, 1)
+        self.assertEqual(failed.std_out, "out b\n")
+
+    def test_case_over_time_limit_is_killed(self) -> None:
+        (fast, slow), elapsed = self._run(
+            'read value; [ "$value" = slow ] && sleep 10; echo done',
+            ["fast", "slow"],
+            timeout=0.5,
+        )
+
+        self.assertEqual(fast.state, "success")
+        self.assertEqual(slow.state, "timed_out")
+        self.assertLess(slow.expended_time, 5)
+        self.assertLess(elapsed, 5)
+
+    def test_cases_run_in_parallel(self) -> None:
+        results, elapsed = self._run("sleep 1", [None] * 4, timeout=5, parallelism=4)
+
+        self.assertTrue(all(result.state == "success" for result in results))
+        self.assertLess(elapsed, 3)
+
+    def test_parallelism_limits_running_cases(self) -> None:
+        results, elapsed = self._run("sleep 0.5", [None] * 4, timeout=5, parallelism=2)
+
+        self.assertTrue(all(result.state == "success" for result in results))
+        self.assertGreaterEqual(elapsed, 1)
+
+
+@skipUnless(HARNESS_AVAILABLE, "the harness needs bash, setsid and pkill")
+class HarnessOutputTailTestCase(TestCase):
+    def setUp(self) -> None:
+        self.mount_dir = tempfile.mkdtemp()
+        self.outputs: list[tuple[str, str, int, float]] = []
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.mount_dir, ignore_errors=True)
+
+    def _on_output(self, stream: str, data: str, case: int) -> None:
+        self.outputs.append((stream, data, case, time.monotonic()))
+
+    def _output(self, stream: str, case: int) -> str:
+        return "".join(
+            data for name, data, index, _ in self.outputs if name == stream and index == case
+        )
+
+    def test_output_is_forwarded_while_cases_run(self) -> None:
+        std_ins = ["a", "b"]
+        command = write_harness(
+            self.mount_dir,
+            'read value; echo "first $value"; echo "oops" >&2; sleep 1; echo "second $value"',
+            std_ins,
+            timeout=5,
+            parallelism=2,
+        )
+
+        with HarnessOutputTail(self.mount_dir, len(std_ins), self._on_output, interval=0.05):
+            subprocess.run(command.split(), cwd=self.mount_dir, check=True, timeout=30)
+            finished_at = time.monotonic()
+
+        for case, value in enumerate(std_ins):
+            self.assertEqual(self._output("stdout", case), f"first {value}\nsecond {value}\n")
+            self.assertEqual(self._output("stderr", case), "oops\n")
+
+        # the first lines are forwarded before the cases finish
+        first_output_at = min(received_at for _, _, _, received_at in self.outputs)
+        self.assertLess(first_output_at, finished_at - 0.5)
+
+    def test_split_characters_and_output_limit(self) -> None:
+        write_harness(self.mount_dir, "true", [None], timeout=1)
+        stdout_path = os.path.join(self.mount_dir, HARNESS_DIR, "cases", "0", "stdout")
+        tail = HarnessOutputTail(self.mount_dir, 1, self._on_output)
+
+        encoded = "é".encode()
+        with open(stdout_path, "wb") as file:
+            file.write(b"x" + encoded[:1])
+        tail.poll()
+        with open(stdout_path, "ab") as file:
+            file.write(encoded[1:])
+        tail.poll()
+
+        self.assertEqual([data for _, data, _, _ in self.outputs], ["x", "é"])
+
+        with patch.object(settings, "EXECUTION_OUTPUT_LIMIT_BYTES", 8):
+            with open(stdout_path, "ab") as file:
+                file.write(b"0123456789")
+            tail.poll()
+            tail.poll()
+
+        self.assertEqual(self.outputs[-1][1], "01234")
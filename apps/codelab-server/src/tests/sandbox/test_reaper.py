@@ -0,0 +1,99 @@
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import fakeredis
+
+from src.core.config import settings
+from src.models import Session as WorkflowSession
+from src.sandbox.ochestator.reaper import CONTAINER_ACTIVITY_KEY, ContainerReaper
+from src.schemas import SessionInitializationStage, SessionStatus
+from src.tests.utils import CustomTestCase
+
+
+class FakeDockerClient:
+    """Docker client listing the given containers by label and recording removals."""
+
+    def __init__(self, containers: dict[str, list]) -> None:
+        self.containers = MagicMock()
+        self.containers.list.side_effect = lambda all, sparse, filters: containers.get(filters["label"], [])
+        self.api = MagicMock()
+
+    @property
+    def removed(self) -> list[str]:
+        return [call.args[0] for call in self.api.remove_container.call_args_list]
+
+
+class ContainerReaperTestCase(CustomTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.redis_client = fakeredis.FakeRedis(decode_responses=True)
+        self.testing_dir = tempfile.mkdtemp()
+
+        self.addCleanup(shutil.rmtree, self.testing_dir, ignore_errors=True)
+
+        for patcher in (
+            patch('src.sandbox.ochestator.reaper.get_shared_redis_client', return_value=self.redis_client),
+            patch.object(settings, 'TESTING_DIR', self.testing_dir),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _session(self, end_time: datetime) -> uuid.UUID:
+        session = WorkflowSession(
+            admin_id=uuid.uuid4(),
+            language_image_id=uuid.uuid4(),
+            initialization_stage=SessionInitializationStage.confirmation,
+            title='Session',
+            description='Session',
+            status=SessionStatus.ongoing,
+            end_time=end_time,
+        )
+        self.session.add(session)
+        self.session.commit()
+        return session.id
+
+    def _container(self, session_id: uuid.UUID, minutes_since_active: float) -> SimpleNamespace:
+        name = f'submission-{uuid.uuid4()}'
+        self.redis_client.hset(CONTAINER_ACTIVITY_KEY, name, time.time() - minutes_since_active * 60)
+        return SimpleNamespace(
+            id=name,
+            attrs={
+                'Names': [f'/{name}'],
+                'Mounts': [{'Source': os.path.join(self.testing_dir, str(session_id), 'student')}],
+                'Created': 0,
+            },
+        )
+
+    def _reap(self, *containers: SimpleNamespace) -> list[str]:
+        docker_client = FakeDockerClient({'submission': list(containers)})
+        with patch('src.sandbox.ochestator.reaper.get_shared_docker_client', return_value=docker_client):
+            ContainerReaper(db_session=self.session).reap_containers()
+        return docker_client.removed
+
+    def test_idle_containers_are_removed(self) -> None:
+        session_id = self._session(end_time=datetime.now() + timedelta(hours=1))
+        idle = self._container(session_id, settings.CONTAINER_IDLE_TTL_MINUTES + 1)
+        active = self._container(session_id, 1)
+
+        self.assertEqual(self._reap(idle, active), [idle.id])
+        self.assertIsNone(self.redis_client.hget(CONTAINER_ACTIVITY_KEY, idle.id))
+        self.assertIsNotNone(self.redis_client.hget(CONTAINER_ACTIVITY_KEY, active.id))
+
+    def test_ended_session_containers_are_removed_after_the_grace_period(self) -> None:
+        session_id = self._session(end_time=datetime.now() - timedelta(minutes=1))
+        inactive = self._container(session_id, settings.CONTAINER_REAP_GRACE_MINUTES + 1)
+
+        self.assertEqual(self._reap(inactive), [inactive.id])
+
+    def test_ended_session_container_executing_is_kept(self) -> None:
+        # a submission queued before the end of the session started seconds ago
+        session_id = self._session(end_time=datetime.now() - timedelta(minutes=1))
+        executing = self._container(session_id, 0.1)
+
+        self.assertEqual(self._reap(executing), [])
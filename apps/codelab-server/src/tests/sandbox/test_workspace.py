@@ -0,0 +1,124 @@
+import json
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from src.external.schemas import CodeRepository
+from src.sandbox.executor.harness import HARNESS_DIR
+from src.sandbox.executor.workspace import manifest_path, sync_code_repository
+
+
+def _repository(files: dict[str, str]) -> CodeRepository:
+    """Build a repository tree holding `files` keyed by their relative path."""
+    root = CodeRepository(path=".", sub=[])
+    for path, content in files.items():
+        directory = root
+        *parts, filename = path.split("/")
+        for part in parts:
+            sub = next((repo for repo in directory.sub if repo.path == part), None)
+            if sub is None:
+                sub = CodeRepository(path=part, sub=[])
+                directory.sub.append(sub)
+            directory = sub
+        directory.sub.append(CodeRepository(path=filename, content=content, sub=[]))
+    return root
+
+
+class SyncCodeRepositoryTestCase(TestCase):
+    def setUp(self) -> None:
+        self.base_dir = tempfile.mkdtemp()
+        self.mount_dir = os.path.join(self.base_dir, "workspace")
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.base_dir, ignore_errors=True)
+
+    def _path(self, *path: str) -> str:
+        return os.path.join(self.mount_dir, *path)
+
+    def _read(self, *path: str) -> str:
+        with open(self._path(*path)) as file:
+            return file.read()
+
+    def _files(self) -> set[str]:
+        return {
+            os.path.relpath(os.path.join(root, filename), self.mount_dir)
+            for root, _, filenames in os.walk(self.mount_dir)
+            for filename in filenames
+        }
+
+    def test_writes_repository_files(self) -> None:
+        sync_code_repository(
+            _repository({"main.py": "print(1)", "lib/util.py": "X = 1"}), self.mount_dir
+        )
+
+        self.assertEqual(self._files(), {"main.py", os.path.join("lib", "util.py")})
+        self.assertEqual(self._read("lib", "util.py"), "X = 1")
+
+    def test_manifest_lives_outside_the_mount_directory(self) -> None:
+        sync_code_repository(_repository({"main.py": "print(1)"}), self.mount_dir)
+
+        self.assertFalse(manifest_path(self.mount_dir).startswith(self.mount_dir + os.sep))
+        with open(manifest_path(self.mount_dir)) as file:
+            self.assertEqual(set(json.load(file)), {"main.py"})
+
+    def test_unchanged_files_are_not_written_again(self) -> None:
+        repository = _repository({"main.py": "print(1)", "other.py": "pass"})
+        sync_code_repository(repository, self.mount_dir)
+        os.utime(self._path("main.py"), ns=(1, 1))
+        os.utime(self._path("other.py"), ns=(1, 1))
+        # the manifest records the times the files were written
+        with open(manifest_path(self.mount_dir)) as file:
+            manifest = json.load(file)
+        for entry in manifest.values():
+            entry["mtime_ns"] = 1
+        with open(manifest_path(self.mount_dir), "w") as file:
+            json.dump(manifest, file)
+
+        sync_code_repository(_repository({"main.py": "print(2)", "other.py": "pass"}), self.mount_dir)
+
+        self.assertEqual(self._read("main.py"), "print(2)")
+        self.assertNotEqual(os.stat(self._path("main.py")).st_mtime_ns, 1)
+        self.assertEqual(os.stat(self._path("other.py")).st_mtime_ns, 1)
+
+    def test_files_modified_on_disk_are_restored(self) -> None:
+        repository = _repository({"main.py": "print(1)"})
+        sync_code_repository(repository, self.mount_dir)
+        with open(self._path("main.py"), "w") as file:
+            file.write("print('changed by the program')")
+
+        sync_code_repository(repository, self.mount_dir)
+
+        self.assertEqual(self._read("main.py"), "print(1)")
+
+    def test_stale_files_and_empty_directories_are_removed(self) -> None:
+        sync_code_repository(
+            _repository({"main.py": "print(1)", "old/module.py": "pass"}), self.mount_dir
+        )
+        with open(self._path("output.txt"), "w") as file:
+            file.write("left by a previous run")
+
+        sync_code_repository(_repository({"main.py": "print(1)"}), self.mount_dir)
+
+        self.assertEqual(self._files(), {"main.py"})
+        self.assertFalse(os.path.exists(self._path("old")))
+
+    def test_harness_directory_is_kept(self) -> None:
+        os.makedirs(self._path(HARNESS_DIR, "cases", "0"))
+        with open(self._path(HARNESS_DIR, "cases", "0", "stdin"), "w") as file:
+            file.write("input")
+
+        sync_code_repository(_repository({"main.py": "print(1)"}), self.mount_dir)
+
+        self.assertEqual(
+            self._files(), {"main.py", os.path.join(HARNESS_DIR, "cases", "0", "stdin")}
+        )
+
+    def test_corrupt_manifest_writes_every_file(self) -> None:
+        os.makedirs(self.mount_dir)
+        with open(manifest_path(self.mount_dir), "w") as file:
+            file.write("not json")
+
+        sync_code_repository(_repository({"main.py": "print(1)"}), self.mount_dir)
+
+        self.assertEqual(self._read("main.py"), "print(1)")
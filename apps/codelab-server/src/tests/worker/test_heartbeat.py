@@ -0,0 +1,68 @@
+import os
+import time
+from unittest import TestCase
+from unittest.mock import patch
+
+import fakeredis
+
+from src.core.config import settings
+from src.worker.heartbeat import (
+    STALE_HEARTBEAT_TIMEOUTS,
+    WORKER_HEARTBEATS_KEY,
+    WORKER_HEARTBEATS_SEEN_KEY,
+    WorkerHeartbeat,
+    WorkerRegistry,
+)
+
+
+class WorkerHeartbeatTestCase(TestCase):
+    def setUp(self) -> None:
+        self.redis_client = fakeredis.FakeRedis()
+        patcher = patch('src.worker.heartbeat.get_shared_redis_client', return_value=self.redis_client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.heartbeat = WorkerHeartbeat(interval=60)
+        self.registry = WorkerRegistry()
+
+    def test_publish_records_in_flight_tasks(self) -> None:
+        self.heartbeat.task_started("first")
+        self.heartbeat.task_started("second")
+        self.heartbeat.task_finished("first")
+
+        self.heartbeat.publish()
+
+        [heartbeat] = self.registry.heartbeats()
+        self.assertEqual(heartbeat.consumer_id, self.heartbeat.consumer_id)
+        self.assertEqual(heartbeat.in_flight_tasks, ["second"])
+        self.assertTrue(heartbeat.alive)
+        self.assertIsNotNone(self.redis_client.zscore(WORKER_HEARTBEATS_SEEN_KEY, self.heartbeat.consumer_id))
+
+    def test_publish_drops_heartbeats_of_gone_consumers(self) -> None:
+        gone = time.time() - settings.WORKER_HEARTBEAT_TIMEOUT * (STALE_HEARTBEAT_TIMEOUTS + 1)
+        self.redis_client.hset(WORKER_HEARTBEATS_KEY, "gone:1", "{}")
+        self.redis_client.zadd(WORKER_HEARTBEATS_SEEN_KEY, {"gone:1": gone})
+
+        self.heartbeat.publish()
+
+        self.assertFalse(self.redis_client.hexists(WORKER_HEARTBEATS_KEY, "gone:1"))
+        self.assertIsNone(self.redis_client.zscore(WORKER_HEARTBEATS_SEEN_KEY, "gone:1"))
+
+    def test_stop_removes_the_heartbeat(self) -> None:
+        self.heartbeat.start()
+        self.heartbeat.stop()
+
+        self.assertEqual(self.redis_client.hlen(WORKER_HEARTBEATS_KEY), 0)
+        self.assertEqual(self.redis_client.zcard(WORKER_HEARTBEATS_SEEN_KEY), 0)
+
+    def test_busy_pids_only_counts_live_workers_with_tasks(self) -> None:
+        self.heartbeat.task_started("task")
+        self.heartbeat.publish()
+
+        self.assertEqual(self.registry.busy_pids(), {os.getppid()})
+
+        # a heartbeat older than the timeout belongs to a dead worker
+        later = time.time() + settings.WORKER_HEARTBEAT_TIMEOUT + 1
+        registry = WorkerRegistry()
+        with patch('src.worker.heartbeat.time.time', return_value=later):
+            self.assertEqual(registry.busy_pids(), set())
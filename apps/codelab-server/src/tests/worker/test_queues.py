@@ -0,0 +1,120 @@
+import asyncio
+import time
+import uuid
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import MagicMock, patch
+
+import fakeredis
+from taskiq.message import BrokerMessage
+
+from src.worker.heartbeat import WORKER_HEARTBEATS_SEEN_KEY
+from src.worker.queues import PriorityRedisBroker, TaskQueue, queue_key
+
+
+class PriorityRedisBrokerTestCase(IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.server = fakeredis.FakeServer()
+        self.redis_client = fakeredis.FakeAsyncRedis(server=self.server)
+
+        patcher = patch(
+            'src.worker.queues.Redis',
+            side_effect=lambda connection_pool: fakeredis.FakeAsyncRedis(server=self.server),
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @staticmethod
+    def _broker(heartbeat_timeout: float = 30) -> PriorityRedisBroker:
+        return PriorityRedisBroker(
+            url="redis://localhost:6379",
+            poll_timeout=1,
+            heartbeat_timeout=heartbeat_timeout,
+        )
+
+    @staticmethod
+    def _message(queue: TaskQueue, fair_share_key: str = "session") -> BrokerMessage:
+        task_id = uuid.uuid4().hex
+        return BrokerMessage(
+            task_id=task_id,
+            task_name="program_execution_queue",
+            message=task_id.encode(),
+            labels={"queue_name": str(queue), "fair_share_key": fair_share_key},
+        )
+
+    async def _consume(self, broker: PriorityRedisBroker, consumer_id: str, count: int = 1):
+        """Take `count` messages as the consumer `consumer_id`."""
+        heartbeat = MagicMock(consumer_id=consumer_id)
+        with patch('src.worker.queues.worker_heartbeat', heartbeat):
+            messages = broker.listen()
+            try:
+                return [
+                    await asyncio.wait_for(messages.__anext__(), timeout=5)
+                    for _ in range(count)
+                ]
+            finally:
+                await messages.aclose()
+
+    async def _heartbeat(self, consumer_id: str, seen: float) -> None:
+        await self.redis_client.zadd(WORKER_HEARTBEATS_SEEN_KEY, {consumer_id: seen})
+
+    async def test_higher_priority_queue_is_taken_first(self) -> None:
+        broker = self._broker()
+        maintenance = self._message(TaskQueue.maintenance)
+        interactive = self._message(TaskQueue.interactive)
+        await broker.kick(maintenance)
+        await broker.kick(interactive)
+
+        first, second = await self._consume(broker, "consumer", count=2)
+
+        self.assertEqual(first.data, interactive.message)
+        self.assertEqual(second.data, maintenance.message)
+
+    async def test_fair_share_between_keys(self) -> None:
+        broker = self._broker()
+        bulk = [self._message(TaskQueue.submissions, "bulk") for _ in range(3)]
+        other = self._message(TaskQueue.submissions, "other")
+        for message in [*bulk, other]:
+            await broker.kick(message)
+
+        taken = await self._consume(broker, "consumer", count=2)
+
+        # the other session is not queued behind every message of the bulk session
+        self.assertEqual([message.data for message in taken], [bulk[0].message, other.message])
+
+    async def test_acknowledged_message_is_not_delivered_again(self) -> None:
+        broker = self._broker(heartbeat_timeout=0.1)
+        await broker.kick(self._message(TaskQueue.interactive))
+
+        [message] = await self._consume(broker, "dead")
+        await message.ack()
+        await asyncio.sleep(0.2)
+
+        await self._broker(heartbeat_timeout=0.1)._reclaim(self.redis_client)
+        self.assertEqual(await self.redis_client.zcard(queue_key(TaskQueue.interactive, "pending")), 0)
+        self.assertEqual(await self.redis_client.zcard(queue_key(TaskQueue.interactive, "processing")), 0)
+
+    async def test_message_of_killed_consumer_is_delivered_again(self) -> None:
+        message = self._message(TaskQueue.interactive)
+        await self._broker().kick(message)
+
+        [taken] = await self._consume(self._broker(), "killed")
+        # the consumer stops sending heartbeats while processing the message
+        await self._heartbeat("killed", time.time() - 60)
+        await self._heartbeat("alive", time.time())
+        await asyncio.sleep(0.2)
+
+        [redelivered] = await self._consume(self._broker(heartbeat_timeout=0.1), "alive")
+
+        self.assertEqual(redelivered.data, taken.data)
+        self.assertEqual(redelivered.data, message.message)
+
+    async def test_message_of_live_consumer_is_not_delivered_again(self) -> None:
+        await self._broker().kick(self._message(TaskQueue.interactive))
+
+        await self._consume(self._broker(), "alive")
+        await asyncio.sleep(0.2)
+        await self._heartbeat("alive", time.time())
+
+        await self._broker(heartbeat_timeout=0.1)._reclaim(self.redis_client)
+        self.assertEqual(await self.redis_client.zcard(queue_key(TaskQueue.interactive, "pending")), 0)
+        self.assertEqual(await self.redis_client.zcard(queue_key(TaskQueue.interactive, "processing")), 1)
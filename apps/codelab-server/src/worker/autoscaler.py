@@ -0,0 +1,179 @@
+import os
+import time
+from enum import StrEnum
+
+import psutil
+from sqlmodel import Session, col, select
+
+from src.core.config import settings
+from src.core.metrics import TASK_QUEUE_WAIT, summarize_metric
+from src.core.redis import get_shared_redis_client
+from src.log import logger
+from src.models import Worker
+from src.schemas import WorkerStatus
+
+from .heartbeat import worker_registry
+from .manager import WorkerManager
+from .queues import queue_depths
+
+AUTOSCALED_WORKER_PREFIX = "autoscaled-worker-"
+AUTOSCALER_COOLDOWN_KEY = "vpl:autoscaler:cooldown"
+# only the most recent wait times reflect the current load
+WAIT_TIME_SAMPLE_SIZE = 50
+
+
+class ScalingDecision(StrEnum):
+    scale_up = "scale_up"
+    scale_down = "scale_down"
+    hold = "hold"
+
+
+class WorkerAutoscaler:
+    """
+    Add and stop workers so the worker capacity follows the queue backlog.
+
+    A worker is added while tasks queue up faster than the online workers take
+    them, as long as the host has CPU and memory headroom, and an idle worker
+    added by the autoscaler is stopped once the queues are empty. Workers are
+    kept within `AUTOSCALER_MIN_WORKERS` and `AUTOSCALER_MAX_WORKERS` and at
+    most one scaling action is taken per cooldown period.
+    """
+
+    def __init__(self, db_session: Session) -> None:
+        self.db_session = db_session
+        self.manager = WorkerManager(db_session=db_session)
+        self.redis_client = get_shared_redis_client()
+
+    def _has_headroom(self) -> bool:
+        """Whether the host can take another worker."""
+        cpu_load = psutil.getloadavg()[0] / (psutil.cpu_count() or 1) * 100
+        memory_usage = psutil.virtual_memory().percent
+
+        return (
+            cpu_load < settings.AUTOSCALER_MAX_CPU_PERCENT
+            and memory_usage < settings.AUTOSCALER_MAX_MEMORY_PERCENT
+        )
+
+    def decide(self, online_workers: int, queue_depth: int, wait_p95: float | None) -> ScalingDecision:
+        """Scaling decision for the given load, ignoring the cooldown and host headroom."""
+
+        backlogged = (
+            queue_depth > settings.AUTOSCALER_SCALE_UP_QUEUE_DEPTH * max(online_workers, 1)
+            # wait times are only current while tasks are queued
+            or (
+                queue_depth > 0
+                and wait_p95 is not None
+                and wait_p95 > settings.AUTOSCALER_SCALE_UP_WAIT_SECONDS
+            )
+        )
+
+        if backlogged and online_workers < settings.AUTOSCALER_MAX_WORKERS:
+            return ScalingDecision.scale_up
+
+        if queue_depth == 0 and online_workers > settings.AUTOSCALER_MIN_WORKERS:
+            return ScalingDecision.scale_down
+
+        return ScalingDecision.hold
+
+    def _autoscaled_workers(self) -> list[Worker]:
+        return list(
+            self.db_session.exec(
+                select(Worker)
+                .where(col(Worker.name).startswith(AUTOSCALED_WORKER_PREFIX))
+                .order_by(col(Worker.created_at))
+            ).all()
+        )
+
+    def _scale_up(self) -> Worker:
+        """Start an offline autoscaled worker or add a new one."""
+
+        autoscaled_workers = self._autoscaled_workers()
+        for worker in autoscaled_workers:
+            if worker.status != WorkerStatus.online:
+                worker.no_of_threads = settings.AUTOSCALER_WORKER_THREADS
+                self.manager.start_worker(worker=worker)
+                return worker
+
+        names = {worker.name for worker in autoscaled_workers}
+        index = 1
+        while f"{AUTOSCALED_WORKER_PREFIX}{index}" in names:
+            index += 1
+
+        worker = Worker(
+            name=f"{AUTOSCALED_WORKER_PREFIX}{index}",
+            no_of_threads=settings.AUTOSCALER_WORKER_THREADS,
+            status=WorkerStatus.online,
+        )
+        self.manager.add_worker(worker=worker)
+        return worker
+
+    def _idle_autoscaled_worker(self) -> Worker | None:
+        """Most recently added online autoscaled worker without running tasks."""
+
+        busy_pids = worker_registry.busy_pids()
+
+        for worker in reversed(self._autoscaled_workers()):
+            # never stop the worker running the autoscaler
+            if worker.status != WorkerStatus.online or worker.pid == os.getppid():
+                continue
+
+            if worker.pid not in busy_pids:
+                return worker
+
+        return None
+
+    def _start_cooldown(self) -> bool:
+        """Claim the next scaling action, `False` while a previous action is cooling down."""
+        return bool(
+            self.redis_client.set(
+                AUTOSCALER_COOLDOWN_KEY,
+                time.time(),
+                nx=True,
+                ex=max(int(settings.AUTOSCALER_COOLDOWN_SECONDS), 1),
+            )
+        )
+
+    def run(self) -> ScalingDecision:
+        """Evaluate the load and add or stop at most one worker."""
+
+        online_workers = len(
+            self.db_session.exec(
+                select(Worker.id).where(Worker.status == WorkerStatus.online)
+            ).all()
+        )
+        queue_depth = sum(queue_depths().values())
+        wait_p95 = summarize_metric(TASK_QUEUE_WAIT, sample_size=WAIT_TIME_SAMPLE_SIZE).p95
+
+        decision = self.decide(
+            online_workers=online_workers,
+            queue_depth=queue_depth,
+            wait_p95=wait_p95,
+        )
+
+        if decision == ScalingDecision.scale_up and not self._has_headroom():
+            logger.info(
+                'src::worker::autoscaler::WorkerAutoscaler::run:: '
+                f'Not adding a worker for {queue_depth} queued tasks, the host has no headroom.'
+            )
+            return ScalingDecision.hold
+
+        worker = None
+        if decision == ScalingDecision.scale_down:
+            worker = self._idle_autoscaled_worker()
+            if worker is None:
+                return ScalingDecision.hold
+
+        if decision == ScalingDecision.hold or not self._start_cooldown():
+            return ScalingDecision.hold
+
+        if decision == ScalingDecision.scale_up:
+            worker = self._scale_up()
+        else:
+            self.manager.stop_worker(worker=worker)
+
+        logger.info(
+            'src::worker::autoscaler::WorkerAutoscaler::run:: '
+            f'{decision} {worker.name}: {online_workers} online workers, '
+            f'{queue_depth} queued tasks, p95 queue wait {wait_p95}s'
+        )
+        return decision
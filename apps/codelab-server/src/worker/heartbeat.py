@@ -0,0 +1,170 @@
+import os
+import socket
+import threading
+import time
+from datetime import datetime
+
+from redis.exceptions import RedisError
+
+from src.core.config import settings
+from src.core.redis import get_shared_redis_client
+from src.log import logger
+from src.worker.schemas import WorkerHeartbeatSchema
+
+WORKER_HEARTBEATS_KEY = "vpl:worker-heartbeats"
+# consumer id -> time of the last heartbeat, used to find dead consumers
+WORKER_HEARTBEATS_SEEN_KEY = "vpl:worker-heartbeats:seen"
+# heartbeats of consumers gone for this many timeouts are dropped
+STALE_HEARTBEAT_TIMEOUTS = 10
+
+# store a heartbeat and drop the heartbeats of long gone consumers
+_PUBLISH_SCRIPT = """
+redis.call('HSET', KEYS[1], ARGV[1], ARGV[2])
+redis.call('ZADD', KEYS[2], ARGV[3], ARGV[1])
+local stale = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', ARGV[4])
+for _, consumer_id in ipairs(stale) do
+    redis.call('HDEL', KEYS[1], consumer_id)
+    redis.call('ZREM', KEYS[2], consumer_id)
+end
+return #stale
+"""
+
+
+class WorkerHeartbeat:
+    """
+    Heartbeat of the worker process consuming tasks.
+
+    Every `WORKER_HEARTBEAT_INTERVAL` seconds the process publishes its pid,
+    the tasks it is executing and its load to Redis. The broker requeues the
+    tasks of consumers that stop sending heartbeats.
+    """
+
+    def __init__(self, interval: float | None = None) -> None:
+        self.interval = interval if interval is not None else settings.WORKER_HEARTBEAT_INTERVAL
+        self.redis_client = get_shared_redis_client()
+        self._publish_script = self.redis_client.register_script(_PUBLISH_SCRIPT)
+        self._in_flight: set[str] = set()
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._stopped = threading.Event()
+
+    @property
+    def consumer_id(self) -> str:
+        # computed on access as worker processes are forked
+        return f"{socket.gethostname()}:{os.getpid()}"
+
+    def task_started(self, task_id: str) -> None:
+        with self._lock:
+            self._in_flight.add(task_id)
+
+    def task_finished(self, task_id: str) -> None:
+        with self._lock:
+            self._in_flight.discard(task_id)
+
+    def heartbeat(self) -> WorkerHeartbeatSchema:
+        with self._lock:
+            in_flight_tasks = sorted(self._in_flight)
+
+        return WorkerHeartbeatSchema(
+            consumer_id=self.consumer_id,
+            pid=os.getpid(),
+            ppid=os.getppid(),
+            in_flight_tasks=in_flight_tasks,
+            load_average=os.getloadavg()[0],
+            timestamp=datetime.now(),
+        )
+
+    def publish(self) -> None:
+        heartbeat = self.heartbeat()
+        now = time.time()
+        self._publish_script(
+            keys=[WORKER_HEARTBEATS_KEY, WORKER_HEARTBEATS_SEEN_KEY],
+            args=[
+                heartbeat.consumer_id,
+                heartbeat.model_dump_json(),
+                now,
+                now - settings.WORKER_HEARTBEAT_TIMEOUT * STALE_HEARTBEAT_TIMEOUTS,
+            ],
+        )
+
+    def start(self) -> None:
+        """Publish a first heartbeat and keep publishing from a background thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        self.publish()
+        self._stopped.clear()
+        self._thread = threading.Thread(
+            target=self._run,
+            name='worker-heartbeat',
+            daemon=True,
+        )
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            try:
+                self.publish()
+            except RedisError as error:
+                logger.warning(
+                    'src::worker::heartbeat::WorkerHeartbeat::_run:: '
+                    f'Failed to publish worker heartbeat: {error}'
+                )
+
+    def stop(self) -> None:
+        """Stop publishing and remove the heartbeat of this process."""
+        self._stopped.set()
+        if self._thread is None:
+            return
+
+        self._thread = None
+        try:
+            with self.redis_client.pipeline() as pipeline:
+                pipeline.hdel(WORKER_HEARTBEATS_KEY, self.consumer_id)
+                pipeline.zrem(WORKER_HEARTBEATS_SEEN_KEY, self.consumer_id)
+                pipeline.execute()
+        except RedisError as error:
+            logger.warning(
+                'src::worker::heartbeat::WorkerHeartbeat::stop:: '
+                f'Failed to remove worker heartbeat: {error}'
+            )
+
+
+class WorkerRegistry:
+    """In memory view of the worker heartbeats, refreshed from Redis at most once per interval."""
+
+    def __init__(self) -> None:
+        self.redis_client = get_shared_redis_client()
+        self._heartbeats: list[WorkerHeartbeatSchema] = []
+        self._refreshed_at = 0.0
+        self._lock = threading.Lock()
+
+    def _refresh(self) -> None:
+        cutoff = time.time() - settings.WORKER_HEARTBEAT_TIMEOUT
+        heartbeats = []
+
+        for value in self.redis_client.hvals(WORKER_HEARTBEATS_KEY):
+            heartbeat = WorkerHeartbeatSchema.model_validate_json(value)
+            heartbeat.alive = heartbeat.timestamp.timestamp() >= cutoff
+            heartbeats.append(heartbeat)
+
+        self._heartbeats = sorted(heartbeats, key=lambda heartbeat: heartbeat.consumer_id)
+        self._refreshed_at = time.monotonic()
+
+    def heartbeats(self) -> list[WorkerHeartbeatSchema]:
+        with self._lock:
+            if time.monotonic() - self._refreshed_at >= settings.WORKER_HEARTBEAT_INTERVAL:
+                self._refresh()
+            return list(self._heartbeats)
+
+    def busy_pids(self) -> set[int]:
+        """Pids of the worker processes (as managed by supervisord) executing tasks."""
+        return {
+            heartbeat.ppid
+            for heartbeat in self.heartbeats()
+            if heartbeat.alive and heartbeat.in_flight_tasks
+        }
+
+
+worker_heartbeat = WorkerHeartbeat()
+worker_registry = WorkerRegistry()
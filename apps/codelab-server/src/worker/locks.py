@@ -0,0 +1,142 @@
+import threading
+
+from redis.exceptions import RedisError
+
+from src.core.config import settings
+from src.core.redis import get_shared_redis_client
+from src.log import logger
+
+CONCURRENCY_LOCK_PREFIX = "vpl:concurrency-lock"
+
+# take the lock and hand out the next fencing token of the key
+_ACQUIRE_SCRIPT = """
+if redis.call('SET', KEYS[1], ARGV[1], 'NX', 'PX', ARGV[2]) then
+    return redis.call('INCR', KEYS[2])
+end
+return false
+"""
+
+# the lock holder and the token are compared before extending or releasing
+_REFRESH_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] and redis.call('GET', KEYS[2]) == ARGV[2] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[3])
+end
+return 0
+"""
+
+_RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] and redis.call('GET', KEYS[2]) == ARGV[2] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class ConcurrencyLockManager:
+    """
+    Redis locks enforcing that one task per concurrency key runs at a time.
+
+    A lock is taken with SET NX when a task is sent and holds the task id, every
+    acquisition increments a fencing token so a task whose lock expired (e.g its
+    worker died) can be told apart from the current holder. Locks of running
+    tasks are extended in the background and expire on their own otherwise.
+    """
+
+    def __init__(self, ttl_seconds: float | None = None) -> None:
+        self.ttl_seconds = (
+            ttl_seconds if ttl_seconds is not None else settings.CONCURRENCY_LOCK_TTL
+        )
+        self.redis_client = get_shared_redis_client()
+        self._acquire_script = self.redis_client.register_script(_ACQUIRE_SCRIPT)
+        self._refresh_script = self.redis_client.register_script(_REFRESH_SCRIPT)
+        self._release_script = self.redis_client.register_script(_RELEASE_SCRIPT)
+        self._held: dict[str, tuple[str, int]] = {}
+        self._lock = threading.Lock()
+        self._refresher: threading.Thread | None = None
+
+    @staticmethod
+    def _lock_key(concurrency_key: str) -> str:
+        return f"{CONCURRENCY_LOCK_PREFIX}:{concurrency_key}"
+
+    @staticmethod
+    def _token_key(concurrency_key: str) -> str:
+        return f"{CONCURRENCY_LOCK_PREFIX}:{concurrency_key}:token"
+
+    @property
+    def _ttl_milliseconds(self) -> int:
+        return int(self.ttl_seconds * 1000)
+
+    def acquire(self, concurrency_key: str, task_id: str) -> int | None:
+        """Take the lock for a task, returns the fencing token or `None` when it is held."""
+        token = self._acquire_script(
+            keys=[self._lock_key(concurrency_key), self._token_key(concurrency_key)],
+            args=[task_id, self._ttl_milliseconds],
+        )
+        return int(token) if token else None
+
+    def holder(self, concurrency_key: str) -> str | None:
+        """Id of the task holding the lock."""
+        return self.redis_client.get(self._lock_key(concurrency_key))
+
+    def is_locked(self, concurrency_key: str) -> bool:
+        return self.holder(concurrency_key) is not None
+
+    def refresh(self, concurrency_key: str, task_id: str, token: int) -> bool:
+        """Extend the lock, `False` when the task no longer holds it."""
+        return bool(
+            self._refresh_script(
+                keys=[self._lock_key(concurrency_key), self._token_key(concurrency_key)],
+                args=[task_id, token, self._ttl_milliseconds],
+            )
+        )
+
+    def release(self, concurrency_key: str, task_id: str, token: int) -> None:
+        """Release the lock if the task still holds it."""
+        with self._lock:
+            self._held.pop(concurrency_key, None)
+
+        self._release_script(
+            keys=[self._lock_key(concurrency_key), self._token_key(concurrency_key)],
+            args=[task_id, token],
+        )
+
+    def keep_alive(self, concurrency_key: str, task_id: str, token: int) -> None:
+        """Keep extending the lock of a running task until it is released."""
+        with self._lock:
+            self._held[concurrency_key] = (task_id, token)
+
+            if self._refresher is None or not self._refresher.is_alive():
+                self._refresher = threading.Thread(
+                    target=self._run_refresher,
+                    name='concurrency-lock-refresher',
+                    daemon=True,
+                )
+                self._refresher.start()
+
+    def _run_refresher(self) -> None:
+        stopped = threading.Event()
+        while not stopped.wait(self.ttl_seconds / 3):
+            with self._lock:
+                held = dict(self._held)
+
+            for concurrency_key, (task_id, token) in held.items():
+                try:
+                    refreshed = self.refresh(concurrency_key, task_id, token)
+                except RedisError as error:
+                    logger.warning(
+                        'src::worker::locks::ConcurrencyLockManager::_run_refresher:: '
+                        f'Failed to extend concurrency lock {concurrency_key}: {error}'
+                    )
+                    continue
+
+                if not refreshed:
+                    logger.warning(
+                        'src::worker::locks::ConcurrencyLockManager::_run_refresher:: '
+                        f'Task {task_id} lost concurrency lock {concurrency_key}.'
+                    )
+                    with self._lock:
+                        if self._held.get(concurrency_key) == (task_id, token):
+                            del self._held[concurrency_key]
+
+
+concurrency_locks = ConcurrencyLockManager()
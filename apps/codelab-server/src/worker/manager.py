@@ -42,6 +42,7 @@ class WorkerManager:
             worker_configs += WORKER_CONFIG_TEMPLATE.format(
                 worker_name=worker.name,
                 no_of_threads=worker.no_of_threads,
+                max_async_tasks=settings.WORKER_MAX_ASYNC_TASKS,
                 auto_start=True if worker.status == WorkerStatus.online else False,
             )
             worker_names.append(worker.name)
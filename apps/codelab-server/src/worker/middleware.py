@@ -8,12 +8,17 @@ from taskiq import (
 )
 from sqlmodel import Session, select
 from src.core.db import engine
-from src.models import Worker, WorkerTask
+from src.core.metrics import TASK_QUEUE_WAIT, record_metric
+from src.models import Worker
 from src.schemas import WorkerTaskStatus
-from src.utils import TaskHelper
-from src.log import logger
+from src.worker.heartbeat import worker_heartbeat
+from src.worker.locks import concurrency_locks
+from src.worker.recorder import enqueued_at, worker_task_recorder
 from datetime import datetime
+from typing import Any
+from uuid import UUID
 import os
+import time
 
 
 def require_taskiq_db_session(context: Context = TaskiqDepends()) -> Generator[Session, None, None]:
@@ -25,43 +30,71 @@ def require_taskiq_db_session(context: Context = TaskiqDepends()) -> Generator[S
 class ConcurrencyMiddleware(TaskiqMiddleware):
     """Middleware to handle task concurrency and store task information in DB."""
 
-    def pre_send(self, message: TaskiqMessage) -> TaskiqMessage | None:
-        """Store task in DB before sending to workers and handle concurrency."""
-
-        with Session(engine) as db_session:
-            prevent_concurrency = (
-                message.labels.get('prevent_concurrency', 'False').lower() == 'True'
-            )
-
-            concurrency_key = message.labels.get('concurrency_key', None)
-
-            task = WorkerTask(
-                task_id=message.task_id,
-                task_name=message.task_name,
-                labels=message.labels,
-                concurrency_key=concurrency_key,
-                prevent_concurrency=prevent_concurrency,
-            )
+    def __init__(self) -> None:
+        super().__init__()
+        self._worker_id: UUID | None = None
+
+    def _get_worker_id(self) -> UUID | None:
+        """Id of the worker running this process, looked up once per process."""
+        if self._worker_id is None:
+            with Session(engine) as db_session:
+                worker = db_session.exec(
+                    select(Worker).where(Worker.pid == os.getppid())
+                ).first()
+                self._worker_id = worker.id if worker else None
+
+        return self._worker_id
+
+    @staticmethod
+    def _task_fields(message: TaskiqMessage) -> dict[str, Any]:
+        """WorkerTask fields derived from the message."""
+        fields = {
+            'task_name': message.task_name,
+            'labels': message.labels,
+            'concurrency_key': message.labels.get('concurrency_key', None),
+            'prevent_concurrency': (
+                str(message.labels.get('prevent_concurrency', 'False')).lower() == 'true'
+            ),
+        }
+
+        created_at = enqueued_at(message.labels)
+        if created_at is not None:
+            fields['created_at'] = created_at
+
+        return fields
+
+    @staticmethod
+    def _lock_key(fields: dict[str, Any]) -> str:
+        """Tasks without a concurrency key only conflict with the same task."""
+        return fields['concurrency_key'] or fields['task_name']
 
-            if prevent_concurrency:
-                competing_task = TaskHelper.check_concurrent_task(
-                    db_session=db_session,
-                    concurrency_key=concurrency_key,
-                    task_name=message.task_name,
+    def pre_send(self, message: TaskiqMessage) -> TaskiqMessage | None:
+        """Record the task before sending it to workers and handle concurrency."""
+
+        message.labels['enqueued_at'] = str(time.time())
+        fields = self._task_fields(message)
+
+        if fields['prevent_concurrency']:
+            lock_key = self._lock_key(fields)
+            token = concurrency_locks.acquire(lock_key, message.task_id)
+
+            if token is None:
+                worker_task_recorder.record(
+                    message.task_id,
+                    status=WorkerTaskStatus.cancelled,
+                    cancellation_reason=(
+                        'Task cancelled due to concurrency with task '
+                        f'{concurrency_locks.holder(lock_key)}.'
+                    ),
+                    **fields,
                 )
-
-                if competing_task:
-                    task.status = WorkerTaskStatus.cancelled
-                    task.competing_task = competing_task
-                    task.cancellation_reason = 'Task cancelled due to concurrency.'
-
-            db_session.add(task)
-            db_session.commit()
-
-            if task.status == WorkerTaskStatus.cancelled:
                 # Return None so that message is not sent to worker
                 return None
 
+            message.labels['concurrency_token'] = str(token)
+
+        # the WorkerTask row is written in batches by the worker running the task
+        worker_task_recorder.mark_started(message.task_id)
         return message
 
     def pre_execute(self, message: TaskiqMessage) -> TaskiqMessage | None:
@@ -70,42 +103,67 @@ class ConcurrencyMiddleware(TaskiqMiddleware):
         # We implement task cancellation here as TaskIQ doesn't support it natively
         # This is not a sure way to cancel tasks as if the task is already being
         # executed by the broker we cannot stop it
-        with Session(engine) as db_session:
-            task = db_session.exec(
-                select(WorkerTask).where(WorkerTask.task_id == message.task_id)
-            ).first()
-
-            if task is None:
-                # No DB record found for this task; let it run.
-                logger.warning(
-                    'src::middleware::ConcurrencyMiddleware::pre_execute '
-                    f'No DB record found for task {message.task_id}; letting it run.'
-                )
-                return message
-
-            if task.status == WorkerTaskStatus.cancelled:
-                # If task is cancelled, we return None so that the task is not executed
-                return None
-
-            PID = os.getppid()
-            worker = db_session.exec(select(Worker).where(Worker.pid == PID)).first()
-            task.status = WorkerTaskStatus.in_progress
-            task.worker = worker
-            db_session.add(task)
-            db_session.commit()
-            return message
+        fields = self._task_fields(message)
+        cancellation_reason = None
+
+        if not worker_task_recorder.start_execution(message.task_id):
+            cancellation_reason = 'Task cancelled before execution.'
+        elif fields['prevent_concurrency']:
+            lock_key = self._lock_key(fields)
+            token = int(message.labels.get('concurrency_token', 0))
+
+            # the lock expired while queued and may be held by a newer task
+            if concurrency_locks.refresh(lock_key, message.task_id, token):
+                concurrency_locks.keep_alive(lock_key, message.task_id, token)
+            else:
+                cancellation_reason = 'Task cancelled as its concurrency lock expired.'
+
+        if cancellation_reason is not None:
+            # If task is cancelled, we return None so that the task is not executed
+            self._release_lock(message, fields)
+            worker_task_recorder.record(
+                message.task_id,
+                status=WorkerTaskStatus.cancelled,
+                cancellation_reason=cancellation_reason,
+                **fields,
+            )
+            return None
+
+        worker_heartbeat.task_started(message.task_id)
+        if fields.get('created_at') is not None:
+            record_metric(TASK_QUEUE_WAIT, time.time() - fields['created_at'].timestamp())
+
+        worker_task_recorder.record(
+            message.task_id,
+            status=WorkerTaskStatus.in_progress,
+            worker_id=self._get_worker_id(),
+            **fields,
+        )
+        return message
 
     def post_execute(self, message: TaskiqMessage, result: TaskiqResult) -> None:
         """Update task status in DB to completed."""
 
-        with Session(engine) as db_session:
-            task = db_session.exec(
-                select(WorkerTask).where(WorkerTask.task_id == message.task_id)
-            ).first()
-
-            if task:
-                task.status = WorkerTaskStatus.completed
-                task.completed_at = datetime.now()
-                db_session.add(task)
-                db_session.commit()
+        fields = self._task_fields(message)
+        self._release_lock(message, fields)
+        worker_heartbeat.task_finished(message.task_id)
+        worker_task_recorder.mark_completed(message.task_id)
+        worker_task_recorder.record(
+            message.task_id,
+            status=WorkerTaskStatus.completed,
+            completed_at=datetime.now(),
+            **fields,
+        )
+
+    def _release_lock(self, message: TaskiqMessage, fields: dict[str, Any]) -> None:
+        if fields['prevent_concurrency'] and 'concurrency_token' in message.labels:
+            concurrency_locks.release(
+                self._lock_key(fields),
+                message.task_id,
+                int(message.labels['concurrency_token']),
+            )
 
+    def shutdown(self) -> None:
+        """Write the buffered task records before the process exits."""
+        worker_heartbeat.stop()
+        worker_task_recorder.shutdown()
@@ -0,0 +1,246 @@
+import time
+from collections.abc import AsyncGenerator, Awaitable, Callable
+from enum import StrEnum
+from typing import Any
+
+from redis.asyncio import Redis
+from taskiq import AckableMessage
+from taskiq.message import BrokerMessage
+from taskiq_redis.redis_broker import BaseRedisBroker
+
+from src.core.redis import get_shared_redis_client
+from src.log import logger
+from src.worker.heartbeat import WORKER_HEARTBEATS_SEEN_KEY, worker_heartbeat
+
+TASK_QUEUE_PREFIX = "vpl:task-queue"
+DEFAULT_FAIR_SHARE_KEY = "default"
+
+
+class TaskQueue(StrEnum):
+    """Task queues, workers always take the next task of the highest priority queue."""
+
+    interactive = "interactive"
+    submissions = "submissions"
+    builds = "builds"
+    maintenance = "maintenance"
+
+
+# highest priority first
+QUEUE_PRIORITY = (
+    TaskQueue.interactive,
+    TaskQueue.submissions,
+    TaskQueue.builds,
+    TaskQueue.maintenance,
+)
+
+
+def queue_key(queue: TaskQueue, name: str) -> str:
+    return f"{TASK_QUEUE_PREFIX}:{queue}:{name}"
+
+
+def queue_depths() -> dict[TaskQueue, int]:
+    """Number of messages waiting in each queue."""
+    redis_client = get_shared_redis_client()
+    with redis_client.pipeline(transaction=False) as pipeline:
+        for queue in QUEUE_PRIORITY:
+            pipeline.zcard(queue_key(queue, "pending"))
+        return dict(zip(QUEUE_PRIORITY, pipeline.execute(), strict=True))
+
+
+# keys of a queue in the order the scripts expect them
+_QUEUE_KEY_NAMES = ("pending", "messages", "tags", "clock", "processing", "owners")
+
+# Start-time fair queueing: a message is tagged one past the later of the queue
+# clock and the last tag of its fair share key (e.g the session), so a key with
+# many queued messages cannot delay the first message of another key by more
+# than one message per active key.
+_ENQUEUE_SCRIPT = """
+local clock = tonumber(redis.call('GET', KEYS[4]) or '0')
+local last = tonumber(redis.call('HGET', KEYS[3], ARGV[2]) or '0')
+local tag = math.max(clock, last) + 1
+redis.call('HSET', KEYS[3], ARGV[2], tag)
+redis.call('HSET', KEYS[2], ARGV[1], ARGV[3])
+redis.call('ZADD', KEYS[1], tag, ARGV[1])
+return tag
+"""
+
+# pop the message with the lowest tag of the first non empty queue, the message
+# is kept as processing by the consumer until it is acknowledged
+_DEQUEUE_SCRIPT = """
+for index = 1, #KEYS, 6 do
+    while true do
+        local popped = redis.call('ZPOPMIN', KEYS[index])
+        if #popped == 0 then
+            break
+        end
+
+        local member, tag = popped[1], popped[2]
+        redis.call('SET', KEYS[index + 3], tag)
+
+        local fair_share_key = string.match(member, '^(.*)|')
+        local last = redis.call('HGET', KEYS[index + 2], fair_share_key)
+        if last and tonumber(last) <= tonumber(tag) then
+            redis.call('HDEL', KEYS[index + 2], fair_share_key)
+        end
+
+        local data = redis.call('HGET', KEYS[index + 1], member)
+        if data then
+            redis.call('ZADD', KEYS[index + 4], ARGV[1], member)
+            redis.call('HSET', KEYS[index + 5], member, ARGV[2])
+            return {(index - 1) / 6, member, data}
+        end
+    end
+end
+return false
+"""
+
+_ACK_SCRIPT = """
+redis.call('ZREM', KEYS[1], ARGV[1])
+redis.call('HDEL', KEYS[2], ARGV[1])
+redis.call('HDEL', KEYS[3], ARGV[1])
+return 1
+"""
+
+# put messages of consumers that stopped sending heartbeats back at the front
+# of their queue, KEYS[7] holds the time of the last heartbeat of each consumer
+_RECLAIM_SCRIPT = """
+local candidates = redis.call('ZRANGEBYSCORE', KEYS[5], '-inf', ARGV[1])
+local clock = tonumber(redis.call('GET', KEYS[4]) or '0')
+local requeued = 0
+for _, member in ipairs(candidates) do
+    local owner = redis.call('HGET', KEYS[6], member)
+    local seen = owner and redis.call('ZSCORE', KEYS[7], owner)
+    if not seen or tonumber(seen) < tonumber(ARGV[1]) then
+        redis.call('ZREM', KEYS[5], member)
+        redis.call('HDEL', KEYS[6], member)
+        if redis.call('HEXISTS', KEYS[2], member) == 1 then
+            redis.call('ZADD', KEYS[1], clock, member)
+            requeued = requeued + 1
+        end
+    end
+end
+return requeued
+"""
+
+
+class PriorityRedisBroker(BaseRedisBroker):
+    """
+    Redis broker with prioritised task queues and per key fair share.
+
+    Messages are routed by their `queue_name` label into one of the
+    `TaskQueue` queues and ordered within it by their `fair_share_key` label,
+    so interactive runs are never queued behind graded submissions, image
+    builds or maintenance tasks, and a session submitting in bulk does not
+    starve other sessions. Messages taken by a consumer that stops sending
+    heartbeats for `heartbeat_timeout` seconds are delivered again.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        default_queue: TaskQueue = TaskQueue.maintenance,
+        poll_timeout: int = 2,
+        heartbeat_timeout: float = 30,
+        **connection_kwargs: Any,
+    ) -> None:
+        super().__init__(url, **connection_kwargs)
+        self.default_queue = default_queue
+        self.poll_timeout = poll_timeout
+        self.heartbeat_timeout = heartbeat_timeout
+        self.wakeup_key = f"{TASK_QUEUE_PREFIX}:wakeup"
+        self._last_reclaim = 0.0
+
+    @staticmethod
+    def _queue_keys(queue: TaskQueue) -> list[str]:
+        return [queue_key(queue, name) for name in _QUEUE_KEY_NAMES]
+
+    def _message_queue(self, message: BrokerMessage) -> TaskQueue:
+        queue_name = message.labels.get("queue_name") or self.default_queue
+        try:
+            return TaskQueue(queue_name)
+        except ValueError:
+            logger.warning(
+                'src::worker::queues::PriorityRedisBroker::_message_queue:: '
+                f'Unknown queue {queue_name} of task {message.task_name}, '
+                f'using the {self.default_queue} queue.'
+            )
+            return self.default_queue
+
+    async def kick(self, message: BrokerMessage) -> None:
+        """Add a message to its queue and wake up an idle worker."""
+        queue = self._message_queue(message)
+        fair_share_key = str(message.labels.get("fair_share_key") or DEFAULT_FAIR_SHARE_KEY)
+
+        async with Redis(connection_pool=self.connection_pool) as redis_conn:
+            pipeline = redis_conn.pipeline(transaction=False)
+            pipeline.eval(
+                _ENQUEUE_SCRIPT,
+                len(_QUEUE_KEY_NAMES),
+                *self._queue_keys(queue),
+                f"{fair_share_key}|{message.task_id}",
+                fair_share_key,
+                message.message,
+            )
+            pipeline.lpush(self.wakeup_key, 1)
+            pipeline.ltrim(self.wakeup_key, 0, 999)
+            await pipeline.execute()
+
+    def _ack_generator(self, queue: TaskQueue, member: bytes) -> Callable[[], Awaitable[None]]:
+        async def _ack() -> None:
+            async with Redis(connection_pool=self.connection_pool) as redis_conn:
+                await redis_conn.eval(
+                    _ACK_SCRIPT,
+                    3,
+                    queue_key(queue, "processing"),
+                    queue_key(queue, "messages"),
+                    queue_key(queue, "owners"),
+                    member,
+                )
+
+        return _ack
+
+    async def _reclaim(self, redis_conn: Redis) -> None:
+        """Deliver the messages of dead consumers again, checked at most once per poll timeout."""
+        now = time.time()
+        if now - self._last_reclaim < self.poll_timeout:
+            return
+        self._last_reclaim = now
+
+        for queue in QUEUE_PRIORITY:
+            reclaimed = await redis_conn.eval(
+                _RECLAIM_SCRIPT,
+                len(_QUEUE_KEY_NAMES) + 1,
+                *self._queue_keys(queue),
+                WORKER_HEARTBEATS_SEEN_KEY,
+                now - self.heartbeat_timeout,
+            )
+            if reclaimed:
+                logger.warning(
+                    'src::worker::queues::PriorityRedisBroker::_reclaim:: '
+                    f'Requeued {reclaimed} messages of dead consumers from the {queue} queue.'
+                )
+
+    async def listen(self) -> AsyncGenerator[AckableMessage, None]:
+        """Take messages by queue priority, waiting for a wake up when all queues are empty."""
+        keys = [key for queue in QUEUE_PRIORITY for key in self._queue_keys(queue)]
+
+        # messages are owned by this consumer while its heartbeat is alive
+        worker_heartbeat.start()
+        consumer_id = worker_heartbeat.consumer_id
+
+        async with Redis(connection_pool=self.connection_pool) as redis_conn:
+            while True:
+                await self._reclaim(redis_conn)
+
+                dequeued = await redis_conn.eval(
+                    _DEQUEUE_SCRIPT, len(keys), *keys, time.time(), consumer_id
+                )
+                if not dequeued:
+                    await redis_conn.blpop([self.wakeup_key], timeout=self.poll_timeout)
+                    continue
+
+                index, member, data = dequeued
+                yield AckableMessage(
+                    data=data,
+                    ack=self._ack_generator(QUEUE_PRIORITY[int(index)], member),
+                )
@@ -0,0 +1,213 @@
+import threading
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy.exc import SQLAlchemyError
+from sqlmodel import Session, col, select
+
+from src.core.config import settings
+from src.core.db import engine
+from src.core.redis import get_shared_redis_client
+from src.log import logger
+from src.models import WorkerTask
+from src.schemas import WorkerTaskStatus
+
+WORKER_TASK_STATUS_PREFIX = "vpl:worker-task-status"
+WORKER_TASK_STATUS_TTL_SECONDS = 24 * 60 * 60
+
+# records of one task may be flushed out of order, a status never moves backwards
+STATUS_RANKS = {
+    WorkerTaskStatus.started: 0,
+    WorkerTaskStatus.in_progress: 1,
+    WorkerTaskStatus.completed: 2,
+    WorkerTaskStatus.cancelled: 2,
+}
+
+# mark a task in progress unless it was cancelled while queued
+_START_EXECUTION_SCRIPT = """
+local status = redis.call('GET', KEYS[1])
+if status == 'cancelled' then
+    return status
+end
+redis.call('SET', KEYS[1], 'in_progress', 'EX', ARGV[1])
+return status or false
+"""
+
+# cancel a task only while it is still queued
+_CANCEL_SCRIPT = """
+local status = redis.call('GET', KEYS[1])
+if status == 'started' then
+    redis.call('SET', KEYS[1], 'cancelled', 'EX', ARGV[1])
+    return 1
+end
+if status then
+    return 0
+end
+return -1
+"""
+
+
+class WorkerTaskRecorder:
+    """
+    Record WorkerTask state transitions without a database round trip per task.
+
+    The live status of a task is kept in Redis, which every process can update
+    atomically, while the WorkerTask rows are buffered and written in a single
+    transaction every `flush_interval` seconds or once `batch_size` records
+    are pending.
+    """
+
+    def __init__(
+        self,
+        flush_interval: float | None = None,
+        batch_size: int | None = None,
+    ) -> None:
+        self.flush_interval = (
+            flush_interval
+            if flush_interval is not None
+            else settings.WORKER_TASK_FLUSH_INTERVAL
+        )
+        self.batch_size = (
+            batch_size if batch_size is not None else settings.WORKER_TASK_FLUSH_BATCH_SIZE
+        )
+        self.redis_client = get_shared_redis_client()
+        self._start_execution_script = self.redis_client.register_script(_START_EXECUTION_SCRIPT)
+        self._cancel_script = self.redis_client.register_script(_CANCEL_SCRIPT)
+        self._pending: dict[str, dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._flusher: threading.Thread | None = None
+        self._stopped = threading.Event()
+
+    @staticmethod
+    def _status_key(task_id: str) -> str:
+        return f"{WORKER_TASK_STATUS_PREFIX}:{task_id}"
+
+    def mark_started(self, task_id: str) -> None:
+        """Mark a task as queued."""
+        self.redis_client.set(
+            self._status_key(task_id),
+            WorkerTaskStatus.started,
+            ex=WORKER_TASK_STATUS_TTL_SECONDS,
+            nx=True,
+        )
+
+    def start_execution(self, task_id: str) -> bool:
+        """Mark a task as in progress, `False` when it was cancelled while queued."""
+        status = self._start_execution_script(
+            keys=[self._status_key(task_id)],
+            args=[WORKER_TASK_STATUS_TTL_SECONDS],
+        )
+        return status != WorkerTaskStatus.cancelled
+
+    def mark_completed(self, task_id: str) -> None:
+        self.redis_client.set(
+            self._status_key(task_id),
+            WorkerTaskStatus.completed,
+            ex=WORKER_TASK_STATUS_TTL_SECONDS,
+        )
+
+    def cancel(self, task_id: str) -> bool | None:
+        """
+        Cancel a queued task, `False` once it is in progress or done and `None`
+        when Redis has no status for the task.
+        """
+        cancelled = self._cancel_script(
+            keys=[self._status_key(task_id)],
+            args=[WORKER_TASK_STATUS_TTL_SECONDS],
+        )
+        return None if cancelled == -1 else bool(cancelled)
+
+    def record(self, task_id: str, **fields: Any) -> None:
+        """Buffer changes to the WorkerTask row of a task."""
+        with self._lock:
+            pending = self._pending.setdefault(task_id, {'task_id': task_id})
+
+            status = fields.pop('status', None)
+            if status is not None and STATUS_RANKS[status] >= STATUS_RANKS[
+                pending.get('status', WorkerTaskStatus.started)
+            ]:
+                pending['status'] = status
+            pending.update(fields)
+
+            should_flush = len(self._pending) >= self.batch_size
+
+        self._ensure_flusher()
+        if should_flush:
+            self.flush()
+
+    def _apply(self, task: WorkerTask, fields: dict[str, Any]) -> None:
+        for name, value in fields.items():
+            if name == 'status' and STATUS_RANKS[value] < STATUS_RANKS[task.status]:
+                continue
+            setattr(task, name, value)
+
+    def flush(self) -> None:
+        """Write every pending record in a single transaction."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+
+        if not pending:
+            return
+
+        try:
+            with Session(engine) as db_session:
+                existing = {
+                    task.task_id: task
+                    for task in db_session.exec(
+                        select(WorkerTask).where(col(WorkerTask.task_id).in_(list(pending)))
+                    ).all()
+                }
+
+                for task_id, fields in pending.items():
+                    task = existing.get(task_id)
+                    if task is None:
+                        task = WorkerTask(**fields)
+                    else:
+                        self._apply(task, fields)
+                    db_session.add(task)
+
+                db_session.commit()
+        except SQLAlchemyError as error:
+            logger.error(
+                'src::worker::recorder::WorkerTaskRecorder::flush:: '
+                f'Failed to write {len(pending)} worker task records, retrying later: {error}'
+            )
+            # keep the records, newer changes recorded meanwhile take precedence
+            with self._lock:
+                for task_id, fields in pending.items():
+                    self._pending[task_id] = {**fields, **self._pending.get(task_id, {})}
+
+    def _ensure_flusher(self) -> None:
+        """Start the background flusher of this process."""
+        if self._flusher is not None and self._flusher.is_alive():
+            return
+
+        with self._lock:
+            if self._flusher is not None and self._flusher.is_alive():
+                return
+            self._stopped.clear()
+            self._flusher = threading.Thread(
+                target=self._run_flusher,
+                name='worker-task-recorder',
+                daemon=True,
+            )
+            self._flusher.start()
+
+    def _run_flusher(self) -> None:
+        while not self._stopped.wait(self.flush_interval):
+            self.flush()
+
+    def shutdown(self) -> None:
+        """Stop the background flusher and write the remaining records."""
+        self._stopped.set()
+        self.flush()
+
+
+def enqueued_at(labels: dict[str, Any]) -> datetime | None:
+    """Time a message was sent, recorded in its labels by the middleware."""
+    value = labels.get('enqueued_at')
+    return datetime.fromtimestamp(float(value)) if value is not None else None
+
+
+worker_task_recorder = WorkerTaskRecorder()
+
@@ -1,11 +1,19 @@
 from typing import Annotated
 from fastapi import APIRouter, Depends, status
 from src.core.schemas import ErrorResponseSchema, APIErrorCodes
-from src.worker.schemas import SystemLogSchema, UpdateWorkerSchema, WorkerDetailSchema
+from src.core.metrics import MetricSummary
+from src.worker.schemas import (
+    SystemLogSchema,
+    UpdateWorkerSchema,
+    WorkerDetailSchema,
+    WorkerHeartbeatSchema,
+)
 from src.worker.services import (
     add_worker_service,
     delete_worker_service,
+    get_metrics_service,
     get_system_logs_service,
+    get_worker_heartbeats_service,
     list_workers_service,
     update_worker_service,
     worker_details_service,
@@ -254,3 +262,19 @@ def fetch_system_status_logs(
     """Fetch system status logs."""
     return logs
 
+
+
+@router.get("/metrics")
+def fetch_metrics(
+    metrics: Annotated[list[MetricSummary], Depends(get_metrics_service)]
+) -> list[MetricSummary]:
+    """Fetch sandbox metrics such as the container start latency."""
+    return metrics
+
+
+@router.get("/heartbeats")
+def fetch_worker_heartbeats(
+    heartbeats: Annotated[list[WorkerHeartbeatSchema], Depends(get_worker_heartbeats_service)]
+) -> list[WorkerHeartbeatSchema]:
+    """Fetch the heartbeats of worker processes with the tasks they are executing."""
+    return heartbeats
@@ -104,3 +104,13 @@ class SystemLogSchema(BaseModel):
     memory_usage: float
     disk_usage: float
     created_at: datetime
+
+
+class WorkerHeartbeatSchema(BaseModel):
+    consumer_id: str
+    pid: int
+    ppid: int
+    in_flight_tasks: list[str]
+    load_average: float
+    timestamp: datetime
+    alive: bool = True
@@ -6,6 +6,7 @@ from typing import Annotated
 from datetime import datetime
 from fastapi import Depends, Query, Path, Body, status
 from src.core.exceptions import APIException
+from src.core.metrics import MetricSummary, TRACKED_METRICS, summarize_metric
 from src.core.schemas import APIErrorCodes
 from src.models import Worker, Admin, SystemStatusLog
 from src.utils import atomic_transaction_block
@@ -13,12 +14,14 @@ from src.schemas import WorkerStatus
 from sqlmodel import select, Session, desc
 from pydantic import PositiveInt
 from uuid import UUID
+from src.worker.heartbeat import worker_registry
 from src.worker.manager import WorkerManager
 from src.worker.schemas import (
     CreateWorkerSchema,
     SystemLogSchema, 
     UpdateWorkerSchema, 
     WorkerDetailSchema,
+    WorkerHeartbeatSchema,
 )
 
 
@@ -194,3 +197,17 @@ async def get_system_logs_service(
     records = db_session.exec(query.order_by(desc(SystemStatusLog.created_at))).all()
     return [SystemLogSchema.model_validate(log) for log in records]
 
+
+
+def get_metrics_service(
+    admin: Annotated[Admin, Depends(require_super_admin)],
+) -> list[MetricSummary]:
+    """Summarize the recorded sandbox metrics."""
+    return [summarize_metric(name) for name in TRACKED_METRICS]
+
+
+def get_worker_heartbeats_service(
+    admin: Annotated[Admin, Depends(require_super_admin)],
+) -> list[WorkerHeartbeatSchema]:
+    """List the heartbeats of worker processes, including processes that stopped sending them."""
+    return worker_registry.heartbeats()
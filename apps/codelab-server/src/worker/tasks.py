@@ -3,6 +3,7 @@ from uuid import UUID
 from sqlmodel import Session, select
 from taskiq import TaskiqDepends
 from .worker import broker
+from .autoscaler import WorkerAutoscaler
 from .manager import WorkerManager
 from .middleware import require_taskiq_db_session
 from src.models import SystemStatusLog, Worker
@@ -81,3 +82,19 @@ async def system_monitor_task(
     db_session.add(system_log)
     db_session.commit()
 
+
+
+@broker.task(
+    task_name='autoscale_workers_task',
+    prevent_concurrency=True,
+    schedule=[{"cron": "* * * * *"}],  # Run every minute
+)
+async def autoscale_workers_task(
+    db_session: Annotated[Session, TaskiqDepends(require_taskiq_db_session)]
+) -> None:
+    """Add or stop workers based on the queue backlog."""
+    if not settings.AUTOSCALER_ENABLED:
+        return
+
+    autoscaler = WorkerAutoscaler(db_session=db_session)
+    autoscaler.run()
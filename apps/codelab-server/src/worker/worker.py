@@ -1,15 +1,19 @@
 import taskiq_fastapi
-from taskiq_redis import RedisAsyncResultBackend, RedisStreamBroker
+from taskiq_redis import RedisAsyncResultBackend
 from taskiq.schedule_sources import LabelScheduleSource
 from taskiq import TaskiqScheduler
 from src.core.config import settings
 from .middleware import ConcurrencyMiddleware
+from .queues import PriorityRedisBroker, TaskQueue
 
 # Setup result backend and broker
 result_backend = RedisAsyncResultBackend(redis_url=settings.WORKER_BROKER_URL)
 
-broker = RedisStreamBroker(
+# tasks without a queue label (e.g scheduled tasks) are maintenance tasks
+broker = PriorityRedisBroker(
     url=settings.WORKER_BROKER_URL,
+    default_queue=TaskQueue.maintenance,
+    heartbeat_timeout=settings.WORKER_HEARTBEAT_TIMEOUT,
 ).with_result_backend(result_backend)
 broker.add_middlewares(ConcurrencyMiddleware())
 
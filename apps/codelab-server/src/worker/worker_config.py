@@ -11,7 +11,7 @@ WORKER_CONFIG_TEMPLATE = (
 """
 
 [program:{worker_name}]
-command=taskiq worker -fsd src.worker:broker -w "{no_of_threads}" --tasks-pattern "./src/**/tasks.py"
+command=taskiq worker -fsd src.worker:broker -w "{no_of_threads}" --max-async-tasks "{max_async_tasks}" --tasks-pattern "./src/**/tasks.py"
 process_name=%(program_name)s
 numprocs=1
 directory=/codelab